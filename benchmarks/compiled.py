@@ -0,0 +1,85 @@
+# coding: utf-8
+"""
+Benchmark of the generation of random examples.
+Compares generating random examples from the intent definitions of
+a template file (`generate_random`) with generating them from the program
+those definitions compile to (cf. `chatette.compiler.Program`),
+and checks both give the same examples.
+
+Usage (from the root of the repository):
+    python benchmarks/compiled.py [<template-file>] [<nb-examples>]
+"""
+
+from __future__ import print_function
+
+import gc
+import sys
+import time
+
+from chatette.parsing.parser import Parser
+from chatette.random_stream import RandomStream
+from chatette.units.ast import AST
+from chatette.utils import UnitType
+from chatette.compiler import Program
+
+
+DEFAULT_TEMPLATE = "examples/complex/metal-work/master.chatette"
+DEFAULT_NB_EXAMPLES = 1000000
+SEED = "benchmark"
+
+
+def generate_from_ast(intents, nb_examples):
+    rng = RandomStream(SEED)
+    nb_examples_per_intent = nb_examples // len(intents)
+    examples = []
+    for intent_name in sorted(intents):
+        definition = intents[intent_name]
+        for _ in range(nb_examples_per_intent):
+            examples.append(definition.generate_random(rng=rng))
+    return examples
+
+def generate_from_program(intents, nb_examples):
+    program = Program()
+    rng = RandomStream(SEED)
+    nb_examples_per_intent = nb_examples // len(intents)
+    examples = []
+    for intent_name in sorted(intents):
+        examples.extend(
+            program.generate_random_examples(
+                nb_examples_per_intent, UnitType.intent, intent_name, rng=rng
+            )
+        )
+    return examples
+
+
+def main():
+    template_filepath = DEFAULT_TEMPLATE
+    nb_examples = DEFAULT_NB_EXAMPLES
+    if len(sys.argv) > 1:
+        template_filepath = sys.argv[1]
+    if len(sys.argv) > 2:
+        nb_examples = int(sys.argv[2])
+
+    Parser().parse_file(template_filepath)
+    intents = AST.get_or_create()[UnitType.intent]
+    print(
+        "Generating " + str(nb_examples) + " random examples of " + \
+        str(len(intents)) + " intents from '" + template_filepath + "'"
+    )
+    results = []
+    for (name, function) in (
+        ("AST", generate_from_ast), ("compiled", generate_from_program)
+    ):
+        # Like `timeit`, don't let the garbage collector scan the examples
+        gc.disable()
+        start_time = time.time()
+        results.append(function(intents, nb_examples))
+        duration = time.time() - start_time
+        gc.enable()
+        print(name.ljust(9) + ": " + str(round(duration, 2)) + " s")
+    if results[0] != results[1]:
+        raise ValueError("Both generations gave different examples.")
+
+
+if __name__ == "__main__":
+    main()
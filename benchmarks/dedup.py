@@ -0,0 +1,108 @@
+# coding: utf-8
+"""
+Benchmark of the deduplication of generated examples.
+Compares the former sorted-list deduplication (binary search followed by
+`list.insert` for each example) with `chatette.units.ExampleSet` on all the
+examples that can be generated from the intents of a template file.
+
+Usage (from the root of the repository):
+    python benchmarks/dedup.py [<template-file>] [<nb-repetitions>]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+from math import floor
+
+from chatette.parsing.parser import Parser
+from chatette.units import ExampleSet
+from chatette.units.ast import AST
+
+
+DEFAULT_TEMPLATE = "examples/complex/metal-work/master.chatette"
+# Rules that can generate more examples than this are too large to be
+# exhaustively generated in a reasonable time and are thus skipped
+MAX_NB_POSSIBILITIES_PER_RULE = 100000
+
+
+def legacy_add_example_no_dup(example_list, new_example):
+    """Former implementation of `chatette.units.add_example_no_dup`."""
+    lo = 0
+    hi = len(example_list) - 1
+    i = int(floor(hi/2))
+    found = False
+    while lo <= hi:
+        current_text = example_list[i].text
+        if current_text == new_example.text:
+            found = True
+            break
+        elif current_text > new_example.text:
+            hi = float(i - 1)
+        else:
+            lo = float(i + 1)
+        i = int(floor(abs(hi - lo)/2) + lo)
+    if not found:
+        example_list.insert(i, new_example)
+    elif len(example_list[i].entities) < len(new_example.entities):
+        example_list[i] = new_example
+    return example_list
+
+
+def legacy_dedup(examples):
+    result = []
+    for ex in examples:
+        legacy_add_example_no_dup(result, ex)
+    return result
+
+def example_set_dedup(examples):
+    return ExampleSet(examples).to_sorted_list()
+
+
+def collect_examples(template_filepath):
+    """
+    Parses `template_filepath` and returns the list of all the examples
+    the rules of its intents can generate (with duplicates).
+    Rules with more than `MAX_NB_POSSIBILITIES_PER_RULE` possibilities
+    are skipped.
+    """
+    Parser().parse_file(template_filepath)
+    examples = []
+    intents = AST.get_or_create()["intent"]
+    for intent_name in intents:
+        for rule in intents[intent_name]._get_relevant_rules(None):
+            nb_possibilities = rule.get_max_nb_possibilities()
+            if nb_possibilities <= MAX_NB_POSSIBILITIES_PER_RULE:
+                examples.extend(rule.generate_all())
+    # Each example is added several times, as happens when several rules
+    # or choices generate the same examples
+    return examples * 3
+
+
+def main():
+    template_filepath = DEFAULT_TEMPLATE
+    nb_repetitions = 5
+    if len(sys.argv) > 1:
+        template_filepath = sys.argv[1]
+    if len(sys.argv) > 2:
+        nb_repetitions = int(sys.argv[2])
+
+    examples = collect_examples(template_filepath)
+    if legacy_dedup(examples) != example_set_dedup(examples):
+        raise ValueError("Both deduplications gave different results.")
+    print(
+        "Deduplicating " + str(len(examples)) + " examples (" + \
+        str(len(example_set_dedup(examples))) + " unique) from '" + \
+        template_filepath + "'"
+    )
+    for (name, function) in (
+        ("sorted list", legacy_dedup), ("ExampleSet", example_set_dedup)
+    ):
+        duration = min(timeit.repeat(
+            lambda: function(examples), repeat=nb_repetitions, number=1
+        ))
+        print(name.ljust(12) + ": " + str(round(duration * 1000, 1)) + " ms")
+
+
+if __name__ == "__main__":
+    main()
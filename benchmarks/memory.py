@@ -0,0 +1,62 @@
+# coding: utf-8
+"""
+Benchmark of the memory used by generated examples.
+Generates the training and testing examples of a template file as the
+command-line program would (without writing them) and reports the memory
+they use, per example.
+
+Usage (from the root of the repository, with Python 3):
+    python benchmarks/memory.py [<template-file>] [<seed>]
+"""
+
+from __future__ import print_function
+
+import sys
+import random
+import tracemalloc
+
+from chatette.parsing.parser import Parser
+from chatette.generator import Generator
+
+
+DEFAULT_TEMPLATE = "examples/complex/metal-work/master.chatette"
+
+
+def main():
+    template_filepath = DEFAULT_TEMPLATE
+    seed = "memory-benchmark"
+    if len(sys.argv) > 1:
+        template_filepath = sys.argv[1]
+    if len(sys.argv) > 2:
+        seed = sys.argv[2]
+    random.seed(seed)
+
+    Parser().parse_file(template_filepath)
+    generator = Generator()
+
+    # Only the examples that are kept alive are measured, not the temporary
+    # objects created when generating them
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    train_examples = list(generator.generate_train())
+    test_examples = list(generator.generate_test(train_examples))
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    nb_examples = len(train_examples) + len(test_examples)
+    nb_entities = sum(
+        len(ex.entities) for ex in train_examples + test_examples
+    )
+    nb_bytes = sum(
+        stat.size_diff for stat in snapshot.compare_to(baseline, "filename")
+    )
+    print(
+        "Generated " + str(nb_examples) + " examples (" + \
+        str(nb_entities) + " entities) from '" + template_filepath + "'"
+    )
+    print("Total memory: " + str(round(nb_bytes / 1e6, 1)) + " MB")
+    print("Per example:  " + str(nb_bytes // max(nb_examples, 1)) + " bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# coding: utf-8
+"""
+Benchmark of the parsing of template files.
+Compares the lexing of each line of a template file (and of the files
+it includes) by the lexing rules (`RuleLine`) with the lexing by the lexer,
+which tokenizes most lines in one pass using the scanner
+(`chatette.parsing.lexing.scanner`), as well as the whole parsing of
+the file with and without the scanner.
+
+Usage (from the root of the repository):
+    python benchmarks/parsing.py [<template-file>] [<nb-repetitions>]
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from chatette.parsing.lexing import lexer as lexer_module
+from chatette.parsing.lexing.rule_line import RuleLine
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.parsing.parser import Parser
+from chatette.units.ast import AST
+
+
+DEFAULT_TEMPLATE = "examples/complex/metal-work/master.chatette"
+
+
+def collect_lines(template_filepath):
+    """
+    Parses `template_filepath` and returns the list of the lines
+    the lexer was given, along with whether they were inside
+    a slot definition.
+    """
+    lines = []
+    parser = Parser()
+    lex = parser.lexer.lex
+    def recording_lex(text, parsing_slot_def=False):
+        lines.append((text, parsing_slot_def))
+        return lex(text, parsing_slot_def)
+    parser.lexer.lex = recording_lex
+    parser.parse_file(template_filepath)
+    return lines
+
+
+def lex_with_rules(lines):
+    for (text, parsing_slot_def) in lines:
+        rule = RuleLine(text)
+        rule.matches(parsing_slot_def=parsing_slot_def)
+        for token in rule.get_lexical_tokens():
+            token.remove_escapement()
+
+def lex_with_lexer(lines):
+    lexer = lexer_module.Lexer()
+    for (text, parsing_slot_def) in lines:
+        lexer.lex(text, parsing_slot_def)
+
+
+def parse(template_filepath):
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    Parser().parse_file(template_filepath)
+
+def parse_without_scanner(template_filepath):
+    scan_line = lexer_module.scan_line
+    lexer_module.scan_line = lambda text, parsing_slot_def=False: None
+    try:
+        parse(template_filepath)
+    finally:
+        lexer_module.scan_line = scan_line
+
+
+def main():
+    template_filepath = DEFAULT_TEMPLATE
+    nb_repetitions = 5
+    if len(sys.argv) > 1:
+        template_filepath = sys.argv[1]
+    if len(sys.argv) > 2:
+        nb_repetitions = int(sys.argv[2])
+
+    lines = collect_lines(template_filepath)
+    print(
+        "Lexing and parsing " + str(len(lines)) + " lines from '" + \
+        template_filepath + "'"
+    )
+    for (name, function, argument) in (
+        ("lexing rules", lex_with_rules, lines),
+        ("lexer", lex_with_lexer, lines),
+        ("parsing (rules)", parse_without_scanner, template_filepath),
+        ("parsing", parse, template_filepath),
+    ):
+        duration = min(timeit.repeat(
+            lambda: function(argument), repeat=nb_repetitions, number=1
+        ))
+        print(name.ljust(16) + ": " + str(round(duration * 1000, 1)) + " ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,25 @@
 # coding: utf-8
 
 import argparse
+import os
 import sys
 
 from chatette import __version__, prechecks
+from chatette.log import print_DBG
 from chatette.facade import Facade
+from chatette.parsing.parser import Parser
+from chatette.compiler.codegen import write_module
 from chatette.cli.interpreter import CommandLineInterpreter
 
 
 def main():
+    # NOTE argument parsers cannot have both a positional argument and
+    #      subcommands: a master template file named `compile`
+    #      must thus be written `./compile` (cf. `README.md`)
+    if sys.argv[1:2] == ["compile"]:
+        compile_templates(sys.argv[2:])
+        return
+
     argument_parser = make_argument_parser()
     if len(sys.argv[1:]) == 0:
         argument_parser.print_help()
@@ -28,6 +39,46 @@ def main():
         cli.wait_for_input()
 
 
+def compile_templates(argv):
+    """
+    Writes the standalone Python module generating the examples of
+    the templates (cf. `chatette.compiler.codegen`), as described by
+    the command line arguments `argv` (which follow `compile`).
+    """
+    args = make_compile_argument_parser().parse_args(argv)
+
+    prechecks.ensure_preconditions()
+
+    output_filepath = args.output
+    if output_filepath is None:
+        output_filepath = \
+            os.path.splitext(os.path.basename(args.input))[0] + ".py"
+    Parser().parse_file(args.input)
+    write_module(output_filepath, template_name=args.input)
+    print_DBG("Wrote generation module to '" + output_filepath + "'.")
+
+
+def make_compile_argument_parser():
+    argument_parser = argparse.ArgumentParser(
+        description="Chatette v" + __version__ + " -- " +
+                    "Compiles template files into a standalone Python " +
+                    "module generating their examples",
+        prog="Chatette compile",
+        add_help=True
+    )
+    argument_parser.add_argument(
+        "input", type=str,
+        help="Path to master template file"
+    )
+    argument_parser.add_argument(
+        "-o", "--out", dest="output", required=False, type=str, default=None,
+        help="Path to the Python module to write (by default, the name of " + \
+             "the template file with extension '.py', in the current " + \
+             "working directory)"
+    )
+    return argument_parser
+
+
 def make_argument_parser():
     # pylint: disable=bad-continuation
     argument_parser = argparse.ArgumentParser(
@@ -61,7 +112,9 @@ def _add_positional_arguments(argument_parser, should_be_optional=False):
     else:
         argument_parser.add_argument(
             "input", type=str,
-            help="Path to master template file"
+            help="Path to master template file (write './compile' " + \
+                 "for a file named 'compile', which runs the command " + \
+                 "compiling templates otherwise)"
         )
 
 
@@ -111,6 +164,33 @@ def _add_optional_arguments(argument_parser):
         required=False, action="store_true", default=False,
         help="Don't ask for confirmation before overwriting files and folders"
     )
+    argument_parser.add_argument(
+        "-j", "--jobs", dest="jobs",
+        required=False, type=int, default=1,
+        help="Number of processes generating the examples of " + \
+             "the different intents in parallel"
+    )
+    argument_parser.add_argument(
+        "--parse-jobs", dest="parse_jobs",
+        required=False, type=int, default=1,
+        help="Number of processes parsing the different template files " + \
+             "in parallel"
+    )
+    argument_parser.add_argument(
+        "--cache-dir", dest="cache_dir",
+        required=False, type=str, default=None,
+        help="Directory where the parsed templates and the examples " + \
+             "of the units are stored to be reused in later runs " + \
+             "(as long as the templates and units don't change)"
+    )
+    argument_parser.add_argument(
+        "--incremental", dest="incremental",
+        required=False, action="store_true", default=False,
+        help="Only regenerate the intents affected by the changes made " + \
+             "to the template files since the last incremental generation " + \
+             "in the output directory (each intent is written in its own " + \
+             "output files)"
+    )
 
 
 if __name__ == "__main__":
@@ -9,9 +9,8 @@ import io
 import os
 
 from abc import ABCMeta, abstractmethod
+from itertools import chain, islice
 from future.utils import with_metaclass
-# pylint: disable=redefined-builtin
-from six.moves import range
 
 
 class Batch(object):
@@ -39,16 +38,18 @@ class Adapter(with_metaclass(ABCMeta, object)):
         Creates files in `output/output_directory` and
         writes batches of the examples `examples` and synonyms `synonyms`
         into them.
+        `examples` can be any iterable of examples: they are consumed
+        one batch at a time.
         """
-        if self._batch_size is not None:
-            single_file_output = (len(examples) <= self._batch_size)
-        else:
-            single_file_output = True
+        batches = self.__generate_batch(examples, synonyms, self._batch_size)
+        # Look one batch ahead to know whether there will be several files
+        first_batches = list(islice(batches, 2))
+        single_file_output = (len(first_batches) <= 1)
 
         if not os.path.exists(output_directory):
             os.makedirs(output_directory)
 
-        for batch in self.__generate_batch(examples, synonyms, self._batch_size):
+        for batch in chain(first_batches, batches):
             output_file_path = \
                 self.__get_file_name(
                     batch, output_directory, single_file_output
@@ -92,18 +93,15 @@ class Adapter(with_metaclass(ABCMeta, object)):
         one batch containing all the examples will be generated.
         """
         if nb_examples_per_batch is None:
-            yield Batch(0, examples[:], synonyms)
+            yield Batch(0, list(examples), synonyms)
         else:
-            length = len(examples)
-            for (batch_index, i) in enumerate(
-                range(0, length, nb_examples_per_batch)
-            ):
-                yield \
-                    Batch(
-                        batch_index,
-                        examples[i:min(i + nb_examples_per_batch, length)],
-                        synonyms
-                    )
+            examples = iter(examples)
+            batch_index = 0
+            batch_examples = list(islice(examples, nb_examples_per_batch))
+            while len(batch_examples) > 0:
+                yield Batch(batch_index, batch_examples, synonyms)
+                batch_index += 1
+                batch_examples = list(islice(examples, nb_examples_per_batch))
 
 
     @abstractmethod
@@ -0,0 +1,9 @@
+# coding: utf-8
+"""
+Module `chatette.caching`
+Contains the caches of generated examples:
+- ExampleCache, the in-memory cache shared by all the items, which keeps
+  the examples generated most recently within a memory budget.
+- the disk cache, which stores the examples of unit definitions in
+  a directory to reuse them in later runs.
+"""
@@ -0,0 +1,144 @@
+# coding: utf-8
+"""
+Module `chatette.caching.ast_snapshot`
+Contains the functions that store the unit definitions parsed from
+a master template file (and the files it includes) in the directory of
+the disk cache, and load them back in later runs instead of parsing
+the templates again.
+A snapshot starts with the hashes of all the template files that were
+parsed: it is only loaded if none of them changed (and thus if the same
+files are still included).
+"""
+
+import io
+import os
+import struct
+import sys
+from hashlib import sha256
+from six.moves import cPickle as pickle
+
+from chatette import __version__
+from chatette.statistics import Stats
+from chatette.utils import UnitType
+from chatette.incremental import hash_file
+from chatette.caching.disk_cache import get_cache_dir, _replace_file
+from chatette.log import print_warn
+
+
+# Header of the files, followed by the version of their format
+MAGIC_NUMBER = b"CHATETTE-AST"
+FORMAT_VERSION = 1
+FILE_EXTENSION = ".ast"
+
+_HEADER = struct.Struct(">" + str(len(MAGIC_NUMBER)) + "sH")
+
+# Statistics recorded during the parsing, restored along with the snapshot
+_PARSING_STATS = (
+    "nb_input_files_parsed",
+    "nb_units_declared", "nb_intents_declared", "nb_slots_declared",
+    "nb_aliases_declared",
+    "nb_variation_units", "nb_variation_intents", "nb_variation_slots",
+    "nb_variation_aliases",
+    "nb_rules_parsed",
+)
+
+# Errors that can happen when a snapshot is read back
+_LOADING_ERRORS = (
+    IOError, OSError, EOFError, ValueError, TypeError, IndexError,
+    AttributeError, ImportError, struct.error, pickle.UnpicklingError
+)
+
+
+def get_snapshot_path(master_file_path):
+    """
+    Returns the path of the snapshot of the templates parsed from
+    the master file at `master_file_path`, or `None` if the disk cache
+    is disabled.
+    The snapshots of different versions of Chatette and Python have
+    different paths, as the classes of the definitions may differ.
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    key = \
+        os.path.abspath(master_file_path) + '\n' + __version__ + '\n' + \
+        str(sys.version_info[0])
+    return os.path.join(
+        cache_dir,
+        "ast-" + sha256(key.encode("utf-8")).hexdigest()[:32] + \
+        FILE_EXTENSION
+    )
+
+
+def get_parsing_stats():
+    """
+    Returns the statistics recorded during the parsing, as a dict.
+    """
+    stats = Stats.get_or_create()
+    return dict((name, getattr(stats, name)) for name in _PARSING_STATS)
+
+
+def load_snapshot(snapshot_path, ast):
+    """
+    Adds the unit definitions stored in the snapshot at `snapshot_path`
+    to the AST `ast` and returns the paths of the template files they were
+    parsed from, or `None` if there is no snapshot there, if it was stored
+    in another format or if one of those files changed.
+    """
+    try:
+        with io.open(snapshot_path, 'rb') as snapshot_file:
+            (magic_number, version) = \
+                _HEADER.unpack(snapshot_file.read(_HEADER.size))
+            if magic_number != MAGIC_NUMBER or version != FORMAT_VERSION:
+                return None
+            file_hashes = pickle.load(snapshot_file)
+            for (file_path, file_hash) in file_hashes:
+                if hash_file(file_path) != file_hash:
+                    return None
+            (definitions, parsing_stats) = pickle.load(snapshot_file)
+    except _LOADING_ERRORS:
+        return None
+
+    for unit_type in (UnitType.alias, UnitType.slot, UnitType.intent):
+        ast[unit_type].update(definitions[unit_type.value])
+    stats = Stats.get_or_create()
+    for (name, value) in parsing_stats.items():
+        setattr(stats, name, getattr(stats, name) + value)
+    return [file_path for (file_path, _) in file_hashes]
+
+def store_snapshot(snapshot_path, ast, file_paths, parsing_stats):
+    """
+    Stores the unit definitions of the AST `ast` in the snapshot at
+    `snapshot_path`, along with the hashes of the template files at
+    `file_paths` they were parsed from and the statistics `parsing_stats`
+    recorded while parsing them (cf. `get_parsing_stats`).
+    """
+    definitions = dict(
+        (unit_type.value, ast[unit_type])
+        for unit_type in (UnitType.alias, UnitType.slot, UnitType.intent)
+    )
+    file_hashes = \
+        [(file_path, hash_file(file_path)) for file_path in file_paths]
+    # Write to a temporary file first so that a snapshot is never read
+    # while it is incomplete
+    tmp_file_path = snapshot_path + ".tmp" + str(os.getpid())
+    cache_dir = os.path.dirname(snapshot_path)
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with io.open(tmp_file_path, 'wb') as snapshot_file:
+            snapshot_file.write(_HEADER.pack(MAGIC_NUMBER, FORMAT_VERSION))
+            pickle.dump(file_hashes, snapshot_file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(
+                (definitions, parsing_stats), snapshot_file,
+                pickle.HIGHEST_PROTOCOL
+            )
+        _replace_file(tmp_file_path, snapshot_path)
+    except (IOError, OSError, RuntimeError, pickle.PicklingError) as e:
+        # NOTE `RuntimeError` is raised by very deeply nested rules
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+        print_warn(
+            "Couldn't write in the cache directory '" + cache_dir + "': " + \
+            str(e)
+        )
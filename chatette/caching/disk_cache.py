@@ -0,0 +1,246 @@
+# coding: utf-8
+"""
+Module `chatette.caching.disk_cache`
+Contains the functions that store the examples of unit definitions
+in a directory and load them back in later runs.
+Each file contains all the examples of one variation of a unit definition
+and is named after a hash of the rules of this unit and of all the units
+it references (cf. `UnitDefinition.get_content_hash`), so that it is not
+used anymore as soon as one of them changes.
+"""
+
+import io
+import os
+import struct
+import zlib
+
+from chatette.configuration import Configuration
+from chatette.statistics import Stats
+from chatette.units import Example, IntentExample, Entity
+from chatette.log import print_warn
+
+
+# Header of the files, followed by the version of their format
+MAGIC_NUMBER = b"CHATETTE-UNIT"
+FORMAT_VERSION = 1
+FILE_EXTENSION = ".bin"
+
+_HEADER = struct.Struct(">" + str(len(MAGIC_NUMBER)) + "sH")
+
+_KIND_EXAMPLE = 0
+_KIND_INTENT_EXAMPLE = 1
+
+
+def get_cache_dir():
+    """
+    Returns the directory of the disk cache,
+    or `None` if the disk cache is disabled.
+    """
+    return Configuration.get_or_create().cache_dir
+
+
+def load_examples(content_hash):
+    """
+    Returns the list of examples stored for the unit definition whose hash
+    is `content_hash`, or `None` if they are not stored or were stored in
+    another format.
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    file_path = os.path.join(cache_dir, content_hash + FILE_EXTENSION)
+    try:
+        with io.open(file_path, 'rb') as cache_file:
+            data = cache_file.read()
+    except (IOError, OSError):
+        Stats.get_or_create().new_disk_cache_miss()
+        return None
+    try:
+        examples = decode_examples(data)
+    except (ValueError, struct.error, zlib.error, IndexError):
+        examples = None
+    if examples is None:
+        Stats.get_or_create().new_disk_cache_miss()
+        return None
+    Stats.get_or_create().new_disk_cache_hit()
+    return examples
+
+def store_examples(content_hash, examples):
+    """
+    Stores the examples `examples` of the unit definition whose hash is
+    `content_hash` (if the disk cache is enabled).
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return
+    file_path = os.path.join(cache_dir, content_hash + FILE_EXTENSION)
+    # Write to a temporary file first so that a file is never read
+    # while it is incomplete
+    tmp_file_path = file_path + ".tmp" + str(os.getpid())
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with io.open(tmp_file_path, 'wb') as cache_file:
+            cache_file.write(encode_examples(examples))
+        _replace_file(tmp_file_path, file_path)
+    except (IOError, OSError) as e:
+        print_warn(
+            "Couldn't write in the cache directory '" + cache_dir + "': " + \
+            str(e)
+        )
+
+
+def _replace_file(src_path, dst_path):
+    """Renames `src_path` into `dst_path`, overwriting it if it exists."""
+    if hasattr(os, "replace"):
+        os.replace(src_path, dst_path)
+    else:  # Python 2
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        os.rename(src_path, dst_path)
+
+
+def encode_examples(examples):
+    """
+    Returns the binary representation of the list of examples `examples`:
+    a header containing the version of the format, followed by
+    the compressed list of the strings used by the examples and
+    the examples themselves, which refer to those strings by index.
+    """
+    strings = _StringTable()
+    body = bytearray()
+    _write_varint(body, len(examples))
+    for ex in examples:
+        if isinstance(ex, IntentExample):
+            _write_varint(body, _KIND_INTENT_EXAMPLE)
+            _write_varint(body, strings.index_of(ex.intent_name))
+        else:
+            _write_varint(body, _KIND_EXAMPLE)
+        _write_varint(body, strings.index_of(ex.text))
+        _write_varint(body, strings.index_of(ex._slot_value))
+        _write_varint(body, len(ex.entities))
+        for entity in ex.entities:
+            _write_varint(body, strings.index_of(entity.slot_name))
+            _write_varint(body, strings.index_of(entity.value))
+            _write_varint(body, entity._start_index)
+            _write_varint(body, entity._len)
+        randgen_mapping = ex.randgen_mapping or dict()
+        _write_varint(body, len(randgen_mapping))
+        for (randgen_name, value) in randgen_mapping.items():
+            _write_varint(body, strings.index_of(randgen_name))
+            _write_varint(body, int(value))
+
+    table = bytearray()
+    _write_varint(table, len(strings.strings))
+    for string in strings.strings:
+        encoded = string.encode("utf-8")
+        _write_varint(table, len(encoded))
+        table.extend(encoded)
+    return \
+        _HEADER.pack(MAGIC_NUMBER, FORMAT_VERSION) + \
+        zlib.compress(bytes(table + body))
+
+def decode_examples(data):
+    """
+    Returns the list of examples represented by `data`
+    (cf. `encode_examples`), or `None` if `data` has another format.
+    @raises: - `ValueError` if `data` is corrupted.
+    """
+    if len(data) < _HEADER.size:
+        return None
+    (magic_number, version) = _HEADER.unpack(data[:_HEADER.size])
+    if magic_number != MAGIC_NUMBER or version != FORMAT_VERSION:
+        return None
+    reader = _Reader(bytearray(zlib.decompress(data[_HEADER.size:])))
+
+    strings = [None]
+    for _ in range(reader.read_varint()):
+        length = reader.read_varint()
+        strings.append(reader.read_bytes(length).decode("utf-8"))
+
+    examples = []
+    for _ in range(reader.read_varint()):
+        kind = reader.read_varint()
+        if kind == _KIND_INTENT_EXAMPLE:
+            example = IntentExample(strings[reader.read_varint()])
+        elif kind == _KIND_EXAMPLE:
+            example = Example()
+        else:
+            raise ValueError("Invalid kind of example: " + str(kind))
+        example.text = strings[reader.read_varint()]
+        example._slot_value = strings[reader.read_varint()]
+        entities = []
+        for _ in range(reader.read_varint()):
+            slot_name = strings[reader.read_varint()]
+            value = strings[reader.read_varint()]
+            start_index = reader.read_varint()
+            length = reader.read_varint()
+            entities.append(Entity(slot_name, length, value, start_index))
+        example.entities = tuple(entities)
+        nb_randgen_names = reader.read_varint()
+        if nb_randgen_names > 0:
+            randgen_mapping = dict()
+            for _ in range(nb_randgen_names):
+                randgen_name = strings[reader.read_varint()]
+                randgen_mapping[randgen_name] = bool(reader.read_varint())
+            example.randgen_mapping = randgen_mapping
+        examples.append(example)
+    if not reader.is_at_end():
+        raise ValueError("Unexpected data after the examples.")
+    return examples
+
+
+class _StringTable(object):
+    """
+    Table of the strings used by encoded examples,
+    in which index 0 represents `None`.
+    """
+    def __init__(self):
+        self.strings = []
+        self._indices = {None: 0}
+    def index_of(self, string):
+        """Returns the index of `string`, adding it if needed."""
+        index = self._indices.get(string)
+        if index is None:
+            self.strings.append(string)
+            index = len(self.strings)
+            self._indices[string] = index
+        return index
+
+
+def _write_varint(buffer, value):
+    """
+    Appends the non-negative integer `value` to `buffer`,
+    encoded on as few bytes as possible (7 bits per byte).
+    """
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+class _Reader(object):
+    """Reads the values encoded in a `bytearray`."""
+    def __init__(self, data):
+        self._data = data
+        self._index = 0
+
+    def read_varint(self):
+        result = 0
+        shift = 0
+        while True:
+            byte = self._data[self._index]
+            self._index += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+    def read_bytes(self, length):
+        if self._index + length > len(self._data):
+            raise ValueError("Unexpected end of data.")
+        result = bytes(self._data[self._index:self._index + length])
+        self._index += length
+        return result
+
+    def is_at_end(self):
+        return self._index == len(self._data)
@@ -0,0 +1,126 @@
+# coding: utf-8
+"""
+Module `chatette.caching.example_cache`
+Contains the singleton caching all the examples generated by items,
+within a budget of examples and bytes.
+"""
+
+from collections import OrderedDict
+
+from chatette.utils import Singleton
+from chatette.configuration import Configuration
+from chatette.statistics import Stats
+
+
+# Estimations of the memory used by an example without its text,
+# by one character of its text and by one of its entities
+# (cf. `benchmarks/memory.py`)
+_EXAMPLE_SIZE = 250
+_CHAR_SIZE = 1
+_ENTITY_SIZE = 130
+
+
+def estimate_size(examples):
+    """Returns an estimation of the memory used by `examples` (in bytes)."""
+    size = 0
+    for ex in examples:
+        size += \
+            _EXAMPLE_SIZE + _CHAR_SIZE * len(ex.text) + \
+            _ENTITY_SIZE * len(ex.entities)
+    return size
+
+
+class ExampleCache(Singleton):
+    """
+    Cache shared by all the items, mapping a key (identifying an item,
+    a variation and the modifiers applied) to all the examples this item
+    can generate.
+    When adding examples would make the cache exceed its budget
+    (cf. `Configuration.cache_max_nb_examples` and
+    `Configuration.cache_max_bytes`), the entries that were used the least
+    recently are evicted.
+    The numbers of hits, misses and evictions are recorded in `Stats`.
+    """
+    _instance = None
+    def __init__(self):
+        # Ordered from the least recently used to the most recently used
+        self._entries = OrderedDict()
+        self._sizes = dict()
+        self.nb_examples = 0
+        self.nb_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """
+        Returns the list of examples cached for key `key`,
+        or `None` if they were not cached.
+        The list returned must not be modified.
+        """
+        examples = self._entries.pop(key, None)
+        if examples is None:
+            Stats.get_or_create().new_cache_miss()
+            return None
+        self._entries[key] = examples
+        Stats.get_or_create().new_cache_hit()
+        return examples
+
+    def put(self, key, examples):
+        """
+        Caches the list of examples `examples` for key `key`,
+        evicting the least recently used entries if needed.
+        Does nothing if the examples alone would exceed the budget.
+        The list `examples` must not be modified afterwards.
+        """
+        self.remove(key)
+        config = Configuration.get_or_create()
+        max_nb_examples = config.cache_max_nb_examples
+        max_bytes = config.cache_max_bytes
+        nb_bytes = 0
+        if max_bytes is not None:
+            nb_bytes = estimate_size(examples)
+        if (
+            (max_nb_examples is not None and len(examples) > max_nb_examples)
+            or (max_bytes is not None and nb_bytes > max_bytes)
+        ):
+            return
+        while (
+            len(self._entries) > 0
+            and (
+                (
+                    max_nb_examples is not None
+                    and self.nb_examples + len(examples) > max_nb_examples
+                )
+                or (
+                    max_bytes is not None
+                    and self.nb_bytes + nb_bytes > max_bytes
+                )
+            )
+        ):
+            self._evict_least_recently_used()
+
+        self._entries[key] = examples
+        self._sizes[key] = (len(examples), nb_bytes)
+        self.nb_examples += len(examples)
+        self.nb_bytes += nb_bytes
+
+    def remove(self, key):
+        """Removes the examples cached for key `key` (if any)."""
+        if key in self._entries:
+            del self._entries[key]
+            (nb_examples, nb_bytes) = self._sizes.pop(key)
+            self.nb_examples -= nb_examples
+            self.nb_bytes -= nb_bytes
+
+    def remove_all(self, predicate):
+        """Removes the entries whose key satisfies `predicate`."""
+        for key in [key for key in self._entries if predicate(key)]:
+            self.remove(key)
+
+    def _evict_least_recently_used(self):
+        key = next(iter(self._entries))
+        self.remove(key)
+        Stats.get_or_create().new_cache_eviction()
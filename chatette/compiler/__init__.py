@@ -0,0 +1,10 @@
+# coding: utf-8
+"""
+Module `chatette.compiler`
+Contains the optional compilation of the unit definitions of an AST into
+a flat program (cf. `chatette.compiler.ir`), whose interpreter
+(cf. `chatette.compiler.interpreter`) generates random examples
+much faster than the items of the AST themselves.
+"""
+
+from chatette.compiler.interpreter import Program
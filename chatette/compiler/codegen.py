@@ -0,0 +1,725 @@
+# coding: utf-8
+"""
+Module `chatette.compiler.codegen`
+Contains the generation of standalone Python modules from unit definitions:
+the program the definitions compile to (cf. `chatette.compiler.ir`) is
+translated into one Python function per procedure and per unit definition,
+in which the stack of the interpreter is replaced by local variables.
+Concatenations are unrolled, modifiers are inlined and the offsets of
+entities are computed at generation time whenever the texts before them are
+constant. Procedures that can't generate entities return `str`s rather than
+fragments.
+The generated module doesn't depend on Chatette: it only needs the standard
+library. Given the same seed, it generates the same examples as Chatette.
+"""
+
+import io
+import re
+
+from chatette import __version__
+from chatette.utils import UnitType
+from chatette.units.ast import AST
+from chatette.compiler.ir import \
+    TEXT, CONCAT, CALL, CHOOSE, BRANCH, CHOOSE_TEXT, RET, END_RULE, \
+    NEW_MAPPING, END_MAPPING, RANDGEN, SPACE, CASEGEN, ARGUMENT, STRIP, \
+    SLOT, FAIL, HALT, CHOOSE_WEIGHTED, CHOOSE_TEXT_WEIGHTED, Compiler, \
+    with_leading_space, without_leading_space, with_arguments, \
+    with_slot_entity, _shift_entities
+
+
+# Code of the generated modules that doesn't depend on the templates.
+# NOTE `_Stream` must derive the same streams as `RandomStream`.
+_HEADER = '''# coding: utf-8
+"""
+Generated by Chatette v{version} from '{template}'. Do not edit.
+Generates examples of the unit definitions of the templates.
+Each example is a dict with keys "text", "entities" (and "intent-name" for
+intents), as in the output of Chatette.
+"""
+
+import random
+from hashlib import sha256
+
+
+class _Stream(random.Random):
+    """Random stream seeded with the string `seed`."""
+    def __init__(self, seed):
+        self.seed_str = seed
+        self._children = dict()
+        super(_Stream, self).__init__(
+            int(sha256(seed.encode("utf-8")).hexdigest(), 16)
+        )
+
+    def child_with_keys(self, keys):
+        child = self._children.get(keys)
+        if child is None:
+            child = _Stream(self.seed_str + "/" + "/".join(keys))
+            self._children[keys] = child
+        return child
+
+
+def make_stream(seed=None):
+    """
+    Returns a random stream seeded with the string `seed`
+    (or a random string if it is `None`).
+    """
+    if seed is None:
+        seed = str(random.getrandbits(64))
+    return _Stream(seed)
+
+
+class _AliasTable(object):
+    """
+    Alias table drawing indices with given probabilities
+    (cf. `chatette.sampling.AliasTable`).
+    """
+    def __init__(self, total, thresholds, aliases):
+        self.total = total
+        self.thresholds = thresholds
+        self.aliases = aliases
+
+    def draw(self, rng):
+        index = rng.randrange(len(self.thresholds))
+        if rng.randrange(self.total) < self.thresholds[index]:
+            return index
+        return self.aliases[index]
+
+
+def _shift(entities, offset):
+    return tuple(
+        (name, length, value, start_index + offset)
+        for (name, length, value, start_index) in entities
+    )
+
+def _strip(text, entities):
+    if not text[:1].isspace():
+        return (text, entities)
+    return (
+        text[1:],
+        tuple(
+            (name, length - 1, value, 0) if start_index == 0
+            else (name, length, value, start_index - 1)
+            for (name, length, value, start_index) in entities
+        )
+    )
+
+def _case(text, upper):
+    for (i, c) in enumerate(text):
+        if not c.isspace():
+            if upper:
+                c = c.upper()
+            else:
+                c = c.lower()
+            return text[:i] + c + text[(i + 1):]
+    return text
+'''
+
+_FOOTER = '''
+
+def generate_random_examples(
+    nb_examples, unit_type, unit_name, variation_name=None, rng=None
+):
+    """
+    Returns a list of `nb_examples` examples generated at random from
+    variation `variation_name` of the unit of type `unit_type`
+    ("alias", "slot" or "intent") named `unit_name`, drawing from
+    the random stream `rng` (cf. `make_stream`).
+    @raises: - `KeyError` if the unit was not declared.
+    """
+    function = UNITS[(unit_type, unit_name, variation_name)]
+    if rng is None:
+        rng = make_stream()
+    examples = []
+    for _ in range(nb_examples):
+        (text, entities) = function(rng)
+        example = {
+            "text": text,
+            "entities": [
+                {
+                    "slot-name": name, "value": value,
+                    "start-index": start_index,
+                    "end-index": start_index + length
+                }
+                for (name, length, value, start_index) in entities
+            ]
+        }
+        if unit_type == "intent":
+            example["intent-name"] = unit_name
+        examples.append(example)
+    return examples
+
+def generate_random(unit_type, unit_name, variation_name=None, rng=None):
+    """
+    Returns an example generated at random from a unit
+    (cf. `generate_random_examples`).
+    """
+    return generate_random_examples(
+        1, unit_type, unit_name, variation_name, rng
+    )[0]
+'''
+
+
+def generate_module(ast=None, template_name=None):
+    """
+    Returns the source code of a standalone Python module generating
+    examples of the unit definitions of the AST `ast` (the AST singleton if
+    `ast` is `None`), which were parsed from the template `template_name`.
+    """
+    return ModuleGenerator(ast).generate(template_name)
+
+def write_module(file_path, ast=None, template_name=None):
+    """
+    Writes the module generated by `generate_module` in the file at
+    `file_path`.
+    """
+    with io.open(file_path, 'w', encoding="utf-8") as f:
+        f.write(generate_module(ast, template_name))
+
+
+class ModuleGenerator(object):
+    """
+    Generates the source code of a standalone Python module from the unit
+    definitions of the AST `ast` (the AST singleton if `ast` is `None`).
+    """
+    def __init__(self, ast=None):
+        if ast is None:
+            ast = AST.get_or_create()
+        self._ast = ast
+        self._compiler = Compiler()
+        self.code = self._compiler.code
+        # Tuples of procedures a `CHOOSE` or `BRANCH` chooses from,
+        # indexed by the procedures they contain
+        self._groups = dict()
+        self._group_names = dict()
+        # Names of the constants of the alias tables used to draw at random
+        self._table_names = dict()
+        self._returns_fragments = dict()
+
+
+    def generate(self, template_name=None):
+        """Returns the source code of the module."""
+        entries = []
+        used_names = set()
+        for unit_type in (UnitType.alias, UnitType.slot, UnitType.intent):
+            definitions = self._ast[unit_type]
+            for unit_name in sorted(definitions):
+                definition = definitions[unit_name]
+                variation_names = \
+                    [None] + sorted(
+                        name for name in definition._variation_rules
+                        if name is not None
+                    )
+                for variation_name in variation_names:
+                    function_name = \
+                        _make_function_name(
+                            unit_type, unit_name, variation_name, used_names
+                        )
+                    address = \
+                        self._compiler.get_entry(definition, variation_name)
+                    entries.append(
+                        (
+                            unit_type.value, unit_name, variation_name,
+                            function_name, address
+                        )
+                    )
+
+        for (opcode, a, _) in self.code:
+            if opcode in (CHOOSE_WEIGHTED, CHOOSE_TEXT_WEIGHTED):
+                if a[1] not in self._table_names:
+                    self._table_names[a[1]] = \
+                        "_TABLE_" + str(len(self._table_names))
+                if opcode == CHOOSE_TEXT_WEIGHTED:
+                    continue
+                a = a[0]
+            if opcode in (CHOOSE, BRANCH, CHOOSE_WEIGHTED):
+                for address in a:
+                    self._groups[address] = a
+                if a not in self._group_names:
+                    self._group_names[a] = \
+                        "_GROUP_" + str(len(self._group_names))
+        procedure_addresses = set()
+        for (opcode, a, _) in self.code:
+            if opcode == CALL:
+                procedure_addresses.add(a)
+            elif opcode in (CHOOSE, BRANCH):
+                procedure_addresses.update(a)
+            elif opcode == CHOOSE_WEIGHTED:
+                procedure_addresses.update(a[0])
+
+        parts = [
+            _HEADER.format(
+                version=__version__, template=template_name or "templates"
+            )
+        ]
+        for address in sorted(procedure_addresses):
+            parts.append(
+                _FunctionTranslator(self, address).translate(
+                    _get_procedure_name(address),
+                    self._returns_fragments_at(address)
+                )
+            )
+        for (unit_type, unit_name, variation_name, function_name, address) \
+                in entries:
+            docstring = \
+                "Generates an example of " + unit_type + " '" + unit_name + \
+                "'"
+            if variation_name is not None:
+                docstring += " (variation '" + variation_name + "')"
+            parts.append(
+                _FunctionTranslator(self, address).translate(
+                    function_name, True, docstring + "."
+                )
+            )
+
+        constants = []
+        for group in sorted(self._group_names, key=self._group_names.get):
+            constants.append(
+                self._group_names[group] + " = (" + \
+                "".join(
+                    _get_procedure_name(address) + ", " for address in group
+                ) + \
+                ")"
+            )
+        for table in sorted(self._table_names, key=self._table_names.get):
+            constants.append(
+                self._table_names[table] + " = _AliasTable(" + \
+                repr(table.total) + ", " + repr(table.thresholds) + ", " + \
+                repr(table.aliases) + ")"
+            )
+        constants.append("")
+        constants.append("UNITS = {")
+        for (unit_type, unit_name, variation_name, function_name, _) \
+                in entries:
+            constants.append(
+                "    (" + repr(unit_type) + ", " + repr(unit_name) + ", " + \
+                repr(variation_name) + "): " + function_name + ","
+            )
+        constants.append("}")
+        parts.append("\n" + "\n".join(constants) + "\n")
+        parts.append(_FOOTER)
+        return "\n".join(parts)
+
+
+    def get_group_name(self, group):
+        return self._group_names[group]
+
+    def get_table_name(self, table):
+        return self._table_names[table]
+
+    def group_returns_fragments(self, group):
+        """
+        Returns `True` iff one of the procedures of `group` can generate
+        entities, in which case all of them return fragments.
+        """
+        return any(self._can_generate_entities(address) for address in group)
+
+    def _returns_fragments_at(self, address):
+        """
+        Returns `True` iff the function translated from the procedure at
+        `address` returns fragments (rather than `str`s).
+        """
+        if address in self._groups:
+            return self.group_returns_fragments(self._groups[address])
+        return self._can_generate_entities(address)
+
+    def _can_generate_entities(self, address):
+        """
+        Returns `True` iff the procedure at `address` can generate a fragment
+        that contains entities.
+        """
+        if address not in self._returns_fragments:
+            result = False
+            pc = address
+            while True:
+                (opcode, a, b) = self.code[pc]
+                pc += 1
+                if opcode == TEXT:
+                    result = result or len(a[1]) > 0
+                elif opcode == CHOOSE_TEXT:
+                    result = result or any(len(f[1]) > 0 for f in a)
+                elif opcode == CHOOSE_TEXT_WEIGHTED:
+                    result = result or any(len(f[1]) > 0 for f in a[0])
+                elif opcode == CALL:
+                    result = result or self._can_generate_entities(a)
+                elif opcode in (CHOOSE, BRANCH):
+                    result = result or self.group_returns_fragments(a)
+                elif opcode == CHOOSE_WEIGHTED:
+                    result = result or self.group_returns_fragments(a[0])
+                elif opcode == SLOT:
+                    result = True
+                elif opcode == END_RULE:
+                    result = result or a is not None
+                if opcode in (RET, END_RULE, BRANCH, HALT):
+                    break
+            self._returns_fragments[address] = result
+        return self._returns_fragments[address]
+
+
+def _get_procedure_name(address):
+    return "_procedure_" + str(address)
+
+def _make_function_name(unit_type, unit_name, variation_name, used_names):
+    """
+    Returns a name for the function generating variation `variation_name`
+    of the unit of type `unit_type` named `unit_name`, which is a valid
+    identifier not in `used_names` (and adds it to `used_names`).
+    """
+    name = unit_type.value + '_' + unit_name
+    if variation_name is not None:
+        name += "__" + variation_name
+    name = re.sub(r"\W", '_', name)
+    unique_name = name
+    i = 2
+    while unique_name in used_names:
+        unique_name = name + '_' + str(i)
+        i += 1
+    used_names.add(unique_name)
+    return unique_name
+
+
+class _Value(object):
+    """
+    Value of the stack of the interpreter during the translation:
+    the Python expressions of its text and of its entities (`None` if it
+    has none), and the fragment itself if it is constant.
+    """
+    def __init__(self, text, entities=None, constant=None):
+        self.text = text
+        self.entities = entities
+        self.constant = constant
+
+    @classmethod
+    def from_constant(cls, fragment):
+        entities = None
+        if len(fragment[1]) > 0:
+            entities = repr(fragment[1])
+        return cls(repr(fragment[0]), entities, fragment)
+
+    def get_entities(self):
+        """Returns the expression of the entities (never `None`)."""
+        if self.entities is None:
+            return "()"
+        return self.entities
+
+
+class _FunctionTranslator(object):
+    """
+    Translates the instructions starting at `address` of the program of
+    the module generator `generator` into a Python function.
+    """
+    def __init__(self, generator, address):
+        self._generator = generator
+        self._code = generator.code
+        self._address = address
+        self._lines = []
+        self._indent = 1
+        self._nb_variables = 0
+        self._mapping_depth = 0
+
+    def translate(self, function_name, returns_fragments, docstring=None):
+        """
+        Returns the code of the function named `function_name`, which returns
+        fragments iff `returns_fragments` is `True`.
+        """
+        self._returns_fragments = returns_fragments
+        self._translate_block(self._address, None, [])
+        lines = ["def " + function_name + "(rng):"]
+        if docstring is not None:
+            lines.append('    """' + docstring + '"""')
+        return "\n".join(lines + self._lines) + "\n"
+
+
+    def _emit(self, line):
+        self._lines.append("    " * self._indent + line)
+
+    def _new_variable(self, prefix):
+        self._nb_variables += 1
+        return prefix + str(self._nb_variables)
+
+    def _assign(self, text, entities=None):
+        """
+        Emits the assignment of the expressions `text` and `entities` to new
+        variables, and returns the corresponding value.
+        """
+        text_variable = self._new_variable('t')
+        if entities is None:
+            self._emit(text_variable + " = " + text)
+            return _Value(text_variable)
+        entities_variable = self._new_variable('e')
+        self._emit(
+            "(" + text_variable + ", " + entities_variable + ") = " + text
+            if entities == ""
+            else text_variable + " = " + text
+        )
+        if entities != "":
+            self._emit(entities_variable + " = " + entities)
+        return _Value(text_variable, entities_variable)
+
+    def _assign_call(self, call, returns_fragments):
+        """
+        Emits the assignment of the result of the expression `call`
+        (a fragment if `returns_fragments` is `True`, a `str` otherwise)
+        and returns the corresponding value.
+        """
+        if returns_fragments:
+            return self._assign(call, "")
+        return self._assign(call)
+
+    def _get_stream(self, keys):
+        """
+        Returns the expression of the stream with keys `keys`,
+        emitting its assignment to a variable if needed.
+        """
+        if keys is None:
+            return "rng"
+        stream = self._new_variable('s')
+        self._emit(stream + " = rng.child_with_keys(" + repr(keys) + ")")
+        return stream
+
+    def _return(self, value):
+        if self._returns_fragments:
+            self._emit(
+                "return (" + value.text + ", " + value.get_entities() + ")"
+            )
+        else:
+            self._emit("return " + value.text)
+
+
+    def _translate_block(self, pc, end, stack):
+        """
+        Translates the instructions from `pc` to `end` (excluded) or to
+        the first instruction that returns, given the values on the stack
+        `stack` (which is updated).
+        """
+        while end is None or pc < end:
+            (opcode, a, b) = self._code[pc]
+            pc += 1
+            if opcode == TEXT:
+                stack.append(_Value.from_constant(a))
+            elif opcode == CONCAT:
+                values = stack[-a:]
+                del stack[-a:]
+                stack.append(self._concat(values))
+            elif opcode == CALL:
+                function_name = _get_procedure_name(a)
+                stack.append(
+                    self._assign_call(
+                        function_name + "(rng.child_with_keys(" + \
+                        repr(b) + "))",
+                        self._generator._returns_fragments_at(a)
+                    )
+                )
+            elif opcode == CHOOSE:
+                stream = self._get_stream(b)
+                stack.append(
+                    self._assign_call(
+                        stream + ".choice(" + \
+                        self._generator.get_group_name(a) + ")(" + \
+                        stream + ")",
+                        self._generator.group_returns_fragments(a)
+                    )
+                )
+            elif opcode == CHOOSE_WEIGHTED:
+                (group, table) = a
+                stream = self._get_stream(b)
+                stack.append(
+                    self._assign_call(
+                        self._generator.get_group_name(group) + "[" + \
+                        self._generator.get_table_name(table) + ".draw(" + \
+                        stream + ")](" + stream + ")",
+                        self._generator.group_returns_fragments(group)
+                    )
+                )
+            elif opcode in (CHOOSE_TEXT, CHOOSE_TEXT_WEIGHTED):
+                stream = "rng"
+                if b is not None:
+                    stream = "rng.child_with_keys(" + repr(b) + ")"
+                fragments = a
+                if opcode == CHOOSE_TEXT_WEIGHTED:
+                    fragments = a[0]
+                returns_fragments = \
+                    any(len(fragment[1]) > 0 for fragment in fragments)
+                if not returns_fragments:
+                    choices = repr(tuple(fragment[0] for fragment in fragments))
+                else:
+                    choices = repr(fragments)
+                if opcode == CHOOSE_TEXT:
+                    choice = stream + ".choice(" + choices + ")"
+                else:
+                    choice = \
+                        choices + "[" + \
+                        self._generator.get_table_name(a[1]) + ".draw(" + \
+                        stream + ")]"
+                stack.append(self._assign_call(choice, returns_fragments))
+            elif opcode == RANDGEN:
+                stack.append(self._randgen(a, pc, pc + b))
+                pc += b
+            elif opcode == NEW_MAPPING:
+                self._mapping_depth += 1
+                self._emit("m" + str(self._mapping_depth) + " = dict()")
+            elif opcode == END_MAPPING:
+                self._mapping_depth -= 1
+            elif opcode == SPACE:
+                stack.append(self._space(stack.pop()))
+            elif opcode == CASEGEN:
+                value = stack.pop()
+                stack.append(
+                    _Value(
+                        self._assign(
+                            "_case(" + value.text + ", rng.random() < 0.5)"
+                        ).text,
+                        value.entities
+                    )
+                )
+            elif opcode == ARGUMENT:
+                stack.append(self._arguments(stack.pop(), a))
+            elif opcode == STRIP:
+                stack.append(self._strip(stack.pop()))
+            elif opcode == SLOT:
+                stack.append(self._slot(stack.pop(), a, b))
+            elif opcode == END_RULE:
+                value = self._strip(stack.pop())
+                if a is not None:
+                    value = self._slot(value, a, b)
+                self._return(value)
+                return
+            elif opcode in (RET, HALT):
+                self._return(stack.pop())
+                return
+            elif opcode == BRANCH:
+                stream = self._get_stream(b)
+                call = \
+                    stream + ".choice(" + \
+                    self._generator.get_group_name(a) + ")(" + stream + ")"
+                if (
+                    self._returns_fragments
+                    and not self._generator.group_returns_fragments(a)
+                ):
+                    call = "(" + call + ", ())"
+                self._emit("return " + call)
+                return
+            elif opcode == FAIL:
+                self._emit("raise SyntaxError(" + repr(a) + ")")
+                return
+
+
+    def _concat(self, values):
+        """Returns the value of the concatenation of `values`."""
+        texts = []
+        entities = []
+        static_offset = 0
+        dynamic_offsets = []
+        for value in values:
+            if value.entities is not None:
+                if value.constant is not None and len(dynamic_offsets) == 0:
+                    entities.append(
+                        repr(_shift_entities(value.constant[1], static_offset))
+                    )
+                elif static_offset == 0 and len(dynamic_offsets) == 0:
+                    entities.append(value.entities)
+                else:
+                    offset = dynamic_offsets
+                    if static_offset > 0:
+                        offset = [str(static_offset)] + dynamic_offsets
+                    offset = " + ".join(offset)
+                    entities.append(
+                        "_shift(" + value.entities + ", " + offset + ")"
+                    )
+            if value.constant is not None:
+                static_offset += len(value.constant[0])
+            else:
+                dynamic_offsets.append("len(" + value.text + ")")
+            texts.append(value.text)
+        if len(entities) == 0:
+            return self._assign(" + ".join(texts))
+        return self._assign(" + ".join(texts), " + ".join(entities))
+
+    def _space(self, value):
+        if value.constant is not None:
+            return _Value.from_constant(with_leading_space(value.constant))
+        entities = None
+        if value.entities is not None:
+            entities = "_shift(" + value.entities + ", 1)"
+        return self._assign("' ' + " + value.text, entities)
+
+    def _strip(self, value):
+        if value.constant is not None:
+            return _Value.from_constant(without_leading_space(value.constant))
+        if value.entities is None:
+            self._emit("if " + value.text + "[:1].isspace():")
+            self._emit("    " + value.text + " = " + value.text + "[1:]")
+            return value
+        return \
+            self._assign(
+                "_strip(" + value.text + ", " + value.entities + ")", ""
+            )
+
+    def _arguments(self, value, arg_mapping):
+        if value.constant is not None:
+            return \
+                _Value.from_constant(with_arguments(value.constant, arg_mapping))
+        text = value.text
+        for arg_name in arg_mapping:
+            text += \
+                ".replace(" + repr("$" + arg_name) + ", " + \
+                repr(arg_mapping[arg_name]) + ")"
+        return _Value(self._assign(text).text, value.entities)
+
+    def _slot(self, value, slot_name, slot_value):
+        if value.constant is not None:
+            return \
+                _Value.from_constant(
+                    with_slot_entity(value.constant, slot_name, slot_value)
+                )
+        if slot_value is None:
+            slot_value = value.text
+        else:
+            slot_value = repr(slot_value)
+        entity = \
+            "((" + repr(slot_name) + ", len(" + value.text + "), " + \
+            slot_value + ", 0),)"
+        if value.entities is not None:
+            entity = value.entities + " + " + entity
+        entities_variable = self._new_variable('e')
+        self._emit(entities_variable + " = " + entity)
+        return _Value(value.text, entities_variable)
+
+    def _randgen(self, randgen, start, end):
+        """
+        Emits the code of the instructions from `start` to `end` (excluded),
+        which are only executed if the random generation modifier `randgen`
+        decides so, and returns their value (or the empty value).
+        """
+        (randgen_name, percentage, opposite) = randgen
+        draw = "rng.randrange(100) < " + repr(percentage)
+        if randgen_name is None:
+            condition = draw
+        else:
+            mapping = \
+                "m" + str(self._mapping_depth) + "[" + repr(randgen_name) + "]"
+            self._emit(
+                "if " + repr(randgen_name) + " not in m" + \
+                str(self._mapping_depth) + ":"
+            )
+            self._emit("    " + mapping + " = (" + draw + ")")
+            condition = mapping
+            if opposite:
+                condition = "not " + mapping
+        text_variable = self._new_variable('t')
+        entities_variable = self._new_variable('e')
+
+        self._emit("if " + condition + ":")
+        self._indent += 1
+        stack = []
+        self._translate_block(start, end, stack)
+        value = stack.pop()
+        self._emit(text_variable + " = " + value.text)
+        if value.entities is not None:
+            self._emit(entities_variable + " = " + value.entities)
+        self._indent -= 1
+        self._emit("else:")
+        self._emit("    " + text_variable + " = ''")
+        if value.entities is None:
+            return _Value(text_variable)
+        self._emit("    " + entities_variable + " = ()")
+        return _Value(text_variable, entities_variable)
@@ -0,0 +1,203 @@
+# coding: utf-8
+"""
+Module `chatette.compiler.interpreter`
+Contains the class `Program`, which lowers the unit definitions of an AST
+into the flat representation of `chatette.compiler.ir` and runs
+the resulting instructions to generate random examples.
+Generating an example this way doesn't go through the modifiers and
+the caches of every item of the AST, nor allocates intermediate examples,
+which makes generating many random examples much faster.
+"""
+
+from chatette.compiler.ir import \
+    TEXT, CONCAT, CALL, CHOOSE, BRANCH, CHOOSE_TEXT, RET, END_RULE, \
+    NEW_MAPPING, END_MAPPING, RANDGEN, SPACE, CASEGEN, ARGUMENT, STRIP, \
+    SLOT, FAIL, HALT, CHOOSE_WEIGHTED, CHOOSE_TEXT_WEIGHTED, EMPTY_FRAGMENT, \
+    Compiler, \
+    concat_fragments, with_leading_space, without_leading_space, \
+    with_leading_case, with_arguments, with_slot_entity
+from chatette.utils import UnitType
+from chatette.random_stream import get_stream
+from chatette.units import Example, IntentExample, Entity
+from chatette.units.ast import AST
+
+
+class Program(object):
+    """
+    Compiled version of the unit definitions of the AST `ast`
+    (the AST singleton if `ast` is `None`).
+    Definitions are compiled the first time examples are generated from them.
+    The program must be compiled again if the AST changes.
+    """
+    def __init__(self, ast=None):
+        if ast is None:
+            ast = AST.get_or_create()
+        self._ast = ast
+        self.code = []
+        self._compiler = Compiler(self.code)
+
+    def generate_random(
+        self, unit_type, unit_name, variation_name=None, rng=None
+    ):
+        """
+        Returns an example generated at random from variation
+        `variation_name` of the unit of type `unit_type` named `unit_name`,
+        drawing from the random stream `rng` (or the global stream if it is
+        `None`). Given the same stream, the example is the same as the one
+        `generate_random` would return for the unit definition.
+        @raises: - `KeyError` if the unit was not declared.
+                 - `SyntaxError` if the unit cannot generate examples.
+        """
+        return self.generate_random_examples(
+            1, unit_type, unit_name, variation_name, rng
+        )[0]
+
+    def generate_random_examples(
+        self, nb_examples, unit_type, unit_name, variation_name=None,
+        rng=None
+    ):
+        """
+        Returns the list of `nb_examples` examples generated one after
+        the other by `generate_random` (duplicates are not removed).
+        @raises: - `KeyError` if the unit was not declared.
+                 - `SyntaxError` if the unit cannot generate examples.
+        """
+        definition = self._ast[unit_type][unit_name]
+        address = self._compiler.get_entry(definition, variation_name)
+        rng = get_stream(rng)
+        examples = []
+        if definition.unit_type == UnitType.intent:
+            intent_name = definition._name
+            for _ in range(nb_examples):
+                (text, entities) = self._run(address, rng)
+                examples.append(
+                    IntentExample(
+                        intent_name, text,
+                        [Entity(*entity) for entity in entities]
+                    )
+                )
+        else:
+            for _ in range(nb_examples):
+                (text, entities) = self._run(address, rng)
+                examples.append(
+                    Example(text, [Entity(*entity) for entity in entities])
+                )
+        return examples
+
+
+    def _run(self, address, rng):
+        """
+        Runs the instructions from `address` to the next `HALT`,
+        drawing from the random stream `rng`.
+        Returns the fragment on top of the stack when halting.
+        @raises: - `SyntaxError` when executing `FAIL`.
+        """
+        code = self.code
+        stack = []
+        calls = []  # Return addresses and random streams of the callers
+        mappings = []
+        mapping = None
+        pc = address
+        # NOTE the opcodes are bound to local variables (faster to look up)
+        #      and tested in decreasing order of how often they are executed
+        (
+            op_choose, op_end_rule, op_randgen, op_text, op_concat,
+            op_choose_text, op_space, op_ret, op_halt, op_call, op_casegen,
+            op_argument, op_branch, op_strip, op_slot
+        ) = (
+            CHOOSE, END_RULE, RANDGEN, TEXT, CONCAT, CHOOSE_TEXT, SPACE, RET,
+            HALT, CALL, CASEGEN, ARGUMENT, BRANCH, STRIP, SLOT
+        )
+        while True:
+            (opcode, a, b) = code[pc]
+            pc += 1
+            if opcode == op_choose:
+                calls.append((pc, rng))
+                if b is not None:
+                    rng = rng.child_with_keys(b)
+                pc = rng.choice(a)
+            elif opcode == op_end_rule:
+                fragment = stack[-1]
+                if fragment[0][:1].isspace():
+                    fragment = without_leading_space(fragment)
+                if a is not None:
+                    fragment = with_slot_entity(fragment, a, b)
+                stack[-1] = fragment
+                (pc, rng) = calls.pop()
+            elif opcode == op_randgen:
+                (randgen_name, percentage, opposite) = a
+                if randgen_name is None:
+                    generate = (rng.randrange(100) < percentage)
+                else:
+                    generate = mapping.get(randgen_name)
+                    if generate is None:
+                        generate = (rng.randrange(100) < percentage)
+                        mapping[randgen_name] = generate
+                    if opposite:
+                        generate = not generate
+                if not generate:
+                    stack.append(EMPTY_FRAGMENT)
+                    pc += b
+            elif opcode == op_text:
+                stack.append(a)
+            elif opcode == op_concat:
+                fragments = stack[-a:]
+                del stack[-a:]
+                for (_, entities) in fragments:
+                    if len(entities) > 0:
+                        stack.append(concat_fragments(fragments))
+                        break
+                else:
+                    stack.append(
+                        ("".join([text for (text, _) in fragments]), ())
+                    )
+            elif opcode == op_choose_text:
+                if b is None:
+                    stack.append(rng.choice(a))
+                else:
+                    stack.append(rng.child_with_keys(b).choice(a))
+            elif opcode == op_space:
+                fragment = stack[-1]
+                if len(fragment[1]) == 0:
+                    stack[-1] = (' ' + fragment[0], ())
+                else:
+                    stack[-1] = with_leading_space(fragment)
+            elif opcode == op_ret:
+                (pc, rng) = calls.pop()
+            elif opcode == op_halt:
+                return stack.pop()
+            elif opcode == op_call:
+                calls.append((pc, rng))
+                rng = rng.child_with_keys(b)
+                pc = a
+            elif opcode == op_casegen:
+                stack[-1] = with_leading_case(stack[-1], rng.random() < 0.5)
+            elif opcode == op_argument:
+                stack[-1] = with_arguments(stack[-1], a)
+            elif opcode == op_branch:
+                if b is not None:
+                    rng = rng.child_with_keys(b)
+                pc = rng.choice(a)
+            elif opcode == op_strip:
+                fragment = stack[-1]
+                if fragment[0][:1].isspace():
+                    stack[-1] = without_leading_space(fragment)
+            elif opcode == op_slot:
+                stack[-1] = with_slot_entity(stack[-1], a, b)
+            elif opcode == NEW_MAPPING:
+                mappings.append(mapping)
+                mapping = dict()
+            elif opcode == END_MAPPING:
+                mapping = mappings.pop()
+            elif opcode == CHOOSE_WEIGHTED:
+                calls.append((pc, rng))
+                if b is not None:
+                    rng = rng.child_with_keys(b)
+                pc = a[0][a[1].draw(rng)]
+            elif opcode == CHOOSE_TEXT_WEIGHTED:
+                if b is None:
+                    stack.append(a[0][a[1].draw(rng)])
+                else:
+                    stack.append(a[0][a[1].draw(rng.child_with_keys(b))])
+            elif opcode == FAIL:
+                raise SyntaxError(a)
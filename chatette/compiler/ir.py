@@ -0,0 +1,474 @@
+# coding: utf-8
+"""
+Module `chatette.compiler.ir`
+Contains the intermediate representation (IR) that unit definitions are
+lowered to in order to generate random examples quickly
+(cf. `chatette.compiler.interpreter`), and the compiler that lowers them.
+
+A program is a flat list of instructions, which are all triples
+`(opcode, operand, operand)`. Instructions work on a stack of fragments:
+a fragment is a pair containing the text of a part of an example and
+the tuple of its entities. Those are represented as the tuples of arguments
+`(slot_name, length, value, start_index)` of the instances of `Entity` they
+become once the example is complete, their start indices being relative to
+the fragment. Each item of the AST is lowered to instructions that push
+the fragment this item generates.
+The rules of choices and of unit definitions are lowered to procedures,
+i.e. sequences of instructions ending with `RET` (or an instruction that
+returns as well), which `CALL` and `CHOOSE` jump to: references are thus
+resolved to addresses at compile time. Parts of the rules that don't draw
+random numbers are computed at compile time as well.
+Random draws happen in the same order as when generating examples from
+the items of the AST, so that a program generates the same examples as
+the AST when given the same random stream. The only draws that are left out
+are those of the definitions that always generate the same text: they can
+only change the state of the random streams of those definitions
+(cf. `RandomStream.child`), which is thus never observable.
+"""
+
+# NOTE the modifiers must be imported before the units
+#      (circular imports between the units, the modifiers and the parser)
+from chatette.modifiers.argument import modify_text
+from chatette.utils import UnitType
+from chatette.random_stream import make_child_keys
+from chatette.units.word import Word
+from chatette.units.rule import Rule
+from chatette.units.slot_value_table import SlotValueTable
+from chatette.units.modifiable.choice import Choice
+from chatette.units.modifiable.unit_reference import UnitReference
+
+
+# Opcodes
+TEXT = 0  # Pushes the fragment `a`
+CONCAT = 1  # Pops `a` fragments and pushes their concatenation
+CALL = 2  # Calls the procedure at address `a`, which draws from the child of the random stream with keys `b`
+CHOOSE = 3  # Calls one of the procedures at addresses `a`, drawn at random (from the child
+            # of the random stream with keys `b` if it is not `None`, which the procedure then draws from)
+BRANCH = 4  # Same as `CHOOSE` followed by `RET`, without returning to this procedure
+CHOOSE_TEXT = 5  # Pushes one of the fragments `a`, drawn at random
+                 # (from the child of the random stream with keys `b` if it is not `None`)
+RET = 6  # Returns from the current procedure (and restores the random stream)
+END_RULE = 7  # Same as `STRIP`, followed by `SLOT` if `a` is not `None`, followed by `RET`
+NEW_MAPPING = 8  # Starts a new random generation mapping
+END_MAPPING = 9  # Restores the random generation mapping before the last `NEW_MAPPING`
+RANDGEN = 10  # Given the random generation modifier `a` (name, percentage and opposite),
+              # pushes an empty fragment and skips `b` instructions if nothing should be generated
+SPACE = 11  # Adds a leading space to the fragment on top of the stack
+CASEGEN = 12  # Changes the case of the leading letter of the fragment on top of the stack at random
+ARGUMENT = 13  # Replaces the arguments in the fragment on top of the stack using the mapping `a`
+STRIP = 14  # Removes the leading space of the fragment on top of the stack
+SLOT = 15  # Adds an entity for slot `a` with slot value `b` to the fragment on top of the stack
+FAIL = 16  # Raises a `SyntaxError` with message `a`
+HALT = 17  # Stops the execution
+CHOOSE_WEIGHTED = 18  # Same as `CHOOSE` with the procedures `a[0]`, drawn using the alias table `a[1]`
+CHOOSE_TEXT_WEIGHTED = 19  # Same as `CHOOSE_TEXT` with the fragments `a[0]`, drawn using the alias table `a[1]`
+
+
+EMPTY_FRAGMENT = ("", ())
+
+
+def concat_fragments(fragments):
+    """Returns the concatenation of the list of fragments `fragments`."""
+    entities = ()
+    offset = 0
+    for (text, fragment_entities) in fragments:
+        if len(fragment_entities) > 0:
+            entities += _shift_entities(fragment_entities, offset)
+        offset += len(text)
+    return ("".join([text for (text, _) in fragments]), entities)
+
+def with_leading_space(fragment):
+    """Returns the fragment `fragment` with a leading space added."""
+    (text, entities) = fragment
+    if len(entities) > 0:
+        entities = _shift_entities(entities, 1)
+    return (' ' + text, entities)
+
+def without_leading_space(fragment):
+    """
+    Returns the fragment `fragment` without its leading space
+    (if it has one), adapting its entities as
+    `Entity._without_leading_space` does.
+    """
+    (text, entities) = fragment
+    if len(text) == 0 or not text[0].isspace():
+        return fragment
+    return (
+        text[1:],
+        tuple(
+            (name, length - 1, value, 0) if start_index == 0
+            else (name, length, value, start_index - 1)
+            for (name, length, value, start_index) in entities
+        )
+    )
+
+def with_leading_case(fragment, upper):
+    """
+    Returns the fragment `fragment` whose leading letter was changed to
+    uppercase if `upper` is `True`, or to lowercase otherwise.
+    """
+    (text, entities) = fragment
+    for (i, c) in enumerate(text):
+        if not c.isspace():
+            if upper:
+                c = c.upper()
+            else:
+                c = c.lower()
+            return (text[:i] + c + text[(i + 1):], entities)
+    return fragment
+
+def with_arguments(fragment, arg_mapping):
+    """
+    Returns the fragment `fragment` whose arguments were replaced
+    using the mapping `arg_mapping`.
+    """
+    return (modify_text(fragment[0], arg_mapping), fragment[1])
+
+def with_slot_entity(fragment, slot_name, slot_value):
+    """
+    Returns the fragment `fragment` with an entity of slot `slot_name`
+    spanning its whole text added, whose value is `slot_value`
+    (or the text if `slot_value` is `None`).
+    """
+    (text, entities) = fragment
+    if slot_value is None:
+        slot_value = text
+    return (text, entities + ((slot_name, len(text), slot_value, 0),))
+
+def _shift_entities(entities, offset):
+    """
+    Returns the tuple of entities `entities` (of a fragment)
+    shifted by `offset` chars.
+    """
+    return tuple(
+        (name, length, value, start_index + offset)
+        for (name, length, value, start_index) in entities
+    )
+
+
+class Compiler(object):
+    """
+    Lowers unit definitions into a program, one definition (and variation)
+    at a time, as they are asked for (cf. `get_entry`).
+    The instructions are appended to the list `code`.
+    """
+    def __init__(self, code=None):
+        if code is None:
+            code = []
+        self.code = code
+        self._definition_calls = dict()
+        self._entries = dict()
+
+    def get_entry(self, definition, variation_name=None):
+        """
+        Returns the address of the instructions that generate an example of
+        variation `variation_name` of the unit definition `definition` and
+        stop, lowering this definition and the definitions it references
+        if they weren't lowered before.
+        """
+        key = (definition, variation_name)
+        if key not in self._entries:
+            instructions = \
+                self._lower_definition_call(definition, variation_name)
+            self._entries[key] = len(self.code)
+            self.code.extend(instructions)
+            self.code.append((HALT, None, None))
+        return self._entries[key]
+
+
+    def _append_procedure(self, instructions):
+        """
+        Appends the instructions `instructions` followed by `RET` to the code
+        and returns the address of this procedure.
+        A final `CHOOSE` becomes a `BRANCH`, as the procedure it calls
+        can return directly to the caller (unless a `RANDGEN` could skip it).
+        """
+        address = len(self.code)
+        if len(instructions) > 0 and instructions[-1][0] == END_RULE:
+            self.code.extend(instructions)
+        elif (
+            len(instructions) > 0 and instructions[-1][0] == CHOOSE
+            and all(opcode != RANDGEN for (opcode, _, _) in instructions)
+        ):
+            self.code.extend(instructions[:-1])
+            self.code.append((BRANCH,) + instructions[-1][1:])
+        else:
+            self.code.extend(instructions)
+            self.code.append((RET, None, None))
+        return address
+
+    def _lower_definition_call(self, definition, variation_name):
+        """
+        Returns the instructions that push an example generated by variation
+        `variation_name` of the unit definition `definition`, i.e. a call to
+        the procedure of this definition (which is lowered if needed),
+        or its text if it always generates the same text.
+        """
+        key = (definition, variation_name)
+        if key not in self._definition_calls:
+            instructions = self._lower_definition(definition, variation_name)
+            keys = \
+                make_child_keys(
+                    definition.unit_type.value, definition._name,
+                    variation_name
+                )
+            if len(instructions) == 1 and instructions[0][0] == CHOOSE_TEXT:
+                fragments = instructions[0][1]
+                if len(fragments) == 1:
+                    call = [(TEXT, fragments[0], None)]
+                else:
+                    call = [(CHOOSE_TEXT, fragments, keys)]
+            elif (
+                len(instructions) == 1
+                and instructions[0][0] in (
+                    CHOOSE, CHOOSE_WEIGHTED, CHOOSE_TEXT_WEIGHTED
+                )
+            ):
+                call = [(instructions[0][0], instructions[0][1], keys)]
+            else:
+                call = [(CALL, self._append_procedure(instructions), keys)]
+            self._definition_calls[key] = call
+        return self._definition_calls[key]
+
+    def _lower_definition(self, definition, variation_name):
+        """
+        Returns the instructions that push an example generated by variation
+        `variation_name` of the unit definition `definition`, drawing from
+        the random stream of this definition.
+        """
+        try:
+            rules = definition._get_relevant_rules(variation_name)
+        except SyntaxError as e:
+            return [(FAIL, str(e), None)]
+        if len(rules) == 0:
+            return [
+                (
+                    FAIL,
+                    definition.full_name.capitalize() + \
+                    " does not have any rule to generate.",
+                    None
+                )
+            ]
+
+        rule_instructions = []
+        for rule in rules:
+            if isinstance(rule, SlotValueTable):
+                # NOTE the table is chosen as often as its rows would be
+                #      (cf. `get_rule_table`), then one of its rows uniformly
+                rule_instructions.append(
+                    [(CHOOSE_TEXT, _lower_table(rule, definition._name), None)]
+                )
+                continue
+            slot_name = None
+            slot_value = None
+            if definition.unit_type == UnitType.slot:
+                slot_name = definition._name
+                try:
+                    slot_value = definition._get_slot_value(rule)
+                except SyntaxError as e:
+                    rule_instructions.append([(FAIL, str(e), None)])
+                    continue
+            instructions = self._lower_rule(rule)
+            if _get_constant(instructions) is None:
+                instructions.append((END_RULE, slot_name, slot_value))
+            else:
+                instructions.append((STRIP, None, None))
+                if slot_name is not None:
+                    instructions.append((SLOT, slot_name, slot_value))
+                instructions = _fold_constants(instructions)
+            rule_instructions.append(instructions)
+        return \
+            self._lower_modifiers(
+                definition,
+                self._lower_choice_among(
+                    rule_instructions,
+                    definition.get_rule_table(variation_name)
+                )
+            )
+
+    def _lower_choice_among(self, rule_instructions, table=None):
+        """
+        Returns the instructions choosing at random one of the lists of
+        instructions `rule_instructions` (using the alias table `table`,
+        or uniformly if it is `None`) and executing it.
+        """
+        fragments = [_get_constant(instrs) for instrs in rule_instructions]
+        if all(fragment is not None for fragment in fragments):
+            if table is not None:
+                return [
+                    (CHOOSE_TEXT_WEIGHTED, (tuple(fragments), table), None)
+                ]
+            return [(CHOOSE_TEXT, tuple(fragments), None)]
+        addresses = tuple(
+            self._append_procedure(instrs) for instrs in rule_instructions
+        )
+        if table is not None:
+            return [(CHOOSE_WEIGHTED, (addresses, table), None)]
+        return [(CHOOSE, addresses, None)]
+
+
+    def _lower_item(self, item):
+        """
+        Returns the instructions that push the fragment generated by
+        the rule content `item`.
+        """
+        if isinstance(item, Word):
+            fragment = (item._name, ())
+            if item._leading_space:
+                fragment = with_leading_space(fragment)
+            return [(TEXT, fragment, None)]
+        if isinstance(item, Choice):
+            if len(item._rules) == 0:
+                return [
+                    (
+                        FAIL,
+                        item.full_name.capitalize() + " does not have " + \
+                        "any rule to generate.",
+                        None
+                    )
+                ]
+            strategy = \
+                self._lower_choice_among(
+                    [self._lower_rule(rule) for rule in item._rules],
+                    item.get_rule_table()
+                )
+            return self._lower_modifiers(item, strategy)
+        if isinstance(item, UnitReference):
+            definition = item.get_definition()
+            strategy = \
+                self._lower_definition_call(
+                    definition, item._modifiers_repr.variation_name
+                )
+            return self._lower_modifiers(item, strategy)
+        if isinstance(item, Rule):
+            return self._lower_rule(item)
+        raise TypeError(  # Should never happen
+            "Tried to compile an item of unknown type: " + \
+            item.__class__.__name__ + "."
+        )
+
+    def _lower_rule(self, rule):
+        """
+        Returns the instructions that push the fragment generated by
+        the rule `rule` (as a list).
+        """
+        instructions = []
+        nb_fragments = 0
+        uses_mapping = False
+        previous_fragment = None
+        for content in rule._contents:
+            content_instructions = self._lower_item(content)
+            fragment = _get_constant(content_instructions)
+            if fragment is not None and previous_fragment is not None:
+                previous_fragment = \
+                    concat_fragments([previous_fragment, fragment])
+                instructions[-1] = (TEXT, previous_fragment, None)
+                continue
+            previous_fragment = fragment
+            instructions.extend(content_instructions)
+            nb_fragments += 1
+            modifiers = getattr(content, "_modifiers_repr", None)
+            if (
+                modifiers is not None and modifiers.randgen
+                and modifiers.randgen.name is not None
+            ):
+                uses_mapping = True
+        if nb_fragments == 0:
+            return [(TEXT, EMPTY_FRAGMENT, None)]
+        if nb_fragments > 1:
+            instructions.append((CONCAT, nb_fragments, None))
+        if uses_mapping:
+            instructions = \
+                [(NEW_MAPPING, None, None)] + instructions + \
+                [(END_MAPPING, None, None)]
+        return instructions
+
+    def _lower_modifiers(self, item, strategy):
+        """
+        Returns the instructions `strategy` generating the fragment of
+        the modifiable item `item` without its modifiers,
+        with the instructions applying those modifiers added.
+        """
+        modifiers = item._modifiers_repr
+        instructions = list(strategy)
+        if item._leading_space:
+            instructions.append((SPACE, None, None))
+        if modifiers.casegen:
+            instructions.append((CASEGEN, None, None))
+        if modifiers.argument_value is not None:
+            argument_value = modifiers.argument_value
+            if not isinstance(argument_value, dict):  # Should never happen
+                raise SyntaxError(
+                    "Couldn't resolve the argument of " + item.full_name + "."
+                )
+            instructions.append((ARGUMENT, argument_value, None))
+        instructions = _fold_constants(instructions)
+        if modifiers.randgen:
+            randgen = \
+                (
+                    modifiers.randgen.name, modifiers.randgen.percentage,
+                    modifiers.randgen.opposite
+                )
+            instructions = \
+                [(RANDGEN, randgen, len(instructions))] + instructions
+        return instructions
+
+
+def _lower_table(table, slot_name):
+    """
+    Returns the tuple of the fragments generated by the rows of the table
+    of slot values `table` in slot `slot_name`, with their entities.
+    """
+    return tuple(
+        with_slot_entity((text, ()), slot_name, slot_value)
+        for (text, slot_value) in table.iter_rows()
+    )
+
+
+def _get_constant(instructions):
+    """
+    Returns the fragment pushed by the list of instructions `instructions`
+    if it only pushes a constant fragment, `None` otherwise.
+    """
+    if len(instructions) == 1 and instructions[0][0] == TEXT:
+        return instructions[0][1]
+    return None
+
+def _fold_constants(instructions):
+    """
+    Returns the list of instructions `instructions` where the modifiers that
+    don't draw random numbers and apply to constant fragments (pushed by
+    a `TEXT`, a `CHOOSE_TEXT` or a `CHOOSE_TEXT_WEIGHTED`) were applied at
+    compile time.
+    """
+    if (
+        len(instructions) == 0
+        or instructions[0][0] not in (TEXT, CHOOSE_TEXT, CHOOSE_TEXT_WEIGHTED)
+    ):
+        return instructions
+    (first_opcode, fragments, keys) = instructions[0]
+    if first_opcode == TEXT:
+        fragments = (fragments,)
+    elif first_opcode == CHOOSE_TEXT_WEIGHTED:
+        (fragments, table) = fragments
+    i = 1
+    while i < len(instructions):
+        (opcode, a, b) = instructions[i]
+        if opcode == SPACE:
+            fragments = tuple(with_leading_space(f) for f in fragments)
+        elif opcode == STRIP:
+            fragments = tuple(without_leading_space(f) for f in fragments)
+        elif opcode == ARGUMENT:
+            fragments = tuple(with_arguments(f, a) for f in fragments)
+        elif opcode == SLOT:
+            fragments = tuple(with_slot_entity(f, a, b) for f in fragments)
+        else:
+            break
+        i += 1
+    if first_opcode == TEXT:
+        return [(TEXT, fragments[0], None)] + instructions[i:]
+    if first_opcode == CHOOSE_TEXT_WEIGHTED:
+        return \
+            [(CHOOSE_TEXT_WEIGHTED, (fragments, table), keys)] + \
+            instructions[i:]
+    return [(CHOOSE_TEXT, fragments, keys)] + instructions[i:]
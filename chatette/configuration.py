@@ -6,7 +6,6 @@ of the program.
 """
 
 from chatette.utils import Singleton
-from chatette.log import print_warn
 
 
 class Configuration(Singleton):
@@ -16,16 +15,31 @@ class Configuration(Singleton):
     """
     _instance = None
     def __init__(self):
-        self.caching_level = 100  # out of 100
-
-    def set_caching_level(self, new_level):
-        print_warn(
-            "Setting caching level to " + str(new_level) + \
-            " for performance reasons."
-        )
-        if new_level < 0 or new_level > 100:
-            raise ValueError(
-                "Tried to set the caching level to an invalid level (" + \
-                str(new_level) + ")."
-            )
-        self.caching_level = new_level
+        # Budget of the cache of generated examples
+        # (cf. `chatette.caching.example_cache`): maximum number of examples
+        # and of bytes it can contain (`None` for no limit)
+        self.cache_max_nb_examples = 2000000
+        self.cache_max_bytes = None
+        # Directory where the examples of unit definitions are stored
+        # to be reused in later runs (cf. `chatette.caching.disk_cache`),
+        # `None` to disable this cache
+        self.cache_dir = None
+        # Intents that can generate more examples than this are generated
+        # lazily when all their examples are asked for
+        self.streaming_threshold = 100000
+        # Maximum number of examples kept in memory to remove duplicates
+        # when streaming the examples of intents (cf. `streaming_threshold`):
+        # beyond, they are written to sorted temporary files that are merged
+        # afterwards (cf. `chatette.units.external_set`), `None` for no limit
+        self.dedup_max_nb_examples = None
+        # Items that can generate at most this many examples are enumerated
+        # to count their different examples exactly
+        self.exact_count_threshold = 1000
+        # Draw the rules of unit definitions and choices with probabilities
+        # proportional to their numbers of possibilities when generating
+        # random examples (cf. `chatette.sampling.AliasTable`), so that
+        # random examples are drawn (nearly) uniformly among the possible
+        # examples rather than the examples of the rules that have few
+        # possibilities being oversampled
+        # NOTE random generation modifiers keep their percentages
+        self.weighted_rule_sampling = False
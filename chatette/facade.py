@@ -7,18 +7,26 @@ writing of the output file(s).
 
 import os
 import shutil
+from itertools import chain
 from random import seed as random_seed
-from six.moves import input, getcwd
+from six.moves import input, getcwd, zip
 
-from chatette.utils import Singleton, random_string
+from chatette import __version__
+from chatette.utils import Singleton, UnitType, random_string
 from chatette.log import print_DBG, print_warn
 from chatette.parsing.parser import Parser
+from chatette.parsing.parallel import ParallelParser
 from chatette.generator import Generator
+from chatette.incremental import \
+    Manifest, hash_file, get_intent_synonyms, remove_shard
+from chatette.configuration import Configuration
+from chatette.random_stream import RandomStream
 import chatette.adapters.factory as adapter_factory
 
 from chatette.statistics import Stats
 from chatette.deprecations import Deprecations
 from chatette.units.ast import AST
+from chatette.caching.example_cache import ExampleCache
 from chatette.parsing.input_file_manager import InputFileManager
 
 
@@ -32,7 +40,8 @@ class Facade(Singleton):
     _instance = None
     def __init__(self,
         master_file_path, output_dir_path=None, adapter_str="rasa",
-        base_filepath=None, local=False, seed=None, force_overwriting=False
+        base_filepath=None, local=False, seed=None, force_overwriting=False,
+        jobs=1, cache_dir=None, incremental=False, parse_jobs=1
     ):
         self.master_file_path = master_file_path
         if local:
@@ -46,27 +55,46 @@ class Facade(Singleton):
                                                 output_dir_path)
 
         self.force_overwriting = force_overwriting
+        self.jobs = jobs
+        self.incremental = incremental
+        Configuration.get_or_create().cache_dir = cache_dir
 
         # Initialize the random number generator
+        if seed is None and incremental:
+            # Reuse the seed of the last generation so that the intents
+            # that are not regenerated keep the same examples
+            manifest = Manifest.load(self.output_dir_path)
+            if manifest is not None:
+                seed = manifest.options.get("seed")
         if seed is None:
             seed = random_string()
             print("Executing Chatette with random seed '" + seed + "'.")
         else:
             print("Executing Chatette with seed '" + seed + "'.")
         random_seed(seed)
+        self.seed = seed
+        self._rng = None
 
+        self.adapter_str = adapter_str
+        self.base_filepath = base_filepath
         self.adapter = adapter_factory.create_adapter(
             adapter_str, base_filepath
         )
 
-        self.parser = Parser()
+        if parse_jobs > 1:
+            self.parser = ParallelParser(jobs=parse_jobs)
+        else:
+            self.parser = Parser()
         self.generator = None
 
     @classmethod
     def from_args(cls, args):
         return cls(
             args.input, args.output, args.adapter, args.base_filepath,
-            args.local, args.seed, args.force
+            args.local, args.seed, args.force, getattr(args, "jobs", 1),
+            getattr(args, "cache_dir", None),
+            getattr(args, "incremental", False),
+            getattr(args, "parse_jobs", 1)
         )
     @classmethod
     def get_or_create_from_args(cls, args):
@@ -80,6 +108,7 @@ class Facade(Singleton):
         Stats.reset_instance()
         Deprecations.reset_instance()
         AST.reset_instance()
+        ExampleCache.reset_instance()
         InputFileManager.reset_instance(None)
         return cls.reset_instance(*args, **kwargs)
 
@@ -88,6 +117,9 @@ class Facade(Singleton):
         """
         Executes the parsing, generation and (if needed) writing of the output.
         """
+        if self.incremental:
+            self.run_incremental()
+            return
         self.run_parsing()
         self.run_generation()
 
@@ -112,25 +144,155 @@ class Facade(Singleton):
         else:
             adapter = adapter_factory.create_adapter(adapter_str)
 
-        self.generator = Generator()
+        self.generator = Generator(self.seed, self.jobs)
         synonyms = AST.get_or_create().get_entities_synonyms()
 
+        if not self._clear_output_dir():
+            return
+
+        # Training examples are streamed to the adapter while the testing
+        # examples of each intent are kept to be written afterwards
+        test_examples = []
+        def iter_train_examples():
+            for (intent_train_examples, intent_test_examples) in \
+                self.generator.generate_intents():
+                test_examples.extend(intent_test_examples)
+                for example in intent_train_examples:
+                    yield example
+        _write_examples(
+            adapter, os.path.join(self.output_dir_path, "train"),
+            iter_train_examples(), synonyms
+        )
+        _write_examples(
+            adapter, os.path.join(self.output_dir_path, "test"),
+            test_examples, synonyms
+        )
+        print_DBG("Generation over")
+
+    def run_incremental(self):
+        """
+        Executes the parsing and generation of the intents affected by
+        the changes made to the template files since the last incremental
+        generation in the output directory (cf. `chatette.incremental`).
+        Nothing is parsed if no template file changed.
+        """
+        manifest = Manifest.load(self.output_dir_path)
+        if (
+            manifest is not None
+            and manifest.options != self._get_manifest_options()
+        ):
+            print_DBG(
+                "The options changed since the last generation: " + \
+                "regenerating all intents."
+            )
+            manifest = None
+        if manifest is not None:
+            changed_files = manifest.get_changed_files()
+            if len(changed_files) == 0:
+                print_DBG(
+                    "No template file changed since the last generation. " + \
+                    "Exiting without any change."
+                )
+                return
+            print_DBG(
+                "Changed files: " + ", ".join(changed_files) + "\n" + \
+                "Intents depending on them: " + \
+                ", ".join(manifest.get_intents_depending_on(changed_files))
+            )
+        self.run_parsing()
+        self.run_incremental_generation(manifest)
+
+    def run_incremental_generation(self, previous_manifest=None):
+        """
+        Generates the intents whose content changed since the generation
+        that wrote the manifest `previous_manifest` and writes each of them
+        in its own output shard (i.e. in its own directories).
+        The shards of the other intents are left untouched.
+        Generates all intents if `previous_manifest` is `None`.
+        @pre: the parsing has been done.
+        """
+        if previous_manifest is None and not self._clear_output_dir():
+            return
+        # The manifest is removed while the shards are being modified,
+        # so that an interrupted generation is redone from scratch
+        Manifest.remove(self.output_dir_path)
+
+        manifest = Manifest(self._get_manifest_options())
+        manifest.record_files(
+            self.parser.input_file_manager.get_parsed_file_paths()
+        )
+        intent_definitions = AST.get_or_create()[UnitType.intent]
+        intents_to_generate = []
+        for intent_name in intent_definitions:
+            record = manifest.record_intent(intent_definitions[intent_name])
+            if (
+                previous_manifest is None
+                or previous_manifest.intents.get(intent_name) != record
+            ):
+                intents_to_generate.append(intent_name)
+        if previous_manifest is not None:
+            for (intent_name, record) in previous_manifest.intents.items():
+                if (
+                    intent_name not in manifest.intents
+                    or intent_name in intents_to_generate
+                ):
+                    remove_shard(self.output_dir_path, record["shard"])
+
+        self.generator = Generator(self.seed, self.jobs)
+        generated_intents = \
+            zip(
+                intents_to_generate,
+                self.generator.generate_intents(intents_to_generate)
+            )
+        for (intent_name, (train_examples, test_examples)) in \
+            generated_intents:
+            shard_name = manifest.intents[intent_name]["shard"]
+            synonyms = \
+                get_intent_synonyms(intent_definitions[intent_name])
+            _write_examples(
+                self.adapter,
+                os.path.join(self.output_dir_path, "train", shard_name),
+                train_examples, synonyms
+            )
+            _write_examples(
+                self.adapter,
+                os.path.join(self.output_dir_path, "test", shard_name),
+                test_examples, synonyms
+            )
+        manifest.save(self.output_dir_path)
+        print_DBG(
+            "Generation over (" + str(len(intents_to_generate)) + " out of " + \
+            str(len(intent_definitions)) + " intents regenerated)"
+        )
+
+    def _get_manifest_options(self):
+        """
+        Returns the options that the examples written by an incremental
+        generation depend on.
+        """
+        if self.base_filepath is None:
+            base_file_hash = None
+        else:
+            base_file_hash = hash_file(self.base_filepath)
+        return {
+            "chatette_version": __version__,
+            "seed": self.seed,
+            "adapter": self.adapter_str,
+            "base_file": base_file_hash,
+        }
+
+    def _clear_output_dir(self):
+        """
+        Removes the output directory if it exists and the user agrees to it.
+        Returns `False` if the generation should be aborted.
+        """
         if os.path.exists(self.output_dir_path):
             if self.force_overwriting or self._ask_confirmation():
                 shutil.rmtree(self.output_dir_path)
             else:
                 print_DBG("Aborting generation. Exiting without any change.")
-                return
-
-        train_examples = list(self.generator.generate_train())
-        if train_examples:
-            adapter.write(os.path.join(self.output_dir_path, "train"),
-                          train_examples, synonyms)
-        test_examples = list(self.generator.generate_test(train_examples))
-        if test_examples:
-            adapter.write(os.path.join(self.output_dir_path, "test"),
-                          test_examples, synonyms)
-        print_DBG("Generation over")
+                return False
+        return True
 
     def _ask_confirmation(self):
         print_warn("Folder '" + self.output_dir_path + "' already exists.")
@@ -141,6 +303,28 @@ class Facade(Singleton):
         return False
 
 
+    def generate_random_batch(
+        self, nb_examples, unit_name, unit_type=UnitType.intent,
+        variation_name=None
+    ):
+        """
+        Returns the list of `nb_examples` examples generated at random from
+        variation `variation_name` of the unit of type `unit_type`
+        (a `UnitType` or its value) named `unit_name`
+        (cf. `GeneratingItem.generate_random_batch`).
+        Successive batches continue the same random stream,
+        derived from the seed.
+        @pre: the parsing has been done.
+        @raises: - `KeyError` if the unit was not declared.
+        """
+        if self._rng is None:
+            self._rng = RandomStream(self.seed)
+        definition = AST.get_or_create()[unit_type][unit_name]
+        return definition.generate_random_batch(
+            nb_examples, variation_name=variation_name, rng=self._rng
+        )
+
+
     def get_stats_as_str(self):
         stats = Stats.get_or_create()
         result = '\t' + str(stats.get_nb_files()) + " files parsed\n" + \
@@ -150,3 +334,16 @@ class Facade(Singleton):
                  str(stats.get_nb_aliases()) + " aliases\n" + \
                  '\t' + str(stats.get_nb_rules()) + " rules"
         return result
+
+
+def _write_examples(adapter, output_dir_path, examples, synonyms):
+    """
+    Writes the examples `examples` (any iterable) with the adapter `adapter`
+    in the directory `output_dir_path`, unless there are none.
+    """
+    examples = iter(examples)
+    first_example = next(examples, None)
+    if first_example is not None:
+        adapter.write(
+            output_dir_path, chain([first_example], examples), synonyms
+        )
@@ -1,56 +1,168 @@
 #!/usr/bin/env python3
 # coding: utf-8
 
-from chatette.configuration import Configuration
-from chatette.utils import UnitType
-from chatette.log import print_DBG
+from chatette.utils import UnitType, get_fork_context
+from chatette.random_stream import RandomStream
+from chatette.log import print_DBG, print_warn
 from chatette.units.ast import AST
 
 
+# Generator used by the worker processes (inherited from the parent process)
+_worker_generator = None
+
+
 class Generator(object):
     """
     Using the info parsed from the input file, this class will generate
     a Rasa NLU dataset and dump it in a JSON file.
     If there were inconsistencies in the input file, they are likely to be
     detected here.
+    If `seed` is not `None`, each unit draws its random numbers from its own
+    stream derived from `seed` (cf. `chatette.random_stream`), so that the
+    examples of an intent don't depend on the other intents or on
+    the process they're generated in. Otherwise, the global random state
+    is used.
+    Intents are generated in `jobs` processes.
     """
-    def __init__(self):
+    def __init__(self, seed=None, jobs=1):
         self.ast = AST.get_or_create()
-
-        total_nb_units = len(self.ast[UnitType.intent]) + len(self.ast[UnitType.slot]) + len(self.ast[UnitType.alias])
-        if total_nb_units >= 50:
-            Configuration.get_or_create().set_caching_level(0)
+        self.seed = seed
+        self.jobs = jobs
+        if seed is None:
+            self._rng = None
+        else:
+            self._rng = RandomStream(seed)
 
     def generate_train(self):
         print_DBG("Generating training examples...")
         intent_definitions = self.ast[UnitType.intent]
         for intent_name in intent_definitions:
             intent = intent_definitions[intent_name]
-            examples = intent.generate_train()
+            examples = intent.generate_train(self._rng)
             for example in examples:
                 yield example
 
-    def generate_test(self, training_examples=None):
-        should_generate_test_set = False
-
+    def should_generate_test_set(self):
+        """Returns `True` iff at least one intent asks for test examples."""
         intent_definitions = self.ast[UnitType.intent]
         for intent_name in intent_definitions:
             if (
-                intent_definitions[intent_name].get_nb_testing_examples_asked \
+                intent_definitions[intent_name].get_nb_testing_examples_asked() \
                 is not None
             ):
-                should_generate_test_set = True
-                break
+                return True
+        return False
 
-        if should_generate_test_set:
+    def generate_test(self, training_examples=None):
+        """
+        Yields the testing examples of all intents, which are not in
+        the training examples `training_examples` (of any intent).
+        The training examples are indexed by intent once, so that each intent
+        only checks its testing examples against its own training examples,
+        in constant time for each example.
+        """
+        if self.should_generate_test_set():
             print_DBG("Generating testing examples...")
+            training_indices = _index_by_intent(training_examples)
+            intent_definitions = self.ast[UnitType.intent]
             for intent_name in intent_definitions:
                 intent = intent_definitions[intent_name]
-                examples = intent.generate_test(training_examples)
+                examples = \
+                    intent.generate_test(
+                        training_indices.get(intent_name, frozenset()),
+                        self._rng
+                    )
                 for example in examples:
                     yield example
 
 
+    def generate_intents(self, intent_names=None):
+        """
+        Yields, for each intent (in the order they were declared), a pair
+        containing its training examples and its testing examples.
+        If `intent_names` is not `None`, only the intents it contains
+        are generated (in this order).
+        The training examples can be an iterator that generates them lazily
+        (cf. `IntentDefinition.generate_train`).
+        If `self.jobs` is larger than 1, the intents are distributed among
+        worker processes forked from the current one, which send back
+        the examples of each intent as soon as they were generated.
+        """
+        if intent_names is None:
+            intent_names = list(self.ast[UnitType.intent].keys())
+        else:
+            intent_names = list(intent_names)
+        print_DBG("Generating training and testing examples...")
+        if self.jobs <= 1 or len(intent_names) <= 1:
+            for intent_name in intent_names:
+                yield self._generate_intent(intent_name)
+            return
+
+        context = get_fork_context()
+        if context is None:
+            print_warn(
+                "Cannot fork worker processes on this platform: " + \
+                "generating all intents in the current process."
+            )
+            for intent_name in intent_names:
+                yield self._generate_intent(intent_name)
+            return
+
+        global _worker_generator
+        _worker_generator = self
+        pool = context.Pool(min(self.jobs, len(intent_names)))
+        try:
+            for result in pool.imap(_generate_intent_in_worker, intent_names):
+                yield result
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            _worker_generator = None
+
+    def _generate_intent(self, intent_name):
+        """
+        Returns the pair containing the training and the testing examples
+        of intent `intent_name`.
+        """
+        intent = self.ast[UnitType.intent][intent_name]
+        training_examples = intent.generate_train(self._rng)
+        if intent.get_nb_testing_examples_asked() is None:
+            return (training_examples, [])
+        training_examples = list(training_examples)
+        return (
+            training_examples,
+            intent.generate_test(training_examples, self._rng)
+        )
+
+
+def _index_by_intent(examples):
+    """
+    Returns a dict mapping the names of intents to the set of their examples
+    among the intent examples `examples` (or an empty dict if it is `None`).
+    """
+    indices = dict()
+    if examples is not None:
+        for ex in examples:
+            if ex.intent_name not in indices:
+                indices[ex.intent_name] = set()
+            indices[ex.intent_name].add(ex)
+    return indices
+
+
+def _generate_intent_in_worker(intent_name):
+    """
+    Generates the examples of intent `intent_name` in a worker process.
+    As the training examples are sent back to the parent process,
+    they cannot be generated lazily.
+    """
+    (training_examples, testing_examples) = \
+        _worker_generator._generate_intent(intent_name)
+    return (list(training_examples), testing_examples)
+
+
 if __name__ == "__main__":
     # pylint: disable=wrong-import-position
     # pylint: disable=wrong-import-order
@@ -0,0 +1,221 @@
+# coding: utf-8
+"""
+Module `chatette.incremental`
+Contains the manifest written in the output directory by incremental
+generations (cf. option `--incremental`) and the functions computing
+the files and units each intent depends on.
+The manifest records the hash of every template file that was parsed and,
+for each intent, the content hash of its definition
+(cf. `UnitDefinition.get_content_hash`), the files and units it
+transitively depends on and the name of its output shard, i.e. of
+the directories its examples are written to. A later incremental run thus
+knows whether the templates changed at all and which intents are affected
+by the changes.
+"""
+
+import io
+import os
+import re
+import json
+import shutil
+from hashlib import sha256
+
+from chatette.utils import UnitType, extend_list_in_dict, remove_duplicates
+
+
+MANIFEST_FILE_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def hash_file(file_path):
+    """
+    Returns the hash (as an hexadecimal `str`) of the content of the file
+    at `file_path`, or `None` if it cannot be read.
+    """
+    try:
+        with io.open(file_path, 'rb') as f:
+            return sha256(f.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+
+def iter_dependencies(definition, variation_name=None):
+    """
+    Yields the unit definition `definition` and each definition that
+    variation `variation_name` of `definition` transitively references,
+    once each.
+    """
+    visited = set()
+    yielded = set()
+    to_visit = [(definition, variation_name)]
+    while len(to_visit) > 0:
+        (current, current_variation) = to_visit.pop()
+        if (id(current), current_variation) in visited:
+            continue
+        visited.add((id(current), current_variation))
+        if id(current) not in yielded:
+            yielded.add(id(current))
+            yield current
+        for reference in current.iter_references(current_variation):
+            to_visit.append(
+                (
+                    reference.get_definition(),
+                    reference._modifiers_repr.variation_name
+                )
+            )
+
+
+def get_intent_synonyms(intent):
+    """
+    Returns the synonyms (as a dict) of the slots that the intent
+    definition `intent` depends on.
+    """
+    synonyms = dict()
+    for definition in iter_dependencies(intent):
+        if definition.unit_type == UnitType.slot:
+            current_synonyms = definition.get_synonyms_dict()
+            for slot_value in current_synonyms:
+                extend_list_in_dict(
+                    synonyms, slot_value, current_synonyms[slot_value]
+                )
+    return remove_duplicates(synonyms)
+
+
+def get_shard_name(intent_name):
+    """
+    Returns the name of the directories in which the examples of
+    the intent named `intent_name` are written.
+    The hash of the name prevents intents whose names only differ by
+    characters that cannot be used in file names from sharing their shard.
+    """
+    return \
+        re.sub(r"[^\w\-]+", '_', intent_name) + '-' + \
+        sha256(intent_name.encode("utf-8")).hexdigest()[:8]
+
+
+class Manifest(object):
+    """
+    Represents the manifest of an incremental generation.
+    `options` is a dict of the options the examples were generated with
+    (seed, adapter, ...): if they change, every intent must be regenerated.
+    """
+    def __init__(self, options, files=None, intents=None):
+        self.options = options
+        if files is None:
+            files = dict()
+        if intents is None:
+            intents = dict()
+        self.files = files
+        self.intents = intents
+
+
+    @classmethod
+    def load(cls, output_dir_path):
+        """
+        Returns the manifest stored in the directory `output_dir_path`,
+        or `None` if there is none or it is unreadable.
+        """
+        file_path = os.path.join(output_dir_path, MANIFEST_FILE_NAME)
+        try:
+            with io.open(file_path, 'r', encoding="utf-8") as f:
+                content = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if (
+            not isinstance(content, dict)
+            or content.get("format_version") != FORMAT_VERSION
+        ):
+            return None
+        try:
+            return cls(
+                content["options"], content["files"], content["intents"]
+            )
+        except KeyError:
+            return None
+
+    def save(self, output_dir_path):
+        """Writes the manifest in the directory `output_dir_path`."""
+        if not os.path.isdir(output_dir_path):
+            os.makedirs(output_dir_path)
+        content = {
+            "format_version": FORMAT_VERSION,
+            "options": self.options,
+            "files": self.files,
+            "intents": self.intents,
+        }
+        file_path = os.path.join(output_dir_path, MANIFEST_FILE_NAME)
+        with io.open(file_path, 'w', encoding="utf-8") as f:
+            f.write(
+                json.dumps(
+                    content, ensure_ascii=False, indent=2, sort_keys=True
+                )
+            )
+
+    @staticmethod
+    def remove(output_dir_path):
+        """
+        Removes the manifest from the directory `output_dir_path`
+        (if there is one).
+        """
+        file_path = os.path.join(output_dir_path, MANIFEST_FILE_NAME)
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+
+
+    def record_files(self, file_paths):
+        """Records the hashes of the template files at `file_paths`."""
+        for file_path in file_paths:
+            self.files[file_path] = hash_file(file_path)
+
+    def get_changed_files(self):
+        """
+        Returns the list of the recorded files whose content changed
+        (or which were removed) since they were recorded.
+        """
+        return [
+            file_path for file_path in sorted(self.files)
+            if hash_file(file_path) != self.files[file_path]
+        ]
+
+
+    def record_intent(self, intent):
+        """
+        Records the content hash of the intent definition `intent`,
+        and the files and units it depends on.
+        Returns the record.
+        """
+        files = set()
+        units = set()
+        for definition in iter_dependencies(intent):
+            files.update(definition.declaration_files)
+            units.add(definition.unit_type.value + ':' + definition.identifier)
+        record = {
+            "hash": intent.get_content_hash(),
+            "files": sorted(files),
+            "units": sorted(units),
+            "shard": get_shard_name(intent.identifier),
+        }
+        self.intents[intent.identifier] = record
+        return record
+
+    def get_intents_depending_on(self, file_paths):
+        """
+        Returns the names of the intents that depend on at least one of
+        the files at `file_paths`.
+        """
+        file_paths = set(file_paths)
+        return [
+            intent_name for intent_name in sorted(self.intents)
+            if file_paths.intersection(self.intents[intent_name]["files"])
+        ]
+
+
+def remove_shard(output_dir_path, shard_name):
+    """
+    Removes the training and testing output files of the shard
+    `shard_name` from the directory `output_dir_path`.
+    """
+    for set_name in ("train", "test"):
+        shard_path = os.path.join(output_dir_path, set_name, shard_name)
+        if os.path.isdir(shard_path):
+            shutil.rmtree(shard_path)
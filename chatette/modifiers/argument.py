@@ -19,15 +19,24 @@ def modify_nb_possibilities(unmodified_nb_possibilities):
 
 def modify_example(example, arg_mapping):
     """
-    Modifies the generated example `example` by applying
-    the argument modifier with the mapping `arg_mapping` between
+    Returns the example obtained by applying to the generated example
+    `example` the argument modifier with the mapping `arg_mapping` between
     the argument names and values.
-    Returns the modified example.
+    """
+    text = modify_text(example.text, arg_mapping)
+    if text == example.text:
+        return example
+    return example.with_text(text)
+
+def modify_text(text, arg_mapping):
+    """
+    Returns the text `text` in which the arguments have been replaced
+    using the mapping `arg_mapping` between the argument names and values.
     """
     for arg_name in arg_mapping:
         to_replace = ARG_SYM + arg_name
-        example.text = example.text.replace(to_replace, arg_mapping[arg_name])
-    return example
+        text = text.replace(to_replace, arg_mapping[arg_name])
+    return text
 
 
 def make_all_possibilities(examples, arg_mapping):
@@ -36,6 +45,13 @@ def make_all_possibilities(examples, arg_mapping):
     of all possible examples after the argument modifier applied
     using the mapping `arg_mapping` between the argument names and values.
     """
+    return [modify_example(ex, arg_mapping) for ex in examples]
+
+def iter_all_possibilities(examples, arg_mapping):
+    """
+    Lazy version of `make_all_possibilities`: given the iterable of examples
+    `examples`, yields all possible examples after the argument modifier
+    applied using the mapping `arg_mapping`.
+    """
     for ex in examples:
-        modify_example(ex, arg_mapping)
-    return examples
+        yield modify_example(ex, arg_mapping)
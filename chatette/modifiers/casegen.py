@@ -5,8 +5,7 @@ Contains the different functions that allow to apply
 the case generation modifier to one or several examples.
 """
 
-from random import random
-from copy import deepcopy
+from chatette.random_stream import get_stream
 
 
 def modify_nb_possibilities(unmodified_nb_possibilities):
@@ -18,13 +17,12 @@ def modify_nb_possibilities(unmodified_nb_possibilities):
     return 2 * unmodified_nb_possibilities
 
 
-def modify_example(example):
+def modify_example(example, rng=None):
     """
-    Modifies the generated example `example` by applying
-    the case generation modifier.
-    Returns the modified example.
+    Returns the example obtained by applying the case generation modifier
+    to the generated example `example`, drawing from the random stream `rng`.
     """
-    if random() < 0.5:
+    if get_stream(rng).random() < 0.5:
         return with_leading_upper(example)
     return with_leading_lower(example)
 
@@ -38,11 +36,24 @@ def make_all_possibilities(examples):
     for ex in examples:
         lowercase_ex = with_leading_lower(ex)
         result.append(lowercase_ex)
-        uppercase_ex = with_leading_upper(deepcopy(ex))
+        uppercase_ex = with_leading_upper(ex)
         if not uppercase_ex.is_dup(lowercase_ex):
             result.append(uppercase_ex)
     return result
 
+def iter_all_possibilities(examples):
+    """
+    Lazy version of `make_all_possibilities`: given the iterable of examples
+    `examples`, yields all possible examples after the case generation
+    modifier applied.
+    """
+    for ex in examples:
+        lowercase_ex = with_leading_lower(ex)
+        yield lowercase_ex
+        uppercase_ex = with_leading_upper(ex)
+        if not uppercase_ex.is_dup(lowercase_ex):
+            yield uppercase_ex
+
 ############# Utility functions ##############
 def may_change_leading_case(text):
     """
@@ -60,24 +71,24 @@ def may_change_leading_case(text):
 
 def with_leading_upper(example):
     """
-    Changes the leading letter of the text of example `example` to uppercase.
+    Returns a copy of example `example` whose text has its leading letter
+    changed to uppercase.
     """
     text = example.text
     for (i, c) in enumerate(text):
         if not c.isspace():
             text = text[:i] + text[i].upper() + text[(i + 1):]
             break
-    example.text = text
-    return example
+    return example.with_text(text)
 
 def with_leading_lower(example):
     """
-    Changes the leading letter of the text of example `example` to uppercase.
+    Returns a copy of example `example` whose text has its leading letter
+    changed to lowercase.
     """
     text = example.text
     for (i, c) in enumerate(text):
         if not c.isspace():
             text = text[:i] + text[i].lower() + text[(i + 1):]
             break
-    example.text = text
-    return example
+    return example.with_text(text)
@@ -5,12 +5,15 @@ Contains the different functions taht allow to apply
 the random generation modifier to one or several examples.
 """
 
-from random import randrange
-from copy import deepcopy
-
-from chatette.units import add_example_no_dup
+from chatette.units import Example, add_example_no_dup, get_randgen_mask
+from chatette.random_stream import get_stream
 
 
+# Name of the property `Example.randgen_mapping`, which converts from and to
+# dicts the bit masks in which examples store their random generation
+# mappings (cf. `chatette.units.get_randgen_mask`).
+# NOTE kept for backward compatibility: this module works on the bit masks
+#      directly and doesn't use it.
 RANDGEN_MAPPING_KEY = "randgen_mapping"
 
 
@@ -24,7 +27,8 @@ def modify_nb_possibilities(unmodified_nb_possibilities):
 
 
 def should_generate(
-    randgen_name, percentgen, opposite=False, randgen_mappings=None
+    randgen_name, percentgen, opposite=False, randgen_mappings=None,
+    rng=None
 ):
     """
     Returns `True` if the current item should generate
@@ -32,16 +36,38 @@ def should_generate(
     (if there is one), the percentage `percentgen`
     associated to the current item, whether it is an "opposite randgen" and
     the choices of random generation names made previously `randgen_mappings`.
+    Draws from the random stream `rng`.
     """
+    rng = get_stream(rng)
     if randgen_name is None:
-        return randrange(100) < percentgen
+        return rng.randrange(100) < percentgen
     if randgen_name not in randgen_mappings:
-        randgen_mappings[randgen_name] = (randrange(100) < percentgen)
+        randgen_mappings[randgen_name] = (rng.randrange(100) < percentgen)
     if opposite:
         return not randgen_mappings[randgen_name]
     return randgen_mappings[randgen_name]
 
 
+def decide_generation(
+    randgen_name, generate, opposite=False, randgen_mappings=None
+):
+    """
+    Records in `randgen_mappings` that the current item with random
+    generation name `randgen_name` was generated (if `generate` is `True`)
+    or not (if `generate` is `False`), given whether it is an
+    "opposite randgen".
+    Returns `False` iff this decision contradicts a choice of random
+    generation names made previously in `randgen_mappings`.
+    """
+    if randgen_name is None or randgen_mappings is None:
+        return True
+    value = (generate != opposite)
+    if randgen_name not in randgen_mappings:
+        randgen_mappings[randgen_name] = value
+        return True
+    return randgen_mappings[randgen_name] == value
+
+
 def make_all_possibilities(
     examples, empty_example, randgen_name=None, opposite=False
 ):
@@ -56,67 +82,90 @@ def make_all_possibilities(
                generation mapping.
     """
     if randgen_name is not None:
-        for ex in examples:
-            current_randgen_mapping = getattr(ex, RANDGEN_MAPPING_KEY, dict())
-            if randgen_name in current_randgen_mapping:
-                raise KeyError(
-                    "Didn't expect the random generation name '" + randgen_name + \
-                    "' to already be set (for example with text '" + \
-                    str(ex.text) + "')."
-                )
-            current_randgen_mapping[randgen_name] = not opposite
-            setattr(ex, RANDGEN_MAPPING_KEY, current_randgen_mapping)
-
-        current_randgen_mapping = \
-            getattr(empty_example, RANDGEN_MAPPING_KEY, dict())
-        if randgen_name in current_randgen_mapping:
-            raise KeyError(
-                "Didn't expect the random generation name '" + randgen_name + \
-                "' to already be set (for empty example)."
-            )
-        current_randgen_mapping[randgen_name] = opposite
-        setattr(empty_example, RANDGEN_MAPPING_KEY, current_randgen_mapping)
+        mask = get_randgen_mask(randgen_name)
+        examples = [
+            _with_randgen_mask(ex, randgen_name, mask, not opposite)
+            for ex in examples
+        ]
+        empty_example = \
+            _with_randgen_mask(empty_example, randgen_name, mask, opposite)
+    else:
+        examples = examples[:]
 
     return add_example_no_dup(examples, empty_example)
 
 
+def iter_all_possibilities(
+    examples, empty_example, randgen_name=None, opposite=False
+):
+    """
+    Lazy version of `make_all_possibilities`: given the iterable of examples
+    `examples`, yields all possible examples after the random generation
+    modifier applied, starting with `empty_example`.
+    Contrary to `make_all_possibilities`, the empty example is yielded even
+    if one of the examples in `examples` has an empty text.
+    @raises: - `KeyError` if `randgen_name` is already present in a random
+               generation mapping.
+    """
+    if randgen_name is None:
+        yield empty_example
+        for ex in examples:
+            yield ex
+        return
+    mask = get_randgen_mask(randgen_name)
+    yield _with_randgen_mask(empty_example, randgen_name, mask, opposite)
+    for ex in examples:
+        yield _with_randgen_mask(ex, randgen_name, mask, not opposite)
+
+def _with_randgen_mask(example, randgen_name, mask, value):
+    """
+    Returns a copy of `example` whose random generation mapping also
+    associates `randgen_name` (whose bit mask is `mask`) to `value`.
+    As examples, random generation mappings are never modified
+    once they were set.
+    @raises: - `KeyError` if `randgen_name` is already present in the mapping.
+    """
+    if example._randgen_decided & mask:
+        raise KeyError(
+            "Didn't expect the random generation name '" + randgen_name + \
+            "' to already be set (for example with text '" + \
+            str(example.text) + "')."
+        )
+    if value:
+        randgen_values = example._randgen_values | mask
+    else:
+        randgen_values = example._randgen_values
+    return example._replace(
+        _randgen_decided=example._randgen_decided | mask,
+        _randgen_values=randgen_values
+    )
+
+
 def can_concat_examples(example1, example2):
     """
     Returns `True` iff the random generation names that are common to both
     mappings of examples `example1` and `example2` are associated with
     the same boolean value.
     """
-    mapping1 = getattr(example1, RANDGEN_MAPPING_KEY, None)
-    mapping2 = getattr(example2, RANDGEN_MAPPING_KEY, None)
-    if mapping1 is None or mapping2 is None:
-        return True
-
-    for randgen_name in mapping1:
-        if (
-            randgen_name in mapping2
-            and mapping1[randgen_name] != mapping2[randgen_name]
-        ):
-            return False
-    return True
+    return \
+        (example1._randgen_values ^ example2._randgen_values) \
+        & example1._randgen_decided & example2._randgen_decided == 0
 
 def merge_randgen_mappings(example1, example2):
     """
-    Returns the random generation mapping that corresponds to the union
-    of that of both examples `example1` and `example2`.
+    Returns the random generation mapping (as a dict, `None` if it is
+    empty) that corresponds to the union of that of both examples
+    `example1` and `example2`.
+    NOTE kept for backward compatibility: concatenating examples merges
+         their bit masks directly (cf. `concat_examples_with_randgen`).
     @pre: both mappings can be merged together.
     """
-    mapping1 = getattr(example1, RANDGEN_MAPPING_KEY, None)
-    mapping2 = getattr(example2, RANDGEN_MAPPING_KEY, None)
-    if mapping1 is None:
-        return deepcopy(mapping2)
-    if mapping2 is None:
-        return deepcopy(mapping1)
-
-    result = deepcopy(mapping1)
-    for randgen_name in mapping2:
-        if randgen_name not in result:
-            result[randgen_name] = deepcopy(mapping2[randgen_name])
-    return result
+    merged = Example()
+    merged._randgen_decided = \
+        example1._randgen_decided | example2._randgen_decided
+    merged._randgen_values = \
+        example1._randgen_values | example2._randgen_values
+    return merged.randgen_mapping
 
 def concat_examples_with_randgen(example, example_to_append):
     """
@@ -124,9 +173,14 @@ def concat_examples_with_randgen(example, example_to_append):
     taking into account their randgen mappings.
     @pre: the randgen mappings of those examples can be merged.
     """
-    result = deepcopy(example)
-    result.append(deepcopy(example_to_append))
-    mapping = merge_randgen_mappings(example, example_to_append)
-    if mapping is not None:
-        setattr(result, RANDGEN_MAPPING_KEY, mapping)
+    result = example.append(example_to_append)
+    if example_to_append._randgen_decided & ~example._randgen_decided:
+        result = result._replace(
+            _randgen_decided=(
+                example._randgen_decided | example_to_append._randgen_decided
+            ),
+            _randgen_values=(
+                example._randgen_values | example_to_append._randgen_values
+            )
+        )
     return result
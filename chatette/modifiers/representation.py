@@ -5,6 +5,8 @@ Contains structures that represent the possible modifiers
 that could apply to unit declarations or sub-rules.
 """
 
+from chatette.units import get_randgen_mask
+
 
 class ModifiersRepresentation(object):
     def __init__(self):
@@ -65,6 +67,19 @@ class RandgenRepresentation(object):
         self.opposite = False
         self.percentage = 50
 
+    @property
+    def name(self):
+        return self._name
+    @name.setter
+    def name(self, new_name):
+        """
+        Changes the random generation name, interning it to its bit
+        in the random generation masks of examples (cf. `get_randgen_mask`).
+        """
+        self._name = new_name
+        if new_name is not None:
+            get_randgen_mask(new_name)
+
     def __bool__(self):  # For Python 3.x
         return self._present
     def __nonzero__(self):  # For Python 2.7
@@ -18,6 +18,24 @@ class FileAlreadyOpened(ValueError):
     pass
 
 
+class _ReplayedFile(object):
+    """
+    Stands for a template file whose lines were read in another process
+    (cf. `InputFileManager.replay_line`).
+    """
+    def __init__(self, file_path, line_nb):
+        self.name = file_path
+        self.line_nb = line_nb
+
+    def close(self):
+        pass
+    def closed(self):
+        return True
+
+    def readline(self):
+        return ''  # NOTE its lines are not read in this process
+
+
 class InputFileManager(Singleton):
     """
     Singleton in charge of managing the opening, closing and read accesses
@@ -42,6 +60,7 @@ class InputFileManager(Singleton):
     def __init__(self, file_path=None):
         self._current_file = None
         self._opened_files = []
+        self._parsed_file_paths = []
 
         self._last_read_line = None  # str
 
@@ -80,6 +99,7 @@ class InputFileManager(Singleton):
             self._opened_files.append(self._current_file)
         try:
             self._current_file = LineCountFileWrapper(file_path)
+            self._parsed_file_paths.append(file_path)
             Stats.get_or_create().new_file_parsed()
         except IOError as e:
             if len(self._opened_files) > 0:
@@ -107,11 +127,38 @@ class InputFileManager(Singleton):
             self._current_file = None
 
 
+    def replay_line(self, file_path, line_nb, line):
+        """
+        Makes the line `line` (at line number `line_nb`) of the file at
+        `file_path` the last read line, without reading it, for lines that
+        were read in another process (cf. `chatette.parsing.parallel`):
+        syntax errors then point at this line and files are included
+        with respect to this file.
+        """
+        self._current_file = _ReplayedFile(file_path, line_nb)
+        self._last_read_line = line
+    def stop_replaying(self):
+        """Forgets the line that was replayed last."""
+        self._current_file = None
+
+
     def get_current_file_information(self):
         if self._current_file is None:
             return (None, None)
         return (self._current_file.name, self._current_file.line_nb)
 
+    def get_parsed_file_paths(self):
+        """Returns the paths of all the files that were opened so far."""
+        return self._parsed_file_paths
+    def add_parsed_file_paths(self, file_paths):
+        """
+        Records the files at `file_paths` as parsed, without opening them
+        (for templates loaded from a snapshot,
+        cf. `chatette.caching.ast_snapshot`, and files of slot values,
+        cf. `chatette.units.slot_value_table`).
+        """
+        self._parsed_file_paths.extend(file_paths)
+
     def get_current_file_name(self):
         if self._current_file is None:
             return None
@@ -49,6 +49,7 @@ class TerminalType(Enum):
     intent_ref_end = 29
     slot_val_marker = 30  # '='
     slot_val = 31
+    rule_weight = 45  # Weight in '(weight: N)'
     # Modifiers
     casegen_marker = 32
     arg_marker = 33
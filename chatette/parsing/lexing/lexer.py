@@ -6,6 +6,7 @@ Contains the lexer used by the parser and the definition of the tokens it uses.
 
 from chatette.parsing.input_file_manager import InputFileManager
 from chatette.parsing.lexing.rule_line import RuleLine
+from chatette.parsing.lexing.scanner import scan_line
 
 
 class Lexer(object):
@@ -27,7 +28,12 @@ class Lexer(object):
         `parsing_slot_def` should be `True` when `text` corresponds to
         the contents of a slot definition (its value for the slot declaration
         line is not important).
+        Most lines are tokenized by the scanner (cf. `scan_line`), the others
+        by the lexing rules.
         """
+        tokens = scan_line(text, parsing_slot_def)
+        if tokens is not None:
+            return tokens
         rule = RuleLine(text)
         if not rule.matches(parsing_slot_def=parsing_slot_def):
             rule.print_error()
@@ -24,10 +24,18 @@ from chatette.parsing.lexing.rule_arg_assignment import \
     RuleArgAssignment
 from chatette.parsing.lexing.rule_whitespaces import RuleWhitespaces
 from chatette.parsing.lexing.rule_rand_gen import RuleRandGen
+from chatette.parsing.lexing.rule_weight import RuleWeight
 
 
 class RuleContentRule(LexingRule):
     def _apply_strategy(self, **kwargs):
+        weight_rule = RuleWeight(self._text, self._next_index)
+        if weight_rule.matches(**kwargs):
+            self._tokens.extend(weight_rule.get_lexical_tokens())
+            self._next_index = weight_rule.get_next_index_to_match()
+            self._update_furthest_matched_index(weight_rule)
+            return True
+
         if self._match_one_of(
             [RuleWord, RuleChoice, RuleUnitRef, RuleArgAssignment],
             self._next_index,
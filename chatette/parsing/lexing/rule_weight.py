@@ -0,0 +1,86 @@
+# coding: utf-8
+"""
+Module `chatette.parsing.lexing.rule_weight`
+Contains the definition of the class that represents the lexing rule
+to tokenize the weight of a rule (at the end of a unit rule or
+of a rule inside a choice).
+"""
+
+import re
+
+from chatette.parsing.lexing.lexing_rule import LexingRule
+from chatette.parsing.lexing import LexicalToken, TerminalType
+from chatette.parsing.utils import \
+    ANNOTATION_START, ANNOTATION_END, KEY_VAL_CONNECTOR, RULE_WEIGHT_KEY, \
+    SLOT_VAL_SYM, \
+    CHOICE_END, CHOICE_SEP, OLD_CHOICE_END, OLD_CHOICE_SEP, RAND_GEN_SYM, \
+    find_next_comment
+
+
+_WEIGHT_PATTERN = re.compile(
+    re.escape(ANNOTATION_START) + r"\s*" + RULE_WEIGHT_KEY + r"\s*" + \
+    re.escape(KEY_VAL_CONNECTOR) + r"\s*(\d+)\s*" + re.escape(ANNOTATION_END)
+)
+
+
+class RuleWeight(LexingRule):
+    _choice_rule_ends = [
+        CHOICE_SEP, CHOICE_END, OLD_CHOICE_SEP, OLD_CHOICE_END, RAND_GEN_SYM
+    ]
+
+    def _apply_strategy(self, **kwargs):
+        """
+        `kwargs` can contain a boolean with key `inside_choice` that is
+        `True` when the current rule is inside a choice and `False` otherwise.
+        If this boolean is not in `kwargs`, defaults to `False`.
+        ´kwargs´ can also contain a boolean with key `parsing_slot_def`
+        which is `True` iff the current rule is inside a slot definition.
+        If this boolean is not in `kwargs`, defaults to `False`.
+        """
+        match = _WEIGHT_PATTERN.match(self._text, self._start_index)
+        if match is None:
+            self.error_msg = \
+                "Invalid token. Expected the weight of a rule there " + \
+                "(such as '" + ANNOTATION_START + RULE_WEIGHT_KEY + \
+                KEY_VAL_CONNECTOR + " 2" + ANNOTATION_END + "')."
+            return False
+
+        # NOTE the weight must end the rule, otherwise it is a sequence of
+        #      words (which keeps the templates written before it existed
+        #      valid)
+        following_index = match.end()
+        while (
+            following_index < len(self._text)
+            and self._text[following_index].isspace()
+        ):
+            following_index += 1
+        if not self._ends_rule(following_index, **kwargs):
+            self.error_msg = \
+                "Invalid token. The weight of a rule must be at its end."
+            return False
+
+        self._tokens.append(
+            LexicalToken(TerminalType.rule_weight, match.group(1))
+        )
+        self._next_index = match.end()
+        self._update_furthest_matched_index()
+        return True
+
+    def _ends_rule(self, index, **kwargs):
+        """
+        Returns `True` iff the rule being lexed can end at `index`.
+        `kwargs` can contain `inside_choice` and `parsing_slot_def`.
+        """
+        if (
+            index == len(self._text)
+            or find_next_comment(self._text, index) == index
+        ):
+            return True
+        if kwargs.get("inside_choice", False):
+            return any(
+                self._text.startswith(symbol, index)
+                for symbol in RuleWeight._choice_rule_ends
+            )
+        if kwargs.get("parsing_slot_def", False):
+            return self._text.startswith(SLOT_VAL_SYM, index)
+        return False
@@ -0,0 +1,374 @@
+# coding: utf-8
+"""
+Module `chatette.parsing.lexing.scanner`
+Contains the scanner that tokenizes the most common lines of template files
+(empty lines, comments and rules of unit definitions) in one pass using
+precompiled regexes, rather than by instantiating the lexing rules
+(cf. `chatette.parsing.lexing.lexing_rule`) for each alternative tried
+at each index.
+The scanner produces the same lexical tokens as `RuleLine`. It gives up on
+the lines it doesn't handle (declarations, file inclusions, escaped or
+deprecated symbols and lines that can't be lexed), which the lexer then
+tokenizes using the lexing rules, so that warnings and errors
+are unchanged.
+"""
+
+import re
+
+from chatette.parsing.lexing import LexicalToken, TerminalType
+from chatette.parsing.lexing.rule_word import RuleWord
+from chatette.parsing.lexing.rule_weight import RuleWeight
+from chatette.parsing.utils import \
+    ESCAPEMENT_SYM, COMMENT_SYM, OLD_COMMENT_SYM, \
+    UNIT_START_SYM, UNIT_END_SYM, ALIAS_SYM, SLOT_SYM, INTENT_SYM, \
+    ANNOTATION_START, SLOT_VAL_SYM, \
+    CHOICE_START, CHOICE_END, CHOICE_SEP, OLD_CHOICE_START, \
+    CASE_GEN_SYM, RAND_GEN_SYM, RAND_GEN_PERCENT_SYM, RAND_GEN_OPPOSITE_SYM, \
+    ARG_SYM, VARIATION_SYM, \
+    is_special_identifier_char
+
+
+# Lines containing those symbols are left to the lexing rules
+# (escapements, and deprecated comments and choices that issue warnings)
+_UNHANDLED_SYMS = (ESCAPEMENT_SYM, OLD_COMMENT_SYM, OLD_CHOICE_START)
+
+_WHITESPACES = re.compile(r"\s+", re.UNICODE)
+
+
+def _make_word_pattern(special_chars):
+    """
+    Returns the regex matching a word (cf. `RuleWord`): the characters up to
+    the next whitespace, comment or character in `special_chars`.
+    """
+    comment_start = COMMENT_SYM[0]
+    pattern = \
+        r"[^\s" + "".join(re.escape(c) for c in special_chars) + \
+        re.escape(comment_start) + r"]"
+    if comment_start not in special_chars:
+        pattern += \
+            r"|" + re.escape(comment_start) + \
+            r"(?!" + re.escape(COMMENT_SYM[1:]) + r")"
+    return re.compile(r"(?:" + pattern + r")+", re.UNICODE)
+
+_WORD = _make_word_pattern(RuleWord._should_be_escaped_chars)
+_WORD_IN_CHOICE = _make_word_pattern(
+    RuleWord._should_be_escaped_chars + \
+    RuleWord._should_be_escaped_in_choices_chars
+)
+_WORD_IN_SLOT_DEF = _make_word_pattern(
+    RuleWord._should_be_escaped_chars + \
+    RuleWord._should_be_escaped_in_slot_def_chars
+)
+
+_UNIT_REF_TYPES = {
+    ALIAS_SYM: (TerminalType.alias_ref_start, TerminalType.alias_ref_end),
+    SLOT_SYM: (TerminalType.slot_ref_start, TerminalType.slot_ref_end),
+    INTENT_SYM: (TerminalType.intent_ref_start, TerminalType.intent_ref_end),
+}
+
+
+class _Unhandled(Exception):
+    """
+    Raised when the scanner reaches a part of a line it doesn't handle
+    (the line is then left to the lexing rules).
+    """
+    pass
+
+
+def scan_line(text, parsing_slot_def=False):
+    """
+    Returns the list of lexical tokens of the line `text` (the same as
+    `RuleLine` would), or `None` if this line should be lexed using
+    the lexing rules.
+    `parsing_slot_def` should be `True` when `text` corresponds to
+    the contents of a slot definition.
+    """
+    for symbol in _UNHANDLED_SYMS:
+        if symbol in text:
+            return None
+    length = len(text)
+    indentation = _WHITESPACES.match(text)
+    index = 0 if indentation is None else indentation.end()
+    if index == length:
+        return []
+    if text.startswith(COMMENT_SYM, index):
+        return [LexicalToken(TerminalType.comment, text[index:])]
+    if indentation is None:
+        return None
+
+    tokens = [LexicalToken(TerminalType.indentation, indentation.group())]
+    try:
+        index = _scan_rule_contents(text, index, tokens, parsing_slot_def)
+        if index == length:
+            return tokens
+        if parsing_slot_def:
+            index = _scan_slot_value(text, index, tokens)
+        if index < length:
+            _scan_comment(text, index, tokens)
+    except _Unhandled:
+        return None
+    return tokens
+
+
+def _scan_rule_contents(text, index, tokens, parsing_slot_def):
+    """
+    Scans the contents of a rule (cf. `RuleUnitRule`) from `index`
+    until the end of `text` or a character that can't start a content.
+    Returns the index where the scanning stopped.
+    """
+    length = len(text)
+    while index < length:
+        next_index = \
+            _scan_content(text, index, tokens, False, parsing_slot_def)
+        if next_index is None:
+            break
+        index = next_index
+    return index
+
+def _scan_content(text, index, tokens, inside_choice, parsing_slot_def):
+    """
+    Scans one content of a rule (cf. `RuleContentRule`), i.e. a rule weight,
+    a word, a choice or a unit reference, followed by whitespaces.
+    Returns the index after it, or `None` if no content starts at `index`.
+    @pre: `index` is smaller than the length of `text`.
+    """
+    current_char = text[index]
+    if current_char == ANNOTATION_START:
+        weight_rule = RuleWeight(text, index)
+        if weight_rule.matches(
+            inside_choice=inside_choice, parsing_slot_def=parsing_slot_def
+        ):
+            tokens.extend(weight_rule.get_lexical_tokens())
+            return weight_rule.get_next_index_to_match()
+
+    if inside_choice:
+        word_pattern = _WORD_IN_CHOICE
+    elif parsing_slot_def:
+        word_pattern = _WORD_IN_SLOT_DEF
+    else:
+        word_pattern = _WORD
+    word = word_pattern.match(text, index)
+    if word is not None:
+        tokens.append(LexicalToken(TerminalType.word, word.group()))
+        index = word.end()
+    elif current_char == CHOICE_START:
+        index = _scan_choice(text, index, tokens)
+    elif current_char in _UNIT_REF_TYPES:
+        index = _scan_unit_ref(text, index, tokens)
+    else:
+        return None
+    return _scan_whitespaces(text, index, tokens)
+
+
+def _scan_choice(text, index, tokens):
+    """
+    Scans the choice starting at `index` (cf. `RuleChoice`)
+    and returns the index after it.
+    """
+    length = len(text)
+    tokens.append(LexicalToken(TerminalType.choice_start, CHOICE_START))
+    index += 1
+    if text.startswith(CASE_GEN_SYM, index):
+        tokens.append(LexicalToken(TerminalType.casegen_marker, CASE_GEN_SYM))
+        index += 1
+    index = _scan_whitespaces(text, index, tokens)
+
+    while True:
+        if text.startswith(CHOICE_SEP, index):
+            tokens.append(LexicalToken(TerminalType.choice_sep, CHOICE_SEP))
+            index = _scan_whitespaces(text, index + 1, tokens)
+        if index == length:
+            break
+        next_index = _scan_content(text, index, tokens, True, False)
+        if next_index is None:
+            break
+        index = next_index
+
+    if text.startswith(RAND_GEN_SYM, index):
+        index = _scan_randgen(text, index, tokens)
+    if not text.startswith(CHOICE_END, index):
+        raise _Unhandled()
+    tokens.append(LexicalToken(TerminalType.choice_end, CHOICE_END))
+    return index + 1
+
+
+def _scan_unit_ref(text, index, tokens):
+    """
+    Scans the unit reference starting at `index` (cf. `RuleUnitRef`)
+    and returns the index after it.
+    """
+    (start_type, end_type) = _UNIT_REF_TYPES[text[index]]
+    if not text.startswith(UNIT_START_SYM, index + 1):
+        raise _Unhandled()
+    tokens.append(LexicalToken(start_type, text[index:index + 2]))
+    index += 2
+    if text.startswith(CASE_GEN_SYM, index):
+        tokens.append(LexicalToken(TerminalType.casegen_marker, CASE_GEN_SYM))
+        index += 1
+    identifier = _extract_identifier(text, index)
+    tokens.append(LexicalToken(TerminalType.unit_identifier, identifier))
+    index += len(identifier)
+
+    # Modifiers, in any order but at most once each
+    length = len(text)
+    scanned_modifiers = set()
+    while index < length and text[index] not in scanned_modifiers:
+        modifier_sym = text[index]
+        if modifier_sym == VARIATION_SYM:
+            tokens.append(
+                LexicalToken(TerminalType.variation_marker, VARIATION_SYM)
+            )
+            identifier = _extract_identifier(text, index + 1)
+            tokens.append(
+                LexicalToken(TerminalType.variation_name, identifier)
+            )
+            index += 1 + len(identifier)
+        elif modifier_sym == RAND_GEN_SYM:
+            index = _scan_randgen(text, index, tokens)
+        elif modifier_sym == ARG_SYM:
+            tokens.append(LexicalToken(TerminalType.arg_marker, ARG_SYM))
+            identifier = _extract_identifier(text, index + 1)
+            tokens.append(LexicalToken(TerminalType.arg_value, identifier))
+            index += 1 + len(identifier)
+        else:
+            break
+        scanned_modifiers.add(modifier_sym)
+
+    if not text.startswith(UNIT_END_SYM, index):
+        raise _Unhandled()
+    tokens.append(LexicalToken(end_type, UNIT_END_SYM))
+    return index + 1
+
+
+def _scan_randgen(text, index, tokens):
+    """
+    Scans the random generation modifier starting at `index`
+    (cf. `RuleRandGen`) and returns the index after it.
+    """
+    tokens.append(LexicalToken(TerminalType.randgen_marker, RAND_GEN_SYM))
+    index += 1
+    if text.startswith(RAND_GEN_OPPOSITE_SYM, index):
+        tokens.append(
+            LexicalToken(
+                TerminalType.opposite_randgen_marker, RAND_GEN_OPPOSITE_SYM
+            )
+        )
+        index += 1
+    if index == len(text):
+        raise _Unhandled()
+    randgen_name = _extract_identifier(text, index, allow_empty=True)
+    if len(randgen_name) > 0:
+        tokens.append(LexicalToken(TerminalType.randgen_name, randgen_name))
+        index += len(randgen_name)
+    if text.startswith(RAND_GEN_PERCENT_SYM, index):
+        tokens.append(
+            LexicalToken(TerminalType.percentgen_marker, RAND_GEN_PERCENT_SYM)
+        )
+        index = _scan_percentgen(text, index + 1, tokens)
+    return index
+
+def _scan_percentgen(text, index, tokens):
+    """
+    Scans the percentage of a random generation modifier starting at `index`
+    (cf. `RulePercentGen`) and returns the index after it.
+    """
+    length = len(text)
+    start_index = index
+    while index < length and text[index].isdigit():
+        index += 1
+    if index == length:
+        raise _Unhandled()
+    if text[index] != '.':
+        if index == start_index:
+            raise _Unhandled()
+    else:
+        index += 1
+        start_index_non_int_part = index
+        while index < length and text[index].isdigit():
+            index += 1
+        if index == length or index == start_index_non_int_part:
+            raise _Unhandled()
+    percentage = text[start_index:index]
+
+    # NOTE as with `RulePercentGen`, the whitespaces come before the percentage
+    index = _scan_whitespaces(text, index, tokens)
+    if index == length:
+        raise _Unhandled()
+    if text[index] == '%':
+        index += 1
+    tokens.append(LexicalToken(TerminalType.percentgen, percentage))
+    return index
+
+
+def _scan_slot_value(text, index, tokens):
+    """
+    Scans the value given to the slot by a rule, if there is one at `index`
+    (cf. `RuleSlotVal`), and returns the index after it.
+    """
+    length = len(text)
+    value_index = index
+    while value_index < length and text[value_index].isspace():
+        value_index += 1
+    if value_index == length:
+        raise _Unhandled()
+    if not text.startswith(SLOT_VAL_SYM, value_index):
+        return index
+    tokens.append(LexicalToken(TerminalType.slot_val_marker, SLOT_VAL_SYM))
+    value_index += 1
+    while value_index < length and text[value_index].isspace():
+        value_index += 1
+    if value_index == length:
+        raise _Unhandled()
+    comment_index = text.find(COMMENT_SYM, value_index)
+    if comment_index == -1:
+        comment_index = length
+    slot_value = text[value_index:comment_index].rstrip()
+    if len(slot_value) == 0:
+        raise _Unhandled()
+    tokens.append(LexicalToken(TerminalType.slot_val, slot_value))
+    return value_index + len(slot_value)
+
+def _scan_comment(text, index, tokens):
+    """
+    Scans the comment that ends the line from `index` (cf. `RuleComment`),
+    possibly preceded by whitespaces.
+    """
+    length = len(text)
+    while index < length and text[index].isspace():
+        index += 1
+    if index == length:
+        return
+    if not text.startswith(COMMENT_SYM, index):
+        raise _Unhandled()
+    tokens.append(LexicalToken(TerminalType.comment, text[index:]))
+
+def _scan_whitespaces(text, index, tokens):
+    """
+    Scans the whitespaces at `index`, if any (cf. `RuleWhitespaces`),
+    and returns the index after them.
+    """
+    whitespaces = _WHITESPACES.match(text, index)
+    if whitespaces is None:
+        return index
+    tokens.append(LexicalToken(TerminalType.whitespace, whitespaces.group()))
+    return whitespaces.end()
+
+
+def _extract_identifier(text, index, allow_empty=False):
+    """
+    Returns the identifier starting at `index` in `text`
+    (cf. `chatette.parsing.utils.extract_identifier`).
+    @raises: - `_Unhandled` if there is no identifier there,
+               unless `allow_empty` is `True`.
+    """
+    length = len(text)
+    end_index = index
+    while (
+        end_index < length
+        and not is_special_identifier_char(text[end_index])
+    ):
+        end_index += 1
+    identifier = text[index:end_index].rstrip()
+    if len(identifier) == 0 and not allow_empty:
+        raise _Unhandled()
+    return identifier
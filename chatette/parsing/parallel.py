@@ -0,0 +1,289 @@
+# coding: utf-8
+"""
+Module `chatette.parsing.parallel`
+Contains the parser that parses the template files in parallel
+worker processes.
+The files that parsing a master file reads (through file inclusions) are
+found up front. Each of them is then parsed on its own in a worker process,
+which records the units declared in it, their rules and the files it
+includes (events) rather than adding them to the AST and parsing
+the included files. The events of the files are finally replayed in
+the current process in the order in which `Parser` would have parsed them,
+i.e. following the inclusions depth-first: this adds the same definitions
+to the AST in the same order and raises the same errors, pointing at
+the same lines, for units declared in several files.
+"""
+
+import io
+import os
+
+from chatette.utils import cast_to_unicode, get_fork_context
+from chatette.log import print_DBG, print_warn
+from chatette.statistics import Stats
+from chatette.parsing.utils import FILE_INCLUSION_SYM
+from chatette.parsing.lexing import TerminalType
+from chatette.parsing.lexing.lexer import Lexer
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.parsing.parser import Parser
+from chatette.units.ast import AST
+
+
+# Types of the events recorded when parsing a file
+_DECLARATION = 0
+_RULE = 1
+_INCLUSION = 2
+_ERROR = 3
+
+
+def find_template_files(master_file_path):
+    """
+    Returns the list of the paths of the template files that parsing
+    the master file at `master_file_path` reads, i.e. this file and
+    the files it includes (directly or not), in the order they are first
+    read. Files that cannot be read are left out.
+    """
+    master_file_path = cast_to_unicode(master_file_path)
+    if not os.path.isabs(master_file_path):
+        master_file_path = cast_to_unicode(os.path.abspath(master_file_path))
+    file_paths = []
+    _find_included_files(
+        master_file_path, [], file_paths, dict(), Lexer()
+    )
+    return file_paths
+
+def _find_included_files(
+    file_path, including_file_paths, file_paths, inclusions, lexer
+):
+    """
+    Adds the path `file_path` and the paths of the files it includes
+    (directly or not) to the list `file_paths` if they are not in it yet.
+    `including_file_paths` are the paths of the files that include
+    this one, which are not read again (cf. `InputFileManager.open_file`).
+    `inclusions` maps the paths of the files that were read to the files
+    they include.
+    """
+    if file_path not in inclusions:
+        try:
+            inclusions[file_path] = _read_inclusions(file_path, lexer)
+        except (IOError, OSError, ValueError):
+            return
+    if file_path not in file_paths:
+        file_paths.append(file_path)
+    for included_file_path in inclusions[file_path]:
+        if included_file_path not in including_file_paths:
+            _find_included_files(
+                included_file_path, including_file_paths + [file_path],
+                file_paths, inclusions, lexer
+            )
+
+def _read_inclusions(file_path, lexer):
+    """
+    Returns the list of the paths of the files that the template file
+    at `file_path` includes.
+    Invalid file inclusion lines are ignored (they are reported when
+    the file is parsed).
+    """
+    included_file_paths = []
+    with io.open(file_path, 'r') as template_file:
+        for line in template_file:
+            line = line.rstrip()
+            if not line.startswith(FILE_INCLUSION_SYM):
+                continue
+            try:
+                tokens = lexer.lex(line)
+            except SyntaxError:
+                continue
+            if tokens[0].type == TerminalType.file_inclusion_marker:
+                included_file_paths.append(
+                    _resolve_path(file_path, tokens[1].text)
+                )
+    return included_file_paths
+
+def _resolve_path(including_file_path, file_path):
+    """
+    Returns the path of the file at `file_path` included by the file at
+    `including_file_path` (cf. `InputFileManager.open_file`).
+    """
+    file_path = cast_to_unicode(file_path)
+    if os.path.isabs(file_path):
+        return file_path
+    return os.path.join(
+        cast_to_unicode(os.path.dirname(including_file_path)), file_path
+    )
+
+
+class ParallelParser(Parser):
+    """
+    Parser that parses the template files in `jobs` worker processes
+    (cf. the description of the module).
+    NOTE unlike with `Parser`, a rule cannot follow a file inclusion, as it
+         would be added to the last unit declared in the included file:
+         a `SyntaxError` is raised instead.
+    """
+    def __init__(self, master_file_path=None, jobs=2):
+        super(ParallelParser, self).__init__(master_file_path)
+        self.jobs = jobs
+
+    def _parse_file(self, file_path):
+        file_paths = find_template_files(file_path)
+        if self.jobs <= 1 or len(file_paths) <= 1:
+            super(ParallelParser, self)._parse_file(file_path)
+            return
+        context = get_fork_context()
+        if context is None:
+            print_warn(
+                "Cannot fork worker processes on this platform: " + \
+                "parsing all template files in the current process."
+            )
+            super(ParallelParser, self)._parse_file(file_path)
+            return
+
+        pool = context.Pool(min(self.jobs, len(file_paths)))
+        try:
+            events = dict(
+                zip(file_paths, pool.map(_parse_file_in_worker, file_paths))
+            )
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+        try:
+            self._replay_file(file_paths[0], [], events)
+        finally:
+            self.input_file_manager.stop_replaying()
+
+    def _replay_file(self, file_path, including_file_paths, events):
+        """
+        Replays the events recorded when parsing the file at `file_path`
+        in a worker process, as if this file was included by the files
+        at `including_file_paths`.
+        `events` maps the paths of the files that were parsed to
+        their events.
+        """
+        self.input_file_manager.add_parsed_file_paths([file_path])
+        Stats.get_or_create().new_file_parsed()
+        print_DBG("Parsing file: " + file_path)
+        for (event_type, content, line_information) in events[file_path]:
+            if event_type == _RULE:
+                self._add_rule(content)
+                continue
+            if line_information is not None:
+                self.input_file_manager.replay_line(*line_information)
+            if event_type == _DECLARATION:
+                (unit, variation) = content
+                # NOTE variations of units declared in other files are added
+                #      to the existing definitions
+                #      (cf. `UnitDefBuilder.create_concrete`)
+                definitions = self.ast[unit.unit_type]
+                if variation is not None and unit.identifier in definitions:
+                    unit = definitions[unit.identifier]
+                self._declare_unit(unit, variation)
+            elif event_type == _INCLUSION:
+                self._replay_inclusion(
+                    content, file_path, including_file_paths, events
+                )
+            else:
+                raise content
+
+    def _replay_inclusion(
+        self, included_file_path, file_path, including_file_paths, events
+    ):
+        """
+        Replays the inclusion of the file at `included_file_path`
+        by the file at `file_path` (included by the files at
+        `including_file_paths`).
+        """
+        resolved_file_path = _resolve_path(file_path, included_file_path)
+        if resolved_file_path in including_file_paths:
+            print_warn(
+                "Tried to read file '" + resolved_file_path + \
+                "' several times.\nContinuing the parsing of '" + \
+                file_path + "'."
+            )
+        elif resolved_file_path not in events:
+            # NOTE this file couldn't be read when the files were found:
+            #      raises the same error as `Parser`
+            #      (or parses it if it can now be read)
+            super(ParallelParser, self)._parse_file(included_file_path)
+        else:
+            self._replay_file(
+                resolved_file_path, including_file_paths + [file_path],
+                events
+            )
+
+
+class _FileParser(Parser):
+    """
+    Parser of a single template file, which records the units declared
+    in it, their rules and the files it includes (events) rather than
+    adding them to the AST and parsing the included files.
+    """
+    def __init__(self):
+        super(_FileParser, self).__init__()
+        self.events = []
+        # NOTE the units are not added to the AST, so that the references
+        #      to them are bound to the definitions of the AST in
+        #      the parent process when they are first used
+        self._definitions = dict()
+
+    def _parse_file_inclusion(self, lexical_tokens):
+        self.events.append(
+            (
+                _INCLUSION, lexical_tokens[1].text,
+                self.input_file_manager.get_current_line_information()
+            )
+        )
+
+    def _parse_rule_line(self, lexical_tokens):
+        if len(self.events) > 0 and self.events[-1][0] == _INCLUSION:
+            # NOTE `Parser` would add the rule to the last unit declared
+            #      in the included file, which is not parsed here
+            self.input_file_manager.syntax_error(
+                "Detected a rule right after a file inclusion: rules " + \
+                "cannot follow file inclusions when the template files " + \
+                "are parsed in parallel (option '--parse-jobs')."
+            )
+        super(_FileParser, self)._parse_rule_line(lexical_tokens)
+
+    def _declare_unit(self, unit, variation):
+        self.events.append(
+            (
+                _DECLARATION, (unit, variation),
+                self.input_file_manager.get_current_line_information()
+            )
+        )
+        # NOTE the variations of a unit declared in this file
+        #      are added to the same definition
+        #      (cf. `UnitDefBuilder.create_concrete`)
+        key = (unit.unit_type, unit.identifier)
+        if variation is not None and key in self._definitions:
+            unit = self._definitions[key]
+        else:
+            self._definitions.setdefault(key, unit)
+        self._current_unit_declaration = unit
+        self._current_variation_name = variation
+
+    def _add_rule(self, rule):
+        self.events.append((_RULE, rule, None))
+
+
+def _parse_file_in_worker(file_path):
+    """
+    Parses the template file at `file_path` in a worker process and
+    returns the list of the events recorded (cf. `_FileParser`).
+    An error stops the parsing and is recorded as the last event,
+    to be raised when the events are replayed.
+    """
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    Stats.reset_instance()
+    parser = _FileParser()
+    try:
+        parser.open_new_file(file_path)
+        parser._parse_lines()
+    except Exception as e:
+        parser.events.append((_ERROR, e, None))
+    return parser.events
@@ -8,6 +8,8 @@ those files.
 """
 
 from __future__ import print_function
+import csv
+import os
 from six import string_types
 
 from chatette.utils import UnitType, cast_to_unicode
@@ -22,9 +24,11 @@ from chatette.parsing.input_file_manager import \
 from chatette.parsing.lexing.lexer import Lexer
 from chatette.parsing.lexing import TerminalType
 from chatette.units.ast import AST
+from chatette.caching import ast_snapshot
 
 from chatette.units.word import Word
 from chatette.units.rule import Rule
+from chatette.units.slot_value_table import SlotValueTable
 
 from chatette.parsing import \
     ChoiceBuilder, UnitRefBuilder, \
@@ -75,6 +79,48 @@ class Parser(object):
 
 
     def parse_file(self, file_path):
+        """
+        Parses the template file(s) at `file_path`
+        and translates them into an AST.
+        If the disk cache is enabled and nothing was parsed yet, loads
+        the definitions from the snapshot of this file if none of
+        the template files changed since it was stored, and stores
+        a snapshot otherwise (cf. `chatette.caching.ast_snapshot`).
+        """
+        snapshot_path = None
+        if self._is_ast_empty():
+            snapshot_path = ast_snapshot.get_snapshot_path(file_path)
+        if snapshot_path is not None:
+            file_paths = ast_snapshot.load_snapshot(
+                snapshot_path, AST.get_or_create()
+            )
+            if file_paths is not None:
+                self.input_file_manager.add_parsed_file_paths(file_paths)
+                print_DBG(
+                    "Loaded the definitions parsed from file '" + \
+                    file_paths[0] + "' from the cache."
+                )
+                return
+            nb_parsed_files = \
+                len(self.input_file_manager.get_parsed_file_paths())
+            parsing_stats = ast_snapshot.get_parsing_stats()
+
+        self._parse_file(file_path)
+
+        if snapshot_path is not None:
+            parsing_stats = dict(
+                (name, value - parsing_stats[name])
+                for (name, value) in ast_snapshot.get_parsing_stats().items()
+            )
+            ast_snapshot.store_snapshot(
+                snapshot_path, AST.get_or_create(),
+                self.input_file_manager.get_parsed_file_paths()[
+                    nb_parsed_files:
+                ],
+                parsing_stats
+            )
+
+    def _parse_file(self, file_path):
         """
         Parses the template file(s) at `file_path`
         and translates them into an AST.
@@ -84,7 +130,13 @@ class Parser(object):
             "Parsing file: " + \
             self.input_file_manager.get_current_file_name()
         )
+        self._parse_lines()
 
+    def _parse_lines(self):
+        """
+        Parses the lines of the opened template file(s) until
+        all of them were read.
+        """
         while True:
             line = self.input_file_manager.read_line()
             if line is None:  # End of file
@@ -126,6 +178,15 @@ class Parser(object):
                 )
 
 
+    @staticmethod
+    def _is_ast_empty():
+        """Returns `True` iff no unit was declared yet."""
+        ast = AST.get_or_create()
+        return all(
+            len(ast[unit_type]) == 0
+            for unit_type in (UnitType.alias, UnitType.slot, UnitType.intent)
+        )
+
     def _parse_file_inclusion(self, lexical_tokens):
         """
         Opens the file that is included by the tokenized line `lexical_tokens`.
@@ -149,8 +210,17 @@ class Parser(object):
                 "Didn't expect a unit declaration to start here."
             )
 
-        (unit, variation) = self._parse_unit_declaration(line_tokens)
+        (unit, variation, value_table) = \
+            self._parse_unit_declaration(line_tokens)
+        self._declare_unit(unit, variation)
+        if value_table is not None:
+            self._add_rule(value_table)
 
+    def _declare_unit(self, unit, variation):
+        """
+        Adds the unit definition `unit` (or its variation `variation`)
+        to the AST and makes it the unit the next rules are added to.
+        """
         try:
             self.ast.add_unit(unit)
         except ValueError as e:
@@ -163,13 +233,18 @@ class Parser(object):
                 )
             else:  # new variation was declared
                 pass
+        self.ast[unit.unit_type][unit.identifier].add_declaration_file(
+            self.input_file_manager.get_current_file_name()
+        )
         self._current_variation_name = variation
         self._current_unit_declaration = unit
 
     def _parse_unit_declaration(self, lexical_tokens):
         """
         Parses the tokens `lexical_tokens` that contain a unit declaration.
-        Returns the corresponding concrete unit.
+        Returns the corresponding concrete unit, the name of the variation
+        declared and the table of the slot values its annotation references
+        (`None` if there is none).
         """
         if lexical_tokens[0].type == TerminalType.alias_decl_start:
             builder = AliasDefBuilder()
@@ -218,30 +293,30 @@ class Parser(object):
             i += 1
 
 
+        value_table = None
         if (
             i < len(lexical_tokens)
             and lexical_tokens[i].type == TerminalType.annotation_start
         ):
-            if not isinstance(builder, IntentDefBuilder):
-                if isinstance(builder, AliasDefBuilder):
-                    unit_type = "alias"
-                else:
-                    unit_type = "slot"
+            if isinstance(builder, AliasDefBuilder):
                 print_warn(
-                    "Found an annotation when parsing " + unit_type + " '" + \
+                    "Found an annotation when parsing alias '" + \
                     builder.identifier + "'\n" + \
                     "Annotations are currently only supported for intent " + \
-                    "definitions. Any other annotation is ignored."
+                    "and slot definitions. Any other annotation is ignored."
                 )
             else:
                 annotation_tokens = lexical_tokens[i:]
                 annotation = self._annotation_tokens_to_dict(annotation_tokens)
-                (nb_training_ex, nb_testing_ex) = \
-                    self._parse_intent_annotation(annotation)
-                builder.nb_training_ex = nb_training_ex
-                builder.nb_testing_ex = nb_testing_ex
+                if isinstance(builder, SlotDefBuilder):
+                    value_table = self._parse_slot_annotation(annotation)
+                else:
+                    (nb_training_ex, nb_testing_ex) = \
+                        self._parse_intent_annotation(annotation)
+                    builder.nb_training_ex = nb_training_ex
+                    builder.nb_testing_ex = nb_testing_ex
 
-        return (builder.create_concrete(), builder.variation)
+        return (builder.create_concrete(), builder.variation, value_table)
 
     def _annotation_tokens_to_dict(self, tokens):
         """
@@ -316,6 +391,46 @@ class Parser(object):
                 print_warn("Unsupported key in the annotation: '" + key + "'.")
         return (nb_training_ex, nb_testing_ex)
 
+    def _parse_slot_annotation(self, annotation):
+        """
+        Given a dict representing the annotation corresponding to a slot
+        declaration, returns the table of the slot values of the file
+        it references, or `None` if it doesn't reference any.
+        The path of the file is understood with respect to the file
+        currently being parsed (as for file inclusions), unless it is
+        an absolute path.
+        @raises - `SyntaxError` if the file cannot be read or is not a valid
+                  file of slot values (cf. `SlotValueTable.from_file`).
+                - `SyntaxError` if the annotation references several files.
+        Prints a warning if the annotation contains unrecognized keys.
+        """
+        value_table = None
+        for key in annotation:
+            if key is None or key.lower() == "file":
+                if value_table is not None:
+                    self.input_file_manager.syntax_error(
+                        "Detected a file of slot values several times."
+                    )
+                file_path = cast_to_unicode(annotation[key])
+                current_file_path = \
+                    self.input_file_manager.get_current_file_name()
+                if current_file_path is None:
+                    file_path = cast_to_unicode(os.path.abspath(file_path))
+                elif not os.path.isabs(file_path):
+                    file_path = os.path.join(
+                        os.path.dirname(current_file_path), file_path
+                    )
+                try:
+                    value_table = SlotValueTable.from_file(file_path)
+                except (IOError, ValueError, csv.Error) as e:
+                    self.input_file_manager.syntax_error(
+                        "Couldn't read the slot values of file '" + \
+                        file_path + "': " + str(e)
+                    )
+            else:
+                print_warn("Unsupported key in the annotation: '" + key + "'.")
+        return value_table
+
     def _str_to_int(self, text, err_msg):
         """
         Transforms the str `text` into an int.
@@ -347,6 +462,17 @@ class Parser(object):
             )
 
         rule = self._parse_rule(lexical_tokens[1:])
+        self._add_rule(rule)
+
+    def _add_rule(self, rule):
+        """
+        Adds the rule `rule` (or table of slot values) to the unit that is
+        being declared.
+        """
+        if isinstance(rule, SlotValueTable) and rule.file_path is not None:
+            # NOTE so that changes to the file are detected as changes
+            #      to the templates (cf. `chatette.caching.ast_snapshot`)
+            self.input_file_manager.add_parsed_file_paths([rule.file_path])
         self._current_unit_declaration.add_rule(
             rule, self._current_variation_name
         )
@@ -364,6 +490,7 @@ class Parser(object):
         current_builder = None
         leading_space = False
         slot_value = None
+        weight = 1
         i = 0
         while i < len(tokens):
             token = tokens[i]
@@ -459,6 +586,15 @@ class Parser(object):
                 pass
             elif token.type == TerminalType.slot_val:
                 slot_value = token.text
+            elif token.type == TerminalType.rule_weight:
+                weight = \
+                    self._str_to_int(
+                        token.text, "Couldn't parse the weight of the rule."
+                    )
+                if weight <= 0:
+                    self.input_file_manager.syntax_error(
+                        "The weight of a rule must be a positive integer."
+                    )
             else:
                 raise ValueError(  # Should never happen
                     "Detected invalid token type in rule: " + \
@@ -471,10 +607,10 @@ class Parser(object):
         if self._current_unit_declaration is not None:
             return Rule(
                 self._current_unit_declaration.full_name,
-                rule_contents, slot_value
+                rule_contents, slot_value, weight
             )
         # NOTE can only come from an interactive command (the 'rule' command)
-        return Rule(None, rule_contents, slot_value)
+        return Rule(None, rule_contents, slot_value, weight)
 
     def _parse_choice(self, tokens):
         rules = []
@@ -28,6 +28,7 @@ KEY_VAL_CONNECTOR = ':'
 KEY_VAL_ENCLOSERS = ["'", '"']
 # Unit rules
 SLOT_VAL_SYM = '='
+RULE_WEIGHT_KEY = "weight"
 SLOT_VAL_FIRST_RULE = '/'
 CHOICE_START = '['
 CHOICE_END = ']'
@@ -0,0 +1,87 @@
+# coding: utf-8
+"""
+Module `chatette.random_stream`
+Contains the seeded random number generators (streams) that are threaded
+through the generation of examples, and from which the stream of each unit
+is derived.
+"""
+
+import random
+from hashlib import sha256
+
+
+class RandomStream(random.Random):
+    """
+    A random number generator seeded with the string `seed`.
+    Each unit draws its random numbers from its own child stream
+    (cf. `child`), whose seed only depends on the seed of its parent and on
+    the keys identifying the unit. Hence, the examples generated for a unit
+    don't depend on which other units were generated before it nor on
+    the process it is generated in.
+    """
+    def __init__(self, seed):
+        self.seed_str = seed
+        self._children = dict()
+        super(RandomStream, self).__init__(_hash_seed(seed))
+
+    def child(self, *keys):
+        """
+        Returns the stream derived from this stream and the keys `keys`
+        (typically the type, name and variation of a unit).
+        The same object is returned each time the same keys are given,
+        so that successive generations of a unit continue its stream.
+        """
+        return self.child_with_keys(make_child_keys(*keys))
+
+    def child_with_keys(self, keys):
+        """
+        Same as `child`, with the keys already transformed into a tuple
+        of `str` by `make_child_keys` (which can thus be done once for all).
+        """
+        child = self._children.get(keys)
+        if child is None:
+            child = RandomStream(self.seed_str + "/" + "/".join(keys))
+            self._children[keys] = child
+        return child
+
+
+class _GlobalStream(object):
+    """
+    Stream drawing from the global state of module `random`,
+    used when no seeded stream is given (e.g. in the interactive mode).
+    Its children are itself.
+    """
+    def __getattr__(self, name):
+        return getattr(random, name)
+
+    def child(self, *keys):
+        return self
+    def child_with_keys(self, keys):
+        return self
+
+GLOBAL_STREAM = _GlobalStream()
+
+
+def get_stream(rng=None):
+    """
+    Returns the stream `rng` or the global stream if `rng` is `None`.
+    """
+    if rng is None:
+        return GLOBAL_STREAM
+    return rng
+
+
+def make_child_keys(*keys):
+    """
+    Returns the keys `keys` identifying a child stream as a tuple of `str`
+    (cf. `RandomStream.child`).
+    """
+    return tuple("" if key is None else str(key) for key in keys)
+
+
+def _hash_seed(seed):
+    """
+    Returns an integer seed derived from the string `seed`, which is the
+    same in every process and version of Python (unlike `hash`).
+    """
+    return int(sha256(seed.encode("utf-8")).hexdigest(), 16)
@@ -0,0 +1,189 @@
+# coding: utf-8
+"""
+Module `chatette.sampling`
+Contains the pseudorandom permutations of index spaces used to draw
+distinct indices (i.e. to sample without replacement) in the space of
+possibilities of an item, without remembering which indices were drawn
+and without ever drawing the same index twice, and the alias tables used
+to draw indices with given (integer) weights in constant time.
+"""
+
+from chatette.random_stream import get_stream
+
+
+_MASK_64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def _mix_64(value):
+    """
+    Returns the 64-bit integer `value` with its bits mixed
+    (finalizer of the SplitMix64 generator).
+    """
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return value ^ (value >> 31)
+
+
+class IndexPermutation(object):
+    """
+    Pseudorandom permutation of the indices `[0, size)`, keyed by numbers
+    drawn from the random stream `rng` (or the global stream if it is
+    `None`).
+    The permutation is a Feistel network over the smallest space of
+    `2^(2*k)` indices containing `[0, size)`: as each of its rounds can be
+    reverted, it is a bijection over this space whatever the round function.
+    Indices outside `[0, size)` are permuted again until they fall inside
+    it (cycle walking), which takes less than 4 rounds on average.
+    Iterating over the permutation thus yields each index exactly once,
+    in constant time and memory per index.
+    """
+    def __init__(self, size, rng=None, nb_rounds=4):
+        self.size = size
+        half_nb_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._half_nb_bits = half_nb_bits
+        self._half_mask = (1 << half_nb_bits) - 1
+        rng = get_stream(rng)
+        self._keys = [rng.getrandbits(64) for _ in range(nb_rounds)]
+
+    def __iter__(self):
+        # NOTE `range` can't be used with sizes larger than `sys.maxsize`
+        #      in Python 2
+        index = 0
+        while index < self.size:
+            yield self[index]
+            index += 1
+
+    def __getitem__(self, index):
+        """
+        Returns the image of `index` by the permutation.
+        @raises: - `IndexError` if `index` is not in `[0, size)`.
+        """
+        if index < 0 or index >= self.size:
+            raise IndexError(
+                "Tried to permute index " + str(index) + " in a space of " + \
+                str(self.size) + " indices."
+            )
+        index = self._permute(index)
+        while index >= self.size:
+            index = self._permute(index)
+        return index
+
+    def _permute(self, index):
+        """
+        Returns the image of `index` by the Feistel network
+        (over `[0, 2^(2*k))`).
+        """
+        left = index >> self._half_nb_bits
+        right = index & self._half_mask
+        for key in self._keys:
+            (left, right) = (right, left ^ self._round(right, key))
+        return (left << self._half_nb_bits) | right
+
+    def _round(self, value, key):
+        """
+        Round function of the Feistel network: hashes `value` (which can
+        have more than 64 bits) with the key `key`.
+        """
+        state = key
+        for shift in range(0, self._half_nb_bits, 64):
+            state = _mix_64(state ^ ((value >> shift) & _MASK_64))
+        result = 0
+        for shift in range(0, self._half_nb_bits, 64):
+            state = _mix_64((state + _GOLDEN_GAMMA) & _MASK_64)
+            result |= state << shift
+        return result & self._half_mask
+
+
+class AliasTable(object):
+    """
+    Table of the alias method (Walker, Vose) drawing indices in `[0, n)`
+    with probabilities proportional to the `n` non-negative integer weights
+    `weights`, in constant time per draw.
+    Each index `i` has a bucket of size `total` of which the first
+    `thresholds[i]` units belong to `i` and the others to `aliases[i]`:
+    drawing an index and a unit of its bucket thus gives an index with
+    the right probability. Weights can be very large integers (such as
+    numbers of possibilities), so the table is computed with integers
+    and its probabilities are exact.
+    @pre: at least one weight in `weights` is positive.
+    """
+    def __init__(self, weights):
+        divisor = 0
+        for weight in weights:
+            divisor = _gcd(divisor, weight)
+        weights = [weight // divisor for weight in weights]
+        nb_weights = len(weights)
+        self.total = sum(weights)
+        self.thresholds = [weight * nb_weights for weight in weights]
+        self.aliases = list(range(nb_weights))
+        small = \
+            [i for i in range(nb_weights) if self.thresholds[i] < self.total]
+        large = \
+            [i for i in range(nb_weights) if self.thresholds[i] >= self.total]
+        while len(small) > 0 and len(large) > 0:
+            index = small.pop()
+            alias = large[-1]
+            self.aliases[index] = alias
+            self.thresholds[alias] -= self.total - self.thresholds[index]
+            if self.thresholds[alias] < self.total:
+                large.pop()
+                small.append(alias)
+        for index in small + large:  # NOTE they all fill their bucket
+            self.thresholds[index] = self.total
+        self.thresholds = tuple(self.thresholds)
+        self.aliases = tuple(self.aliases)
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def draw(self, rng=None):
+        """
+        Returns an index drawn at random from the random stream `rng`
+        (or the global stream if it is `None`).
+        """
+        rng = get_stream(rng)
+        index = rng.randrange(len(self.thresholds))
+        if rng.randrange(self.total) < self.thresholds[index]:
+            return index
+        return self.aliases[index]
+
+
+def make_alias_table(weights):
+    """
+    Returns the alias table drawing indices with probabilities
+    proportional to `weights` (cf. `AliasTable`), or `None` if they should be
+    drawn uniformly, i.e. if all weights are the same (or all zero).
+    """
+    if len(weights) == 0 or all(weight == weights[0] for weight in weights):
+        return None
+    return AliasTable(weights)
+
+
+def make_rule_table(rules, by_nb_possibilities=False):
+    """
+    Returns the alias table drawing one of the rules `rules` with
+    a probability proportional to its weight (cf. `Rule.weight`), multiplied
+    by its number of possibilities if `by_nb_possibilities` is `True` and
+    by the number of rules it stands for otherwise (cf. `Rule.get_nb_rules`),
+    or `None` if the rules should be drawn uniformly.
+    """
+    weights = [rule.weight for rule in rules]
+    if by_nb_possibilities:
+        weights = [
+            weight * rule.get_max_nb_possibilities()
+            for (weight, rule) in zip(weights, rules)
+        ]
+    else:
+        weights = [
+            weight * rule.get_nb_rules()
+            for (weight, rule) in zip(weights, rules)
+        ]
+    return make_alias_table(weights)
+
+
+def _gcd(a, b):
+    """Returns the greatest common divisor of the integers `a` and `b`."""
+    while b != 0:
+        (a, b) = (b, a % b)
+    return a
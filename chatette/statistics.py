@@ -33,6 +33,13 @@ class Stats(Singleton):
         # Rule counts
         self.nb_rules_parsed = 0
 
+        # Example cache counts
+        self.nb_cache_hits = 0
+        self.nb_cache_misses = 0
+        self.nb_cache_evictions = 0
+        self.nb_disk_cache_hits = 0
+        self.nb_disk_cache_misses = 0
+
     def __str__(self):
         return \
             "Statistics:\n\tParsed files: " + str(self.nb_input_files_parsed) + \
@@ -44,7 +51,12 @@ class Stats(Singleton):
             " (" + str(self.nb_variation_slots) + " variations)" + \
             "\n\t\tDeclared aliases: " + str(self.nb_aliases_declared) + \
             " (" + str(self.nb_variation_aliases) + " variations)" + \
-            "\n\tParsed rules: " + str(self.nb_rules_parsed)
+            "\n\tParsed rules: " + str(self.nb_rules_parsed) + \
+            "\n\tExample cache: " + str(self.nb_cache_hits) + " hits, " + \
+            str(self.nb_cache_misses) + " misses, " + \
+            str(self.nb_cache_evictions) + " evictions" + \
+            "\n\tDisk cache: " + str(self.nb_disk_cache_hits) + " hits, " + \
+            str(self.nb_disk_cache_misses) + " misses"
 
     def new_file_parsed(self):
         self.nb_input_files_parsed += 1
@@ -101,6 +113,17 @@ class Stats(Singleton):
     def new_rules_parsed(self, nb_rules):
         self.nb_rules_parsed += nb_rules
 
+    def new_cache_hit(self):
+        self.nb_cache_hits += 1
+    def new_cache_miss(self):
+        self.nb_cache_misses += 1
+    def new_cache_eviction(self):
+        self.nb_cache_evictions += 1
+    def new_disk_cache_hit(self):
+        self.nb_disk_cache_hits += 1
+    def new_disk_cache_miss(self):
+        self.nb_disk_cache_misses += 1
+
     def one_unit_removed(self, unit_type):
         if unit_type == UnitType.alias:
             self.one_alias_removed()
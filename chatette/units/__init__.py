@@ -12,16 +12,30 @@ class Example(object):
     """
     Represents an utterance (i.e. an example of an intent)
     that will later on be written in the output file(s).
+    Examples are immutable values: the methods that would modify an example
+    return a new one instead, which shares the unchanged entities with it.
+    Examples can thus be cached and returned without being copied.
+    As there can be millions of examples, they don't have a `__dict__`.
+    The random generation names an example was generated with are stored in
+    two bit masks (cf. `get_randgen_mask`): `_randgen_decided` has the bits
+    of the names that have a value, and `_randgen_values` the bits of those
+    whose value is `True`.
     """
+    __slots__ = (
+        "text", "entities", "_slot_value",
+        "_randgen_decided", "_randgen_values"
+    )
     def __init__(self, text=None, entities=None):
         if entities is None:
-            entities = []
+            entities = ()
         if text is None:
             text = ""
 
         self.text = text
-        self.entities = entities
+        self.entities = tuple(entities)
         self._slot_value = None  # HACK used by slot to prevent code duplication
+        self._randgen_decided = 0
+        self._randgen_values = 0
 
     def __repr__(self):
         # return "<'" + self.text + "' " + str(self.entities) + '>'
@@ -29,7 +43,7 @@ class Example(object):
     def __str__(self):
         return \
             "Text: '" + self.text + \
-            "'\n\tEntities: " + str(self.entities)
+            "'\n\tEntities: " + str(list(self.entities))
 
     def as_dict(self):
         result = {"text": self.text, "entities": []}
@@ -39,14 +53,47 @@ class Example(object):
             result["entities"].append(entity.as_dict())
         return result
 
+    @property
+    def randgen_mapping(self):
+        """
+        Mapping from the random generation names this example was generated
+        with to whether they generated (`None` if there are none).
+        """
+        if self._randgen_decided == 0:
+            return None
+        return {
+            name: bool(self._randgen_values & mask)
+            for (name, mask) in iter_randgen_masks(self._randgen_decided)
+        }
+    @randgen_mapping.setter
+    def randgen_mapping(self, mapping):
+        self._randgen_decided = 0
+        self._randgen_values = 0
+        if mapping is not None:
+            for (name, value) in mapping.items():
+                mask = get_randgen_mask(name)
+                self._randgen_decided |= mask
+                if value:
+                    self._randgen_values |= mask
+
     def __hash__(self):
         entities_hash = 0
         for entity in self.entities:
             entities_hash += hash(entity)
         return hash(self.text) * 10000 + entities_hash  # QUESTION not sure this a very good hash
 
+    def _get_fields(self):
+        """Returns the names of the attributes of this example."""
+        return Example.__slots__
+    def _as_tuple(self):
+        """Returns the values of the attributes of this example."""
+        return tuple(getattr(self, field) for field in self._get_fields())
+
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return \
+            isinstance(other, Example) \
+            and self._get_fields() == other._get_fields() \
+            and self._as_tuple() == other._as_tuple()
     def __ne__(self, other):
         return not self.__eq__(other)
     def is_dup(self, other):
@@ -56,45 +103,84 @@ class Example(object):
         """
         return self.text == other.text
 
+    def _replace(self, **attributes):
+        """
+        Returns a shallow copy of this example (of the same class),
+        whose attributes in `attributes` were replaced.
+        """
+        result = self.__class__.__new__(self.__class__)
+        for field in self._get_fields():
+            setattr(result, field, attributes.get(field, getattr(self, field)))
+        return result
+
+    def with_text(self, text):
+        """
+        Returns a copy of this example whose text is `text`.
+        @pre: the entities still make sense in `text`.
+        """
+        return self._replace(text=text)
+    def with_entity(self, entity):
+        """Returns a copy of this example with the entity `entity` added."""
+        return self._replace(entities=self.entities + (entity,))
+    def with_slot_value(self, slot_value):
+        """Returns a copy of this example with slot value `slot_value`."""
+        return self._replace(_slot_value=slot_value)
+
     def prepend(self, text_to_prepend):
         """
-        Prepends `text_to_prepend` to the example
-        and manages the pointer of the entities.
+        Returns a copy of this example with `text_to_prepend` prepended to
+        its text, managing the pointers of the entities.
         """
         length = len(text_to_prepend)
         if length == 0:
-            return
-        self.text = text_to_prepend + self.text
-        for entity in self.entities:
-            entity._start_index += length
+            return self
+        return self._replace(
+            text=text_to_prepend + self.text,
+            entities=_shift_entities(self.entities, length)
+        )
     def append(self, example_to_append):
         """
-        Appends the text of `example_to_append` to the example text
-        and manages its pointers to entities if needed.
-        @post: don't use `example_to_append` any longer.
+        Returns a copy of this example with the text of `example_to_append`
+        appended to its text, managing the pointers to entities if needed.
         """
-        starting_index = len(self.text)
-        self.text += example_to_append.text
-        for entity in example_to_append.entities:
-            entity._start_index += starting_index
-            self.entities.append(entity)
+        if len(example_to_append.entities) == 0:
+            return self._replace(text=self.text + example_to_append.text)
+        return self._replace(
+            text=self.text + example_to_append.text,
+            entities=(
+                self.entities + \
+                _shift_entities(example_to_append.entities, len(self.text))
+            )
+        )
 
     def remove_leading_space(self):
-        """Removes the leading space of `self.text` if there is one."""
+        """
+        Returns a copy of this example without the leading space of its text
+        if there is one, or this example otherwise.
+        """
         if len(self.text) > 0 and self.text[0].isspace():
-            self.text = self.text[1:]
-            for entity in self.entities:
-                entity._remove_leading_space()
+            return self._replace(
+                text=self.text[1:],
+                entities=tuple(
+                    entity._without_leading_space()
+                    for entity in self.entities
+                )
+            )
+        return self
 
 
 class IntentExample(Example):
+    __slots__ = ("intent_name",)
     def __init__(self, intent_name, text=None, entities=None):
         super(IntentExample, self).__init__(text, entities)
-        self.intent_name = intent_name
+        self.intent_name = _intern_intent_name(intent_name)
     @classmethod
     def from_example(cls, example, intent_name):
         return cls(intent_name, example.text, example.entities)
 
+    def _get_fields(self):
+        return Example.__slots__ + IntentExample.__slots__
+
     def as_dict(self):
         result = super(IntentExample, self).as_dict()
         result["intent-name"] = self.intent_name
@@ -103,12 +189,12 @@ class IntentExample(Example):
     def __repr__(self):
         return \
             "<intent: " + self.intent_name + \
-            " '" + self.text + "' " + str(self.entities) + ">"
+            " '" + self.text + "' " + str(list(self.entities)) + ">"
     def __str__(self):
         return \
             "Intent: '" + self.intent_name + \
             "'\n\tText: '" + self.text + \
-            "'\n\tEntities: " + str(self.entities)
+            "'\n\tEntities: " + str(list(self.entities))
 
     def __eq__(self, other):
         if isinstance(other, Example) and not isinstance(other, IntentExample):
@@ -120,37 +206,90 @@ class IntentExample(Example):
         return hash(self.intent_name) * 1000000000 + example_hash  # QUESTION not sure this a very good hash
 
 
+_interned_intent_names = dict()
+def _intern_intent_name(intent_name):
+    """
+    Returns the string equal to `intent_name` that is shared by all examples
+    of this intent (works for both `str` and `unicode` in Python 2).
+    """
+    return _interned_intent_names.setdefault(intent_name, intent_name)
+
+
+_randgen_names = []
+_randgen_masks = dict()
+def get_randgen_mask(randgen_name):
+    """
+    Returns the bit mask that represents the random generation name
+    `randgen_name` in the random generation masks of examples.
+    Each name gets its own bit the first time it is asked for
+    (typically when parsing the templates).
+    """
+    mask = _randgen_masks.get(randgen_name)
+    if mask is None:
+        mask = 1 << len(_randgen_names)
+        _randgen_names.append(randgen_name)
+        _randgen_masks[randgen_name] = mask
+    return mask
+
+def iter_randgen_masks(randgen_mask):
+    """
+    Yields the pairs of random generation names and masks of the bits
+    set in `randgen_mask`.
+    """
+    bit_index = 0
+    while randgen_mask != 0:
+        if randgen_mask & 1:
+            yield (_randgen_names[bit_index], 1 << bit_index)
+        randgen_mask >>= 1
+        bit_index += 1
+
+
+# Entities store their start index and length packed in one integer
+_ENTITY_LENGTH_BITS = 32
+_ENTITY_LENGTH_MASK = (1 << _ENTITY_LENGTH_BITS) - 1
+
+
 class Entity(object):
     """
     Represents an entity as it will be contained in examples
     (instances of `Example`).
+    As examples, entities are immutable values without a `__dict__`.
     """
+    __slots__ = ("slot_name", "value", "_span")
     def __init__(self, name, length, value=None, start_index=0):
         self.slot_name = name  # name of the entity (not the associated text)
         self.value = value
-        self._len = length
-        self._start_index = start_index
+        self._span = (start_index << _ENTITY_LENGTH_BITS) | length
 
-    def _remove_leading_space(self):
+    @property
+    def _start_index(self):
+        return self._span >> _ENTITY_LENGTH_BITS
+    @property
+    def _len(self):
+        return self._span & _ENTITY_LENGTH_MASK
+
+    def _shift(self, offset):
+        """Returns a copy of this entity that starts `offset` chars later."""
+        return Entity(
+            self.slot_name, self._len, self.value, self._start_index + offset
+        )
+
+    def _without_leading_space(self):
         """
-        Adapts the start index and length if needed, after a leading space was
-        removed from the example text.
-        @returns: `True` if the entity still makes sense.
+        Returns a copy of this entity with its start index and length adapted,
+        after a leading space was removed from the example text.
         """
         if self._start_index == 0:
-            self._len -= 1
-            if self._len <= 0:
-                return False
-        else:
-            self._start_index -= 1
-        return True
+            return Entity(self.slot_name, self._len - 1, self.value, 0)
+        return self._shift(-1)
 
     def as_dict(self):
+        start_index = self._start_index
         return {
             "slot-name": self.slot_name,
             "value": self.value,
-            "start-index": self._start_index,
-            "end-index": self._start_index + self._len
+            "start-index": start_index,
+            "end-index": start_index + self._len
         }
 
     def __repr__(self):
@@ -167,22 +306,148 @@ class Entity(object):
             hash(self.slot_name +"@" + str(self._start_index) + ":" + str(self.value))
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return \
+            isinstance(other, Entity) \
+            and self.slot_name == other.slot_name \
+            and self.value == other.value \
+            and self._span == other._span
     def __ne__(self, other):
         return not self.__eq__(other)
 
 
+def _shift_entities(entities, offset):
+    """Returns the tuple of entities `entities` shifted by `offset` chars."""
+    return tuple(entity._shift(offset) for entity in entities)
+
+
+class ExampleSet(object):
+    """
+    Container of examples that does not contain duplicates.
+    An example is a duplicate of another if they have the same text. The one
+    that is kept is the one with the largest amount of entities (the first
+    one that was added in case of equality).
+    Examples are stored in a dict indexed by their text, which makes adding
+    an example a constant-time operation. They are sorted only when asked for
+    (cf. `to_sorted_list`).
+    """
+    def __init__(self, examples=None):
+        self._examples = dict()
+        if examples is not None:
+            self.extend(examples)
+
+    def __len__(self):
+        return len(self._examples)
+    def __iter__(self):
+        return iter(self._examples.values())
+    def __contains__(self, example):
+        return example.text in self._examples
+
+    def add(self, new_example):
+        """
+        Adds `new_example` to the set, unless it contains an example with
+        the same text and at least as many entities.
+        """
+        current_example = self._examples.get(new_example.text)
+        if (
+            current_example is None
+            or len(current_example.entities) < len(new_example.entities)
+        ):
+            self._examples[new_example.text] = new_example
+    def extend(self, new_examples):
+        """Adds each of the examples in `new_examples` to the set."""
+        for new_example in new_examples:
+            self.add(new_example)
+
+    def to_list(self):
+        """Returns the list of examples in this set (in no specific order)."""
+        return list(self._examples.values())
+    def to_sorted_list(self):
+        """Returns the list of examples in this set sorted by their texts."""
+        return [
+            self._examples[text] for text in sorted(self._examples)
+        ]
+
+
+class PossibilityCount(object):
+    """
+    Number of different examples (i.e. with different texts) an item can
+    generate. If `exact` is `False`, `value` is an upper bound
+    of this number, which is tighter than the number of possibilities
+    returned by `get_max_nb_possibilities` as it takes into account
+    the duplicates that were detected in the contents of the item.
+    """
+    __slots__ = ("value", "exact")
+    def __init__(self, value, exact=True):
+        self.value = value
+        self.exact = exact
+
+    def __eq__(self, other):
+        if not isinstance(other, PossibilityCount):
+            return False
+        return self.value == other.value and self.exact == other.exact
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    def __repr__(self):
+        if self.exact:
+            return "PossibilityCount(" + str(self.value) + ")"
+        return "PossibilityCount(<=" + str(self.value) + ")"
+
+
+def sum_possibility_counts(counts):
+    """
+    Returns the count of different examples of an item generating
+    the examples of one of several rules, given the counts `counts`
+    of each of those rules.
+    The count is only known to be exact if there is one rule, as different
+    rules can generate the same example.
+    """
+    counts = list(counts)
+    return PossibilityCount(
+        sum(count.value for count in counts),
+        len(counts) <= 1 and all(count.exact for count in counts)
+    )
+
+
+def iter_no_dup(examples):
+    """
+    Yields the examples of the iterable `examples`, skipping those whose text
+    was already yielded. As opposed to `ExampleSet`, the first example
+    with a given text is kept whatever its entities and only the texts
+    are stored, which allows to deduplicate examples lazily.
+    """
+    seen_texts = set()
+    for ex in examples:
+        if ex.text not in seen_texts:
+            seen_texts.add(ex.text)
+            yield ex
+
+
+def index_examples(examples):
+    """
+    Returns a set of the examples `examples` (any iterable or `None`),
+    in which checking whether an example is contained takes constant time
+    (rather than linear time in a list of examples).
+    Sets are returned as is.
+    """
+    if examples is None:
+        return frozenset()
+    if isinstance(examples, (set, frozenset)):
+        return examples
+    return frozenset(examples)
+
+
 def add_example_no_dup(example_list, new_example):
     """
     Adds `new_example` to the list of examples `example_list`,
     and then removes duplicates.
     An example is a duplicate of another if they have the same text. The one
     that is kept is the one with the largest amount of entities.
+    Inserting an example takes a linear time: use an `ExampleSet` rather
+    than calling this function in a loop.
     @pre: - `example_list` must be a sorted list (with key == text).
           - `example_list` does not contain duplicates.
     @post: the returned list is sorted.
     """
-    # TODO maybe using sets would be a better idea?
     # Find closest example
     lo = 0
     hi = len(example_list) - 1
@@ -222,10 +487,9 @@ def extend_no_dup(example_list, new_examples):
         return example_list
     if len(example_list) == 0:
         return new_examples
-    # TODO there might be a more optimized way to do that
-    for ex in new_examples:
-        example_list = add_example_no_dup(example_list, ex)
-    return example_list
+    examples = ExampleSet(example_list)
+    examples.extend(new_examples)
+    return examples.to_sorted_list()
 
 
 def sort_by_texts(example_list):
@@ -0,0 +1,207 @@
+# coding: utf-8
+"""
+Module `chatette.units.external_set`
+Contains the container of examples that deduplicates more examples than fit
+in memory, by writing them to sorted temporary files (runs) and merging
+those files (external merge sort).
+"""
+
+import heapq
+import io
+import os
+import shutil
+import struct
+import tempfile
+
+from chatette.units import ExampleSet
+from chatette.caching.disk_cache import encode_examples, decode_examples
+
+
+# Runs are written as a sequence of chunks of at most this many examples,
+# each prefixed with its size in bytes, so that they can be read back
+# one chunk at a time
+_CHUNK_NB_EXAMPLES = 1000
+_CHUNK_SIZE = struct.Struct(">I")
+# Maximum number of runs merged at once (i.e. of files open at once)
+_MAX_NB_RUNS = 64
+
+
+def iter_sorted_no_dup(examples, max_nb_examples):
+    """
+    Yields the examples of the iterable `examples` sorted by their texts and
+    without duplicates (cf. `ExternalExampleSet`), keeping at most
+    `max_nb_examples` examples in memory.
+    """
+    example_set = ExternalExampleSet(max_nb_examples)
+    try:
+        example_set.extend(examples)
+        for example in example_set.iter_sorted():
+            yield example
+    finally:
+        example_set.close()
+
+
+class ExternalExampleSet(object):
+    """
+    Container of examples that does not contain duplicates, and keeps at most
+    `max_nb_examples` examples in memory.
+    As for `ExampleSet`, an example is a duplicate of another if they have
+    the same text, and the one that is kept is the one with the largest
+    amount of entities (the first one that was added in case of equality).
+    Whenever the examples in memory exceed the limit, they are written sorted
+    by their texts to a temporary file (a run). Iterating over the set merges
+    the runs (k-way merge), which yields the examples sorted by their texts
+    and puts duplicates next to each other.
+    """
+    def __init__(self, max_nb_examples):
+        self.max_nb_examples = max(1, max_nb_examples)
+        self._buffer = ExampleSet()
+        self._run_paths = []
+        self._nb_runs_written = 0
+        self._tmp_dir = None
+
+    def __del__(self):
+        self.close()
+
+    def add(self, new_example):
+        """
+        Adds `new_example` to the set, unless it contains an example with
+        the same text and at least as many entities.
+        """
+        self._buffer.add(new_example)
+        if len(self._buffer) >= self.max_nb_examples:
+            self._spill()
+    def extend(self, new_examples):
+        """Adds each of the examples in `new_examples` to the set."""
+        for new_example in new_examples:
+            self.add(new_example)
+
+    def __iter__(self):
+        return self.iter_sorted()
+    def iter_sorted(self):
+        """Yields the examples in this set sorted by their texts."""
+        if len(self._run_paths) == 0:
+            return iter(self._buffer.to_sorted_list())
+        return _iter_no_dup(self._merge_runs(self._run_paths, True))
+
+    def to_sorted_list(self):
+        """
+        Returns the list of examples in this set sorted by their texts,
+        and removes the temporary files.
+        """
+        examples = list(self.iter_sorted())
+        self.close()
+        return examples
+
+    def close(self):
+        """Removes the temporary files and empties the set."""
+        self._buffer = ExampleSet()
+        self._run_paths = []
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+
+    def _spill(self):
+        """
+        Writes the examples in memory to a new run and removes them
+        from memory. If there are too many runs to merge them at once,
+        merges them into one.
+        """
+        if len(self._run_paths) >= _MAX_NB_RUNS:
+            run_paths = self._run_paths
+            self._run_paths = [
+                self._write_run(
+                    _iter_no_dup(self._merge_runs(run_paths, False))
+                )
+            ]
+            for run_path in run_paths:
+                os.remove(run_path)
+        self._run_paths.append(
+            self._write_run(self._buffer.to_sorted_list())
+        )
+        self._buffer = ExampleSet()
+
+    def _write_run(self, examples):
+        """
+        Writes the examples `examples` (sorted by their texts)
+        to a new run and returns its path.
+        """
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix="chatette-")
+        run_path = os.path.join(self._tmp_dir, str(self._nb_runs_written))
+        self._nb_runs_written += 1
+        with io.open(run_path, 'wb') as run_file:
+            chunk = []
+            for example in examples:
+                chunk.append(example)
+                if len(chunk) == _CHUNK_NB_EXAMPLES:
+                    _write_chunk(run_file, chunk)
+                    chunk = []
+            if len(chunk) > 0:
+                _write_chunk(run_file, chunk)
+        return run_path
+
+    def _merge_runs(self, run_paths, with_buffer):
+        """
+        Yields the examples of the runs at `run_paths` (and of the examples
+        in memory if `with_buffer` is `True`), sorted by their texts.
+        Examples with the same text are yielded in the order they were
+        added to the set.
+        """
+        iterators = [_iter_run(run_path) for run_path in run_paths]
+        if with_buffer:
+            iterators.append(iter(self._buffer.to_sorted_list()))
+        # NOTE the index of the run in the tuples makes them distinct,
+        #      so that examples are never compared
+        heap = []
+        for (i, iterator) in enumerate(iterators):
+            for example in iterator:
+                heap.append((example.text, i, example))
+                break
+        heapq.heapify(heap)
+        while len(heap) > 0:
+            (_, i, example) = heap[0]
+            yield example
+            for next_example in iterators[i]:
+                heapq.heapreplace(heap, (next_example.text, i, next_example))
+                break
+            else:
+                heapq.heappop(heap)
+
+
+def _iter_no_dup(examples):
+    """
+    Yields the examples `examples` (sorted by their texts) without
+    duplicates, keeping the first example with the largest amount of entities
+    among those that have the same text.
+    """
+    current_example = None
+    for example in examples:
+        if current_example is None:
+            current_example = example
+        elif current_example.text != example.text:
+            yield current_example
+            current_example = example
+        elif len(current_example.entities) < len(example.entities):
+            current_example = example
+    if current_example is not None:
+        yield current_example
+
+
+def _write_chunk(run_file, examples):
+    """Writes the examples `examples` in the file `run_file`."""
+    data = encode_examples(examples)
+    run_file.write(_CHUNK_SIZE.pack(len(data)))
+    run_file.write(data)
+
+def _iter_run(run_path):
+    """Yields the examples written in the run at `run_path`."""
+    with io.open(run_path, 'rb') as run_file:
+        while True:
+            size = run_file.read(_CHUNK_SIZE.size)
+            if len(size) < _CHUNK_SIZE.size:
+                return
+            (size,) = _CHUNK_SIZE.unpack(size)
+            for example in decode_examples(run_file.read(size)):
+                yield example
@@ -7,13 +7,14 @@ that are able to generate examples.
 
 
 from abc import ABCMeta, abstractmethod
-from random import uniform, choice, sample
-from copy import deepcopy
 from future.utils import with_metaclass
 
 from chatette.utils import sample_indulgent
+from chatette.sampling import IndexPermutation
+from chatette.random_stream import get_stream
 from chatette.configuration import Configuration
-from chatette.units import add_example_no_dup
+from chatette.caching.example_cache import ExampleCache
+from chatette.units import ExampleSet, PossibilityCount
 
 
 class GeneratingItem(with_metaclass(ABCMeta, object)):
@@ -29,11 +30,10 @@ class GeneratingItem(with_metaclass(ABCMeta, object)):
 
         self._leading_space = leading_space
 
-        self._max_nb_cached_ex = None
         self._total_nb_possibilities = None
-
-        # Cache: can contain a certain number of examples previously generated
-        self._cached_examples = []
+        # Counts of different examples for each variation
+        # (cf. `count_possibilities`)
+        self._possibility_counts = dict()
     @abstractmethod
     def _compute_full_name(self):
         """
@@ -56,56 +56,154 @@ class GeneratingItem(with_metaclass(ABCMeta, object)):
         """Returns the number of possible examples this item can generate."""
         raise NotImplementedError()
 
-    def get_max_cache_size(self):
+    def count_possibilities(self, **kwargs):
+        """
+        Returns the number of different examples this item can generate
+        as a `PossibilityCount`, i.e. a number that is exact or an upper bound
+        tighter than `get_max_nb_possibilities`.
+        Items that can generate few enough examples
+        (cf. `Configuration.exact_count_threshold`) are enumerated to count
+        them exactly, the count of the others is computed from the counts
+        of their contents. Counts are memoized for each variation,
+        so that a unit referenced several times is only counted once.
+        `kwargs` can contain `variation_name`.
+        """
+        variation_name = kwargs.get("variation_name", None)
+        if variation_name not in self._possibility_counts:
+            if variation_name is not None:
+                max_nb_possibilities = \
+                    self.get_max_nb_possibilities(variation_name=variation_name)
+            else:
+                max_nb_possibilities = self.get_max_nb_possibilities()
+            if (
+                max_nb_possibilities <= \
+                Configuration.get_or_create().exact_count_threshold
+            ):
+                count = \
+                    PossibilityCount(
+                        len(set(ex.text for ex in self.iter_all(**kwargs)))
+                    )
+            else:
+                count = self._count_possibilities_strategy(**kwargs)
+            self._possibility_counts[variation_name] = count
+        return self._possibility_counts[variation_name]
+    def _count_possibilities_strategy(self, **kwargs):
+        """
+        Strategy to compute the count of different examples of this item
+        (as a `PossibilityCount`) without enumerating them.
+        `kwargs` can contain `variation_name`.
+        """
+        if kwargs.get("variation_name", None) is not None:
+            return \
+                PossibilityCount(
+                    self.get_max_nb_possibilities(
+                        variation_name=kwargs["variation_name"]
+                    ),
+                    False
+                )
+        return PossibilityCount(self.get_max_nb_possibilities(), False)
+
+    def iter_references(self):
+        """
+        Yields the unit references contained in this item,
+        without looking inside the definitions they reference.
+        """
+        return iter(())
+
+    def has_rule_weights(self, **kwargs):
+        """
+        Returns `True` iff this item (or an item it contains or references)
+        chooses between rules that don't all have weight 1
+        (cf. `Rule.weight`).
+        `kwargs` can contain `variation_name`.
+        """
+        return False
+
+    def is_cacheable(self):
+        """
+        Returns `True` iff the examples of this item should be stored in
+        the example cache (cf. `chatette.caching.example_cache`).
         """
-        Returns the maximum number of examples
-        that should be cached for this item.
+        return True
+    def _get_cache_key(self, variation_name=None):
         """
-        if self._max_nb_cached_ex is None:
-            self.configure_max_cache_level(
-                Configuration.get_or_create().caching_level
+        Returns the key identifying the examples of variation
+        `variation_name` of this item in the example cache.
+        Items whose keys are equal must generate the same examples.
+        """
+        return (self, variation_name)
+    def _get_cached_examples(self, variation_name=None):
+        """
+        Returns the list of all the examples of variation `variation_name`
+        of this item if they are in the example cache, `None` otherwise.
+        The list returned must not be modified.
+        """
+        if not self.is_cacheable():
+            return None
+        return \
+            ExampleCache.get_or_create().get(
+                self._get_cache_key(variation_name)
             )
-        return self._max_nb_cached_ex
-    def configure_max_cache_level(self, level):
+    def _cache_examples(self, examples, variation_name=None):
         """
-        Sets the maximum number of examples given the level of caching
-        that it is provided.
-        This number can be reconfigured if it was already set.
-        `level` is a number out of 100,
-        with 0 meaning no caching at all and 100 meaning caching everything.
-        The levels in-between are not clearly defined
-        and leave room for implementation.
-        @pre: `level` is a number between 0 and 100 (included).
+        Stores the list of all the examples `examples` of variation
+        `variation_name` of this item in the example cache
+        (if this item is cacheable).
         """
-        self._max_nb_cached_ex = \
-            float(self.get_max_nb_possibilities() * level) / 100
+        if self.is_cacheable():
+            ExampleCache.get_or_create().put(
+                self._get_cache_key(variation_name), examples
+            )
 
     def _reset_caches(self):
         """Resets the caches of examples and number of possibilities."""
         self._total_nb_possibilities = None
-        self._cached_examples = []
+        self._possibility_counts = dict()
+        ExampleCache.get_or_create().remove_all(
+            lambda key: key[0] is self
+        )
 
 
     def generate_random(self, **kwargs):
         """
         Returns an example generated at random.
         Can use the cached examples in some cases (better performance).
+        `kwargs` can contain the random stream `rng` to draw from
+        (cf. `chatette.random_stream`). As the content of the cache depends
+        on what was generated before, the cache is only used when no stream
+        is given.
         """
+        rng = kwargs.get("rng", None)
         # use cache with probability `len(cached)/nb_possibilities`
-        if (
-            len(self._cached_examples) > 0
-            and uniform(0, 1) <= \
-            float(len(self._cached_examples)) / float(self.get_max_nb_possibilities())
-        ):
-            return choice(deepcopy(self._cached_examples))
-        example = self._generate_random_strategy()
+        if rng is None:
+            cached_examples = self._get_cached_examples()
+            if (
+                cached_examples
+                and get_stream().uniform(0, 1) <= \
+                float(len(cached_examples)) / float(self.get_max_nb_possibilities())
+            ):
+                return get_stream().choice(cached_examples)
+        example = self._generate_random_strategy(rng=rng)
         if self._leading_space:
-            example.prepend(' ')
+            example = example.prepend(' ')
         return example
+    def generate_random_batch(self, nb_examples, **kwargs):
+        """
+        Returns the list of `nb_examples` examples generated at random,
+        which are the examples that as many successive calls to
+        `generate_random` with the same arguments would return
+        (duplicates are not removed).
+        Subclasses override it to do once the work that doesn't depend on
+        the example being generated.
+        """
+        generate_random = self.generate_random
+        return [generate_random(**kwargs) for _ in range(nb_examples)]
+
     @abstractmethod
-    def _generate_random_strategy(self):
+    def _generate_random_strategy(self, rng=None):
         """
-        Strategy to generate one example at random without using the cache.
+        Strategy to generate one example at random without using the cache,
+        drawing from the random stream `rng`.
         Returns the generated example.
         """
         raise NotImplementedError()
@@ -114,19 +212,19 @@ class GeneratingItem(with_metaclass(ABCMeta, object)):
         """
         Returns the list of all examples this item can generate.
         Can use the cached examples in some cases (better performance).
-        Also sets up the cache if needed and fixes the count of possibilities.
+        Also caches the examples and records the exact count of
+        different examples (cf. `count_possibilities`).
         """
-        if len(self._cached_examples) == self.get_max_nb_possibilities():
-            return deepcopy(self._cached_examples)
+        cached_examples = self._get_cached_examples()
+        if cached_examples is not None:
+            return cached_examples[:]
 
         all_examples = self._generate_all_strategy()
         if self._leading_space:
-            for ex in all_examples:
-                ex.prepend(' ')
-        if len(self._cached_examples) == 0 and self.get_max_cache_size() > 0:
-            # TODO don't cache it all in all cases
-            self._cached_examples = deepcopy(all_examples)
-            self._total_nb_possibilities = len(all_examples)
+            all_examples = [ex.prepend(' ') for ex in all_examples]
+        # NOTE the strategies don't return several examples with the same text
+        self._possibility_counts[None] = PossibilityCount(len(all_examples))
+        self._cache_examples(all_examples[:])
         return all_examples
     @abstractmethod
     def _generate_all_strategy(self):
@@ -136,40 +234,196 @@ class GeneratingItem(with_metaclass(ABCMeta, object)):
         """
         raise NotImplementedError()
 
+    def iter_all(self, **kwargs):
+        """
+        Yields all the examples this item can generate, one at a time.
+        Unlike `generate_all`, the examples are generated lazily and never
+        stored, which allows to enumerate very large spaces of possibilities
+        in a memory that doesn't depend on their size. The examples are not
+        sorted and several examples with the same text can be yielded
+        (cf. `chatette.units.iter_no_dup`).
+        `kwargs` can contain `variation_name`.
+        """
+        for example in self._iter_all_strategy(**kwargs):
+            if self._leading_space:
+                example = example.prepend(' ')
+            yield example
+    @abstractmethod
+    def _iter_all_strategy(self, **kwargs):
+        """
+        Strategy to yield all possible examples without using the cache.
+        `kwargs` can contain `variation_name`.
+        """
+        raise NotImplementedError()
+
     def generate_nb_possibilities(self, nb_possibilities, **kwargs):
         """
         Returns a list containing `nb_possibilities` examples,
         chosen at random in the set of all possible examples.
         Can use the cached examples in some cases (better performances).
-        `kwargs` can contain `variation_name`.
+        `kwargs` can contain `variation_name` and the random stream `rng`.
         @pre: `nb_possibilities` >= 2 (otherwise call `generate_random`)
         """
-        max_nb_possibilities = self.get_max_nb_possibilities(**kwargs)
-        if nb_possibilities > max_nb_possibilities:
-            nb_possibilities = max_nb_possibilities
+        rng = kwargs.pop("rng", None)
+        count = self.count_possibilities(**kwargs)
+        if nb_possibilities > count.value:
+            nb_possibilities = count.value
+        if nb_possibilities < count.value and self.has_rule_weights(**kwargs):
+            return \
+                self._generate_n_weighted_strategy(
+                    nb_possibilities, rng, **kwargs
+                )
 
-        if len(self._cached_examples) >= max_nb_possibilities:
-            return sample(self._cached_examples, nb_possibilities)
-        if nb_possibilities < float(max_nb_possibilities) / 5.0:  # QUESTION: is 5 a good idea?
-            return self._generate_n_strategy(nb_possibilities, **kwargs)
-        return sample_indulgent(self.generate_all(**kwargs), nb_possibilities)
-    def _generate_n_strategy(self, n, **kwargs):
+        # NOTE the cache is full iff it contains the same examples as
+        #      `generate_all` would return, so the examples drawn don't
+        #      depend on the state of the cache
+        if nb_possibilities < float(count.value) / 5.0:  # QUESTION: is 5 a good idea?
+            return self._generate_n_strategy(nb_possibilities, rng, **kwargs)
+        cached_examples = \
+            self._get_cached_examples(kwargs.get("variation_name", None))
+        if cached_examples is not None:
+            return get_stream(rng).sample(cached_examples, nb_possibilities)
+        return \
+            sample_indulgent(
+                self.generate_all(**kwargs), nb_possibilities, rng
+            )
+    def _generate_n_strategy(self, n, rng=None, **kwargs):
         """
         Strategy to generate `n` examples without using the cache.
+        Walks a pseudorandom permutation of the space of possibilities
+        keyed by the random stream `rng` (cf. `IndexPermutation`) and
+        generates the examples the indices correspond to (cf. `generate_at`),
+        until `n` different examples were generated or the whole space
+        was walked. No index is thus drawn twice.
         Returns the list of generated examples.
         `kwargs` can contain `variation_name`.
         @pre: `n` <= `self.get_max_nb_possibilities()`
         """
-        # TODO wouldn't it be better with a set rather than a list?
-        generated_examples = []
-        loop_count = 0
-        while len(generated_examples) < n:
-            current_ex = self.generate_random(**kwargs)
-            add_example_no_dup(generated_examples, current_ex)
-            loop_count += 1
-            if loop_count > 10*n:  # QUESTION is that a good idea?
+        if n <= 0:
+            return []
+        generated_examples = ExampleSet()
+        permutation = \
+            IndexPermutation(self.get_max_nb_possibilities(**kwargs), rng)
+        for index in permutation:
+            current_ex = self.generate_at(index, **kwargs)
+            if current_ex is not None:
+                generated_examples.add(current_ex)
+                if len(generated_examples) >= n:
+                    break
+        return generated_examples.to_sorted_list()
+
+    def _generate_n_weighted_strategy(self, n, rng=None, **kwargs):
+        """
+        Strategy to generate `n` examples when some of the rules they can
+        come from have weights (cf. `has_rule_weights`): examples are
+        generated at random, so that the examples of each rule are drawn as
+        often as its weight says, until `n` different examples were generated
+        or `10*n` examples were drawn. The missing examples (if any) are then
+        taken from the walk of the space of possibilities
+        (cf. `_generate_n_strategy`).
+        Returns the list of generated examples.
+        `kwargs` can contain `variation_name`.
+        @pre: `n` <= `self.count_possibilities().value`
+        """
+        generated_examples = ExampleSet()
+        for _ in range(10 * n):
+            if len(generated_examples) >= n:
                 break
-        return generated_examples
+            generated_examples.add(self.generate_random(rng=rng, **kwargs))
+        if len(generated_examples) < n:
+            for example in self._generate_n_strategy(n, rng, **kwargs):
+                generated_examples.add(example)
+                if len(generated_examples) >= n:
+                    break
+        return generated_examples.to_sorted_list()
+
+    def generate_at(self, index, **kwargs):
+        """
+        Returns the example that has index `index` in the space of
+        possibilities of this item, i.e. in `[0, nb_possibilities)` where
+        `nb_possibilities` is `self.get_max_nb_possibilities()`.
+        Indices are computed using a mixed-radix decomposition over
+        the number of possibilities of the contents of this item.
+        Returns `None` if `index` corresponds to a combination that cannot be
+        generated (e.g. it gives two different values to the same random
+        generation name).
+        `kwargs` can contain `variation_name` and `randgen_mapping`.
+        @raises: - `IndexError` if `index` is out of range.
+        """
+        self._check_index(index, self.get_max_nb_possibilities())
+        example = self._generate_at_strategy(index, **kwargs)
+        if example is not None and self._leading_space:
+            example = example.prepend(' ')
+        return example
+    @abstractmethod
+    def _generate_at_strategy(self, index, **kwargs):
+        """
+        Strategy to generate the example at index `index` without
+        taking the leading space of this item into account.
+        Returns the generated example or `None` if `index` corresponds
+        to an impossible combination.
+        """
+        raise NotImplementedError()
+
+    def _check_index(self, index, nb_possibilities):
+        """
+        Raises an `IndexError` if `index` is not a valid index in the space
+        of `nb_possibilities` possibilities of this item.
+        """
+        if index < 0 or index >= nb_possibilities:
+            raise IndexError(
+                "Tried to generate the example at index " + str(index) + \
+                " of " + self.full_name + ", which can only generate " + \
+                str(nb_possibilities) + " examples."
+            )
+
+    def index_of(self, example, **kwargs):
+        """
+        Returns the index of `example` in the space of possibilities of
+        this item (i.e. an index `i` such that `self.generate_at(i)`
+        generates the same text and entities as `example`).
+        Returns `None` if this item cannot generate `example`.
+        `kwargs` can contain `variation_name`.
+        """
+        text = example.text
+        for (index, end_index) in self._iter_matches(text, 0, **kwargs):
+            if end_index != len(text):
+                continue
+            candidate = self.generate_at(index, **kwargs)
+            if (
+                candidate is not None and candidate.text == text
+                and candidate.entities == example.entities
+            ):
+                return index
+        return None
+    def _iter_matches(self, text, start_index, **kwargs):
+        """
+        Yields each pair `(index, end_index)` such that the example at index
+        `index` might generate the substring of `text` that starts at
+        `start_index` and ends at `end_index` (excluded).
+        The matches are permissive (some yielded indices may not actually
+        generate this substring), they are thus checked afterwards.
+        `kwargs` can contain `variation_name`, `arg_mappings` (the argument
+        mappings of the references containing this item, innermost first)
+        and `optional_leading_space` (`True` if a leading space of this item
+        might have been removed).
+        """
+        if self._leading_space:
+            if text.startswith(' ', start_index):
+                start_index += 1
+            elif not kwargs.get("optional_leading_space", False):
+                return
+            kwargs["optional_leading_space"] = False
+        for match in self._iter_matches_strategy(text, start_index, **kwargs):
+            yield match
+    @abstractmethod
+    def _iter_matches_strategy(self, text, start_index, **kwargs):
+        """
+        Strategy to find the matches of this item in `text` starting at
+        `start_index` without taking the leading space into account
+        (cf. `_iter_matches`).
+        """
+        raise NotImplementedError()
 
     # @abstractmethod
     # def short_description(self):
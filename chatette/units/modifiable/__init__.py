@@ -7,11 +7,9 @@ All those classes extend the abstract class `ModifiableItem`
 which is a sub-class of `GeneratingItem`.
 """
 
-from random import choice as random_choice, uniform
-from copy import deepcopy
-
 from chatette.units.generating_item import GeneratingItem
-from chatette.units import Example
+from chatette.units import Example, PossibilityCount
+from chatette.random_stream import get_stream
 
 from chatette.modifiers import casegen, argument, randgen
 
@@ -57,13 +55,15 @@ class ModifiableItem(GeneratingItem):
     def generate_random(self, **kwargs):
         """
         Overriding.
-        `kwargs` can contain the random name mapping `randgen_mapping` or
-        `variation_name`.
+        `kwargs` can contain the random name mapping `randgen_mapping`,
+        `variation_name` or the random stream `rng`
+        (cf. `GeneratingItem.generate_random`).
         """
         variation_name = kwargs.get("variation_name", None)
+        rng = kwargs.get("rng", None)
 
         randgen_mapping = kwargs.get("randgen_mapping", None)
-        if not self._should_generate(randgen_mapping):
+        if not self._should_generate(randgen_mapping, rng):
             return self._make_empty_example()
 
         if variation_name is not None:
@@ -71,39 +71,211 @@ class ModifiableItem(GeneratingItem):
                 self.get_max_nb_possibilities(variation_name=variation_name)
         else:
             max_nb_possibilities = self.get_max_nb_possibilities()
-        if isinstance(self._cached_examples, list):
+        if rng is None:
+            cached_examples = self._get_cached_examples(variation_name)
             if (
-                len(self._cached_examples) > 0
-                and uniform(0, 1) <= \
-                float(len(self._cached_examples)) / float(max_nb_possibilities)
+                cached_examples
+                and get_stream().uniform(0, 1) <= \
+                float(len(cached_examples)) / float(max_nb_possibilities)
             ):
-                return random_choice(deepcopy(self._cached_examples))
-        else:
-            pass  # TODO dict case for unit definitions with variations
+                return get_stream().choice(cached_examples)
 
         if variation_name is not None:
             basic_example = \
-                self._generate_random_strategy(variation_name=variation_name)
+                self._generate_random_strategy(
+                    variation_name=variation_name, rng=rng
+                )
         else:
-            basic_example = self._generate_random_strategy()
+            basic_example = self._generate_random_strategy(rng=rng)
         if self._leading_space:
-            basic_example.prepend(' ')
-        return self._apply_modifiers(basic_example)
+            basic_example = basic_example.prepend(' ')
+        return self._apply_modifiers(basic_example, rng)
+
+
+    def generate_random_batch(self, nb_examples, **kwargs):
+        """
+        Overriding to parse the arguments and look up the modifiers
+        once for all the examples when a random stream `rng` is given.
+        """
+        rng = kwargs.get("rng", None)
+        if rng is None or kwargs.get("randgen_mapping", None) is not None:
+            return \
+                super(ModifiableItem, self).generate_random_batch(
+                    nb_examples, **kwargs
+                )
+        strategy_kwargs = {"rng": rng}
+        if kwargs.get("variation_name", None) is not None:
+            strategy_kwargs["variation_name"] = kwargs["variation_name"]
+        generate_basic_example = self._generate_random_strategy
+        has_randgen = bool(self._modifiers_repr.randgen)
+        has_post_modifiers = (
+            bool(self._modifiers_repr.casegen)
+            or self._modifiers_repr.argument_value is not None
+        )
+        examples = []
+        for _ in range(nb_examples):
+            if has_randgen and not self._should_generate(None, rng):
+                examples.append(self._make_empty_example())
+                continue
+            example = generate_basic_example(**strategy_kwargs)
+            if self._leading_space:
+                example = example.prepend(' ')
+            if has_post_modifiers:
+                example = self._apply_modifiers(example, rng)
+            examples.append(example)
+        return examples
 
 
     # TODO this is quite hacky to avoid code duplication in subclasses (and not use the decorator pattern to avoid having too many objects)
     def generate_all(self, **kwargs):
-        """Overriding."""
-        if len(self._cached_examples) < self.get_max_nb_possibilities():
-            basic_examples = self._generate_all_strategy(**kwargs)
-            if self._leading_space:
-                for ex in basic_examples:
-                    ex.prepend(' ')
-            all_examples = self._apply_modifiers_to_all(basic_examples)
-            if self.get_max_cache_size() > 0:
-                self._cached_examples = deepcopy(all_examples)
-            return all_examples
-        return deepcopy(self._cached_examples)
+        """
+        Overriding.
+        `kwargs` can contain `variation_name`.
+        """
+        variation_name = kwargs.get("variation_name", None)
+        cached_examples = self._get_cached_examples(variation_name)
+        if cached_examples is not None:
+            return cached_examples[:]
+        basic_examples = self._generate_all_strategy(**kwargs)
+        if self._leading_space:
+            basic_examples = [ex.prepend(' ') for ex in basic_examples]
+        all_examples = self._apply_modifiers_to_all(basic_examples)
+        self._cache_examples(all_examples[:], variation_name)
+        return all_examples
+
+
+    def iter_all(self, **kwargs):
+        """
+        Overriding.
+        `kwargs` can contain `variation_name`.
+        """
+        cached_examples = \
+            self._get_cached_examples(kwargs.get("variation_name", None))
+        if cached_examples is not None:
+            return iter(cached_examples)
+        return \
+            self._iter_modifiers_to_all(
+                super(ModifiableItem, self).iter_all(**kwargs)
+            )
+
+
+    def generate_at(self, index, **kwargs):
+        """
+        Overriding.
+        The indices of the examples modified by the random generation
+        modifier start at 1, index 0 corresponding to the empty example.
+        With a case generation modifier, the parity of the index tells
+        whether the leading letter is lowercase or uppercase.
+        `kwargs` can contain the random name mapping `randgen_mapping` or
+        `variation_name`.
+        """
+        variation_name = kwargs.get("variation_name", None)
+        if variation_name is not None:
+            max_nb_possibilities = \
+                self.get_max_nb_possibilities(variation_name=variation_name)
+        else:
+            max_nb_possibilities = self.get_max_nb_possibilities()
+        self._check_index(index, max_nb_possibilities)
+
+        if self._modifiers_repr.randgen:
+            if not randgen.decide_generation(
+                self._modifiers_repr.randgen.name, index != 0,
+                self._modifiers_repr.randgen.opposite,
+                kwargs.get("randgen_mapping", None)
+            ):
+                return None
+            if index == 0:
+                return self._make_empty_example()
+            index -= 1
+        if self._modifiers_repr.casegen:
+            leading_upper = (index % 2 == 1)
+            index //= 2
+
+        if variation_name is not None:
+            basic_example = \
+                self._generate_at_strategy(index, variation_name=variation_name)
+        else:
+            basic_example = self._generate_at_strategy(index)
+        if basic_example is None:
+            return None
+        if self._leading_space:
+            basic_example = basic_example.prepend(' ')
+
+        if self._modifiers_repr.casegen:
+            if leading_upper:
+                basic_example = casegen.with_leading_upper(basic_example)
+            else:
+                basic_example = casegen.with_leading_lower(basic_example)
+        if self._modifiers_repr.argument_value is not None:
+            basic_example = \
+                argument.modify_example(
+                    basic_example, self._modifiers_repr.argument_value
+                )
+        return basic_example
+
+    def _iter_matches(self, text, start_index, **kwargs):
+        """
+        Overriding to take the modifiers into account.
+        As the case generation modifier makes it ambiguous which index
+        a match corresponds to, the matches are checked
+        by generating the corresponding examples.
+        """
+        variation_name = kwargs.get("variation_name", None)
+        optional_leading_space = kwargs.get("optional_leading_space", False)
+        arg_mappings = kwargs.get("arg_mappings") or []
+
+        index_offset = 0
+        if self._modifiers_repr.randgen:
+            yield (0, start_index)
+            index_offset = 1
+
+        strategy_start_index = start_index
+        if self._leading_space:
+            if text.startswith(' ', start_index):
+                strategy_start_index += 1
+            elif not optional_leading_space:
+                return
+            optional_leading_space = False
+
+        strategy_arg_mappings = arg_mappings
+        if isinstance(self._modifiers_repr.argument_value, dict):
+            strategy_arg_mappings = \
+                [self._modifiers_repr.argument_value] + arg_mappings
+
+        strategy_kwargs = {
+            "optional_leading_space": optional_leading_space,
+            "arg_mappings": strategy_arg_mappings,
+        }
+        if variation_name is not None:
+            strategy_kwargs["variation_name"] = variation_name
+        for (index, end_index) in self._iter_matches_strategy(
+            text, strategy_start_index, **strategy_kwargs
+        ):
+            if not self._modifiers_repr.casegen:
+                yield (index + index_offset, end_index)
+                continue
+            matched_text = text[start_index:end_index]
+            for casegen_index in (2 * index, 2 * index + 1):
+                candidate = \
+                    self.generate_at(
+                        casegen_index + index_offset,
+                        variation_name=variation_name
+                    )
+                if candidate is None:
+                    continue
+                candidate_text = candidate.text
+                for arg_mapping in arg_mappings:
+                    candidate_text = \
+                        argument.modify_text(candidate_text, arg_mapping)
+                if (
+                    candidate_text == matched_text
+                    or (
+                        kwargs.get("optional_leading_space", False)
+                        and candidate_text[:1] == ' '
+                        and candidate_text[1:] == matched_text
+                    )
+                ):
+                    yield (casegen_index + index_offset, end_index)
 
 
     def _modify_nb_possibilities(self, nb_possibilities):
@@ -124,7 +296,19 @@ class ModifiableItem(GeneratingItem):
         return nb_possibilities
 
 
-    def _should_generate(self, randgen_mapping):
+    def _modify_possibility_count(self, count):
+        """
+        Returns the count of different examples (as a `PossibilityCount`)
+        after application of the modifiers, given the count `count` before
+        their application.
+        The count is only known to be exact if the modifiers don't change it
+        (the examples added by the case generation and random generation
+        modifiers might be duplicates).
+        """
+        value = self._modify_nb_possibilities(count.value)
+        return PossibilityCount(value, count.exact and value == count.value)
+
+    def _should_generate(self, randgen_mapping, rng=None):
         """
         Returns `True` iff the current object should generate one example
         given its pre-modifiers (namely, the case generation modifier).
@@ -137,18 +321,18 @@ class ModifiableItem(GeneratingItem):
                     self._modifiers_repr.randgen.name,
                     self._modifiers_repr.randgen.percentage,
                     self._modifiers_repr.randgen.opposite,
-                    randgen_mapping
+                    randgen_mapping, rng
                 )
         return True
 
 
-    def _apply_modifiers(self, example):
+    def _apply_modifiers(self, example, rng=None):
         """
         Returns the modified `example`
         after its post-modifiers have been applied.
         """
         if self._modifiers_repr.casegen:
-            example = casegen.modify_example(example)
+            example = casegen.modify_example(example, rng)
         if self._modifiers_repr.argument_value is not None:
             example = \
                 argument.modify_example(
@@ -179,6 +363,28 @@ class ModifiableItem(GeneratingItem):
         return examples
 
 
+    def _iter_modifiers_to_all(self, examples):
+        """
+        Lazy version of `_apply_modifiers_to_all`, applying the post-modifiers
+        to the iterable of examples `examples`.
+        """
+        if self._modifiers_repr.casegen:
+            examples = casegen.iter_all_possibilities(examples)
+        if self._modifiers_repr.argument_value is not None:
+            examples = \
+                argument.iter_all_possibilities(
+                    examples, self._modifiers_repr.argument_value
+                )
+        if self._modifiers_repr.randgen:
+            examples = \
+                randgen.iter_all_possibilities(
+                    examples, self._make_empty_example(),
+                    self._modifiers_repr.randgen.name,
+                    self._modifiers_repr.randgen.opposite
+                )
+        return examples
+
+
     def set_arg_name(self, new_arg_name):
         """
         Changes the name of the argument modifier and uncaches everything.
@@ -4,10 +4,12 @@ Module `chatette.units.modifiable.choice`
 Contains the class that represents choices (and old word groups).
 """
 
-from random import choice
+from chatette.random_stream import get_stream
+from chatette.sampling import make_rule_table
+from chatette.configuration import Configuration
 
 from chatette.units.modifiable import ModifiableItem
-from chatette.units import extend_no_dup
+from chatette.units import ExampleSet, sum_possibility_counts
 
 from chatette.parsing.utils import CHOICE_START, CHOICE_END, CHOICE_SEP
 from chatette.parsing import utils as putils
@@ -22,6 +24,8 @@ class Choice(ModifiableItem):
         self._rules = []
         if rules is not None:
             self._rules.extend(rules)
+        # Alias tables the rules are drawn from (cf. `get_rule_table`)
+        self._rule_tables = dict()
 
     def _compute_full_name(self):
         return "choice"
@@ -32,45 +36,107 @@ class Choice(ModifiableItem):
             acc += rule.get_max_nb_possibilities()
         return acc
 
+    def iter_references(self):
+        for rule in self._rules:
+            for reference in rule.iter_references():
+                yield reference
+
+    def _count_possibilities_strategy(self, **kwargs):
+        return \
+            self._modify_possibility_count(
+                sum_possibility_counts(
+                    rule.count_possibilities() for rule in self._rules
+                )
+            )
+
     def add_rule(self, rule):
         """Adds the rule `rule` to the list of rules."""
         self._rules.append(rule)
+        self._rule_tables = dict()
     def add_rules(self, rules):
         """Adds each of the rules `rule` to the list of rules."""
         self._rules.extend(rules)
+        self._rule_tables = dict()
 
     def remove_rule(self, index):
         """Removes the rule at `index`th rule."""
         if index < 0 or index >= len(self._rules):
             raise ValueError("Tried to remove rule at invalid index.")
         del self._rules[index]
+        self._rule_tables = dict()
 
-    def _choose_rule(self):
+    def get_rule_table(self):
         """
-        Returns a rule at random from the list of rules for this definition.
+        Returns the alias table the rules are drawn from when generating
+        random examples, which weights them by their weights and,
+        if `Configuration.weighted_rule_sampling` is enabled, by their numbers
+        of possibilities (cf. `make_rule_table`), or `None` if they are drawn
+        uniformly.
+        """
+        by_nb_possibilities = \
+            Configuration.get_or_create().weighted_rule_sampling
+        if by_nb_possibilities not in self._rule_tables:
+            self._rule_tables[by_nb_possibilities] = \
+                make_rule_table(self._rules, by_nb_possibilities)
+        return self._rule_tables[by_nb_possibilities]
+
+    def has_rule_weights(self, **kwargs):
+        return any(
+            rule.weight != 1 or rule.has_rule_weights() for rule in self._rules
+        )
+
+    def _choose_rule(self, rng=None):
+        """
+        Returns a rule at random (drawn from the random stream `rng`)
+        from the list of rules for this definition.
         Returns `None` if there are no rules.
         """
         if len(self._rules) == 0:
             return None
-        return choice(self._rules)
+        table = self.get_rule_table()
+        if table is None:
+            return get_stream(rng).choice(self._rules)
+        return self._rules[table.draw(rng)]
 
-    def _generate_random_strategy(self):
-        rule = self._choose_rule()
+    def _generate_random_strategy(self, rng=None):
+        rule = self._choose_rule(rng)
         if rule is None:
             raise SyntaxError(
                 self.full_name.capitalize() + " does not have any rule to " + \
                 "generate."
             )
 
-        return rule.generate_random()
+        return rule.generate_random(rng=rng)
+
+    def _generate_at_strategy(self, index, **kwargs):
+        for rule in self._rules:
+            nb_possibilities = rule.get_max_nb_possibilities()
+            if index < nb_possibilities:
+                return rule.generate_at(index)
+            index -= nb_possibilities
+        raise IndexError(  # Should never happen
+            "Tried to generate an example at an invalid index for " + \
+            self.full_name + "."
+        )
+
+    def _iter_matches_strategy(self, text, start_index, **kwargs):
+        index_offset = 0
+        for rule in self._rules:
+            for (index, end_index) in rule._iter_matches(
+                text, start_index, **kwargs
+            ):
+                yield (index + index_offset, end_index)
+            index_offset += rule.get_max_nb_possibilities()
 
     def _generate_all_strategy(self):
-        generated_examples = []
+        generated_examples = ExampleSet()
+        for rule in self._rules:
+            generated_examples.extend(rule.generate_all())
+        return generated_examples.to_sorted_list()
+    def _iter_all_strategy(self, **kwargs):
         for rule in self._rules:
-            current_examples = rule.generate_all()
-            generated_examples = \
-                extend_no_dup(generated_examples, current_examples)
-        return generated_examples
+            for ex in rule.iter_all():
+                yield ex
 
     def as_template_str(self):
         result = CHOICE_START
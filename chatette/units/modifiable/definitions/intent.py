@@ -4,10 +4,12 @@ Module `chatette.units.modifiable.definitions.intent`
 Contains the class representing an intent definition.
 """
 
-from random import shuffle
-
 from chatette.utils import UnitType
-from chatette.units import IntentExample, add_example_no_dup
+from chatette.configuration import Configuration
+from chatette.sampling import IndexPermutation
+from chatette.units import \
+    IntentExample, ExampleSet, iter_no_dup, index_examples
+from chatette.units.external_set import iter_sorted_no_dup
 from chatette.units.modifiable.definitions.unit_definition import \
     UnitDefinition
 
@@ -53,10 +55,20 @@ class IntentDefinition(UnitDefinition):
         return IntentExample.from_example(example, self._name)
 
 
-    def _generate_random_strategy(self, variation_name=None):
+    def _generate_random_strategy(self, variation_name=None, rng=None):
         example = \
             super(IntentDefinition, self) \
-                ._generate_random_strategy(variation_name=variation_name)
+                ._generate_random_strategy(
+                    variation_name=variation_name, rng=rng
+                )
+        return self._example_to_intent_example(example)
+
+    def _generate_at_strategy(self, index, variation_name=None):
+        example = \
+            super(IntentDefinition, self) \
+                ._generate_at_strategy(index, variation_name=variation_name)
+        if example is None:
+            return None
         return self._example_to_intent_example(example)
 
     def _generate_all_strategy(self, variation_name=None):
@@ -65,54 +77,98 @@ class IntentDefinition(UnitDefinition):
                 ._generate_all_strategy(variation_name=variation_name)
         return [self._example_to_intent_example(ex) for ex in examples]
 
+    def _iter_all_strategy(self, variation_name=None):
+        for ex in super(IntentDefinition, self)._iter_all_strategy(
+            variation_name=variation_name
+        ):
+            yield self._example_to_intent_example(ex)
+
 
-    def generate_train(self):
+    def generate_train(self, rng=None):
         """
         Returns a list of examples to make up the training set.
+        The examples are drawn from the stream of this intent derived from
+        the random stream `rng` (cf. `get_random_stream`).
         The list has as many examples as were asked in teh templates.
+        If all the examples were asked and they are too numerous
+        (cf. `Configuration.streaming_threshold`), returns an iterator that
+        generates them lazily instead (without sorting them, and keeping
+        the first example generated for each text), or that sorts them
+        using temporary files if the number of examples deduplicated in
+        memory is limited (cf. `Configuration.dedup_max_nb_examples`).
         """
         if self._nb_training_ex_asked is None:
+            config = Configuration.get_or_create()
+            if self.get_max_nb_possibilities() > config.streaming_threshold:
+                if config.dedup_max_nb_examples is not None:
+                    return \
+                        iter_sorted_no_dup(
+                            self.iter_all(), config.dedup_max_nb_examples
+                        )
+                return iter_no_dup(self.iter_all())
             return self.generate_all()
         if self._nb_training_ex_asked == 0:
             return []
-        return self.generate_nb_possibilities(self._nb_training_ex_asked)
+        return \
+            self.generate_nb_possibilities(self._nb_training_ex_asked, rng=rng)
 
-    def generate_test(self, training_examples):
+    def generate_test(self, training_examples, rng=None):
         """
         Returns a list of examples that can be put in the test set
         (not present in the training set).
         The list has as many examples as were asked in the templates.
+        The examples are drawn from the stream of this intent derived from
+        the random stream `rng` (cf. `get_random_stream`).
+        `training_examples` can be any iterable of examples: it is indexed
+        in a set (cf. `index_examples`) unless it already is one.
+        If some rules have weights (cf. `has_rule_weights`), examples are
+        first generated at random, so that the examples of each rule are
+        drawn as often as its weight says, until enough of them were
+        generated or 10 times as many examples as asked were drawn
+        (cf. `_generate_n_weighted_strategy`).
         """
         if self._nb_testing_ex_asked is None or self._nb_testing_ex_asked == 0:
             return []
+        training_examples = index_examples(training_examples)
+        test_examples = ExampleSet()
+        if self.has_rule_weights():
+            for _ in range(10 * self._nb_testing_ex_asked):
+                current_ex = self.generate_random(rng=rng)
+                if current_ex in training_examples:
+                    continue
+                test_examples.add(current_ex)
+
+                if len(test_examples) == self._nb_testing_ex_asked:
+                    return test_examples.to_sorted_list()
         if (
             self._nb_testing_ex_asked < \
-            float(self.get_max_nb_possibilities()) / 5.0
+            float(self.count_possibilities().value) / 5.0
         ):
-            test_examples = []
-            loop_count = 0
-            while len(test_examples) < self._nb_testing_ex_asked:
-                loop_count += 1
-                current_ex = self.generate_random()
-                if current_ex in training_examples:
+            permutation = \
+                IndexPermutation(
+                    self.get_max_nb_possibilities(),
+                    self.get_random_stream(rng)
+                )
+            for index in permutation:
+                current_ex = self.generate_at(index)
+                if current_ex is None or current_ex in training_examples:
                     continue
-                add_example_no_dup(test_examples, current_ex)
+                test_examples.add(current_ex)
 
-                if loop_count > 10*self._nb_testing_ex_asked:
+                if len(test_examples) == self._nb_testing_ex_asked:
                     break
-            return test_examples
+            return test_examples.to_sorted_list()
         else:
-            test_examples = []
             all_examples = self.generate_all()
-            shuffle(all_examples)
+            self.get_random_stream(rng).shuffle(all_examples)
             for ex in all_examples:
                 if ex in training_examples:
                     continue
-                add_example_no_dup(test_examples, ex)
+                test_examples.add(ex)
 
                 if len(test_examples) == self._nb_testing_ex_asked:
                     break
-            return test_examples
+            return test_examples.to_sorted_list()
 
 
     def as_template_str(self):
@@ -6,6 +6,7 @@ Contains the class representing a slot definition.
 
 from chatette.utils import UnitType, append_to_list_in_dict, extend_list_in_dict
 from chatette.units import Entity
+from chatette.units.slot_value_table import SlotValueTable
 from chatette.units.modifiable.definitions.unit_definition import \
     UnitDefinition
 
@@ -26,44 +27,62 @@ class SlotDefinition(UnitDefinition):
         pass
 
 
-    def _generate_random_strategy(self, variation_name=None):
+    def _generate_random_strategy(self, variation_name=None, rng=None):
         generated_example = \
             super(SlotDefinition, self)._generate_random_strategy(
-                variation_name=variation_name
+                variation_name=variation_name, rng=rng
             )
+        return self._add_entity(generated_example)
 
-        slot_value = generated_example._slot_value
-        if slot_value is None:
-            slot_value = generated_example.text
-        generated_example.entities.append(
-            Entity(self._name, len(generated_example.text), slot_value)
-        )
-        generated_example._slot_value = None
-
-        return generated_example
+    def _generate_at_strategy(self, index, variation_name=None):
+        generated_example = \
+            super(SlotDefinition, self)._generate_at_strategy(
+                index, variation_name=variation_name
+            )
+        if generated_example is None:
+            return None
+        return self._add_entity(generated_example)
 
     def _generate_all_strategy(self, variation_name=None):
         generated_examples = \
             super(SlotDefinition, self)._generate_all_strategy(
                 variation_name=variation_name
             )
+        return [self._add_entity(ex) for ex in generated_examples]
 
-        for ex in generated_examples:
-            slot_value = ex._slot_value
-            if slot_value is None:
-                slot_value = ex.text
-            ex.entities.append(
-                Entity(self._name, len(ex.text), slot_value)
-            )
-            ex._slot_value = None
+    def _iter_all_strategy(self, variation_name=None):
+        for ex in super(SlotDefinition, self)._iter_all_strategy(
+            variation_name=variation_name
+        ):
+            yield self._add_entity(ex)
 
-        return generated_examples
+    def _add_entity(self, example):
+        """
+        Returns a copy of `example` with the entity corresponding to this
+        slot added, using the slot value it was given if any.
+        """
+        slot_value = example._slot_value
+        if slot_value is None:
+            slot_value = example.text
+        return example._replace(
+            entities=(
+                example.entities + \
+                (Entity(self._name, len(example.text), slot_value),)
+            ),
+            _slot_value=None
+        )
 
 
     def get_synonyms_dict(self):
         if self._synonyms is None:
             self._synonyms = dict()
             for rule in self._all_rules:
+                if isinstance(rule, SlotValueTable):
+                    for (text, slot_value) in rule.iter_rows():
+                        if slot_value is None:
+                            slot_value = text
+                        append_to_list_in_dict(self._synonyms, slot_value, text)
+                    continue
                 texts = [ex.text for ex in rule.generate_all()]
                 if rule.slot_value is None:
                     for text in texts:
@@ -4,12 +4,17 @@ Module `chatette.units.modifiable.definitions.unit_definition`
 Contains the abstract class that is base for all unit definitions.
 """
 
-from random import choice
-from copy import deepcopy
+from hashlib import sha256
 
+import chatette
 from chatette.utils import UnitType
 from chatette.units.modifiable import ModifiableItem
-from chatette.units import extend_no_dup
+from chatette.units import ExampleSet, sum_possibility_counts
+from chatette.random_stream import get_stream
+from chatette.sampling import make_rule_table
+from chatette.configuration import Configuration
+from chatette.caching import disk_cache
+from chatette.caching.example_cache import ExampleCache
 
 from chatette.parsing.utils import SLOT_VAL_FIRST_RULE
 from chatette.parsing import utils as putils
@@ -20,6 +25,10 @@ from chatette.statistics import Stats
 class UnitDefinition(ModifiableItem):
     """Abstract class base for all unit definitions."""
     unit_type = None
+    # Number of times the content of any definition changed, as the content
+    # hashes of definitions embed those of the definitions they reference
+    # (cf. `get_content_hash`)
+    _nb_content_changes = 0
     def __init__(self, identifier, modifiers):
         super(UnitDefinition, self).__init__(
             identifier, False, modifiers  # NOTE `False` corresponds to `leading_space`
@@ -27,6 +36,16 @@ class UnitDefinition(ModifiableItem):
         self.identifier = identifier
         self._all_rules = []
         self._variation_rules = dict()
+        self._content_hashes = dict()
+        # Value of `_nb_content_changes` when `_content_hashes` was emptied
+        self._content_hashes_version = UnitDefinition._nb_content_changes
+        self.declaration_files = []
+        # Alias tables the rules of each variation are drawn from
+        # (cf. `get_rule_table`)
+        self._rule_tables = dict()
+        # Whether each variation contains weighted rules
+        # (cf. `has_rule_weights`)
+        self._has_rule_weights = dict()
 
 
     def __contains__(self, variation_name):
@@ -47,6 +66,28 @@ class UnitDefinition(ModifiableItem):
         self._name = new_identifier
         self.full_name = self._compute_full_name()
 
+    def add_declaration_file(self, file_path):
+        """
+        Records that (a variation of) this unit is declared in the template
+        file at `file_path`.
+        """
+        if file_path is not None and file_path not in self.declaration_files:
+            self.declaration_files.append(file_path)
+
+
+    def get_max_nb_possibilities(self, variation_name=None):
+        """
+        Overriding to cache the number of possibilities of each variation
+        separately.
+        """
+        if not isinstance(self._total_nb_possibilities, dict):
+            self._total_nb_possibilities = dict()
+        if variation_name not in self._total_nb_possibilities:
+            basic_nb_possibilities = \
+                self._compute_nb_possibilities(variation_name=variation_name)
+            self._total_nb_possibilities[variation_name] = \
+                self._modify_nb_possibilities(basic_nb_possibilities)
+        return self._total_nb_possibilities[variation_name]
 
     def _compute_nb_possibilities(self, variation_name=None):
         if variation_name is None:
@@ -65,6 +106,15 @@ class UnitDefinition(ModifiableItem):
             acc += rule.get_max_nb_possibilities()
         return acc
 
+    def _count_possibilities_strategy(self, variation_name=None):
+        return \
+            self._modify_possibility_count(
+                sum_possibility_counts(
+                    rule.count_possibilities()
+                    for rule in self._get_relevant_rules(variation_name)
+                )
+            )
+
 
     def _check_rule_validity(self, rule):
         """Raises a `ValueError` if the rule `rule` is not valid."""
@@ -87,6 +137,7 @@ class UnitDefinition(ModifiableItem):
         else:
             self._variation_rules[variation_name] = [rule]
         self._all_rules.append(rule)
+        self._reset_rule_caches()
     def add_all_rules(self, rules, variation_name=None):
         """
         Adds each of the rules `rule` to the list of rules.
@@ -102,6 +153,7 @@ class UnitDefinition(ModifiableItem):
         else:
             self._variation_rules[variation_name] = rules
         self._all_rules.extend(rules)
+        self._reset_rule_caches()
 
     def _recompute_all_rules(self):
         """
@@ -112,6 +164,7 @@ class UnitDefinition(ModifiableItem):
         for rules in self._variation_rules:
             all_rules.extend(rules)
         self._all_rules = all_rules
+        self._reset_rule_caches()
 
     def remove_rule(self, index, variation_name=None):
         """Removes the rule at `index`th rule."""
@@ -119,26 +172,68 @@ class UnitDefinition(ModifiableItem):
         if index < 0 or index >= len(self._all_rules):
             raise ValueError("Tried to remove rule at invalid index.")
         del self._all_rules[index]
+        self._reset_rule_caches()
+
+    def _reset_rule_caches(self):
+        """
+        Resets everything that was computed from the rules of this
+        definition, after they changed.
+        """
+        self._rule_tables = dict()
+        self._has_rule_weights = dict()
+        self._reset_caches()
 
 
-    def _choose_rule(self, variation_name=None):
+    def get_rule_table(self, variation_name=None):
+        """
+        Returns the alias table the rules of variation `variation_name` are
+        drawn from when generating random examples, which weights them by
+        their weights and, if `Configuration.weighted_rule_sampling` is
+        enabled, by their numbers of possibilities (cf. `make_rule_table`),
+        or `None` if they are drawn uniformly.
+        @pre: `variation_name` is `None` or was declared for this unit.
         """
-        Returns a rule at random from the list of rules for this definition.
+        by_nb_possibilities = \
+            Configuration.get_or_create().weighted_rule_sampling
+        key = (variation_name, by_nb_possibilities)
+        if key not in self._rule_tables:
+            if variation_name is None:
+                rules = self._all_rules
+            else:
+                rules = self._variation_rules[variation_name]
+            self._rule_tables[key] = \
+                make_rule_table(rules, by_nb_possibilities)
+        return self._rule_tables[key]
+
+    def has_rule_weights(self, variation_name=None):
+        if variation_name not in self._has_rule_weights:
+            self._has_rule_weights[variation_name] = any(
+                rule.weight != 1 or rule.has_rule_weights()
+                for rule in self._get_relevant_rules(variation_name)
+            )
+        return self._has_rule_weights[variation_name]
+
+    def _choose_rule(self, variation_name=None, rng=None):
+        """
+        Returns a rule at random (drawn from the random stream `rng`)
+        from the list of rules for this definition.
         Returns `None` if there are no rules.
         If `variation_name` is not `None`, the rule chosen should come
         from the corresponding variation (if it exists).
         """
+        rng = get_stream(rng)
         if variation_name is None:
-            if len(self._all_rules) == 0:
-                return None
-            return choice(self._all_rules)
+            rules = self._all_rules
+        elif variation_name in self._variation_rules:
+            rules = self._variation_rules[variation_name]
         else:
-            if (
-                variation_name not in self._variation_rules
-                or len(self._variation_rules[variation_name]) == 0
-            ):
-                return None
-            return choice(self._variation_rules[variation_name])
+            return None
+        if len(rules) == 0:
+            return None
+        table = self.get_rule_table(variation_name)
+        if table is None:
+            return rng.choice(rules)
+        return rules[table.draw(rng)]
 
 
     def has_variation(self, variation_name):
@@ -163,8 +258,56 @@ class UnitDefinition(ModifiableItem):
         self._recompute_all_rules()
 
 
-    def _generate_random_strategy(self, variation_name=None):
-        rule = self._choose_rule(variation_name)
+    def get_random_stream(self, rng=None, variation_name=None):
+        """
+        Returns the random stream this definition draws from when generating
+        examples of variation `variation_name`, derived from the stream
+        `rng` of the item referencing it (cf. `RandomStream.child`).
+        """
+        return \
+            get_stream(rng).child(
+                self.unit_type.value, self._name, variation_name
+            )
+
+    def generate_random(self, **kwargs):
+        """
+        Overriding to draw from the random stream of this definition.
+        The global random state is used if `kwargs` contains no stream `rng`.
+        """
+        if kwargs.get("rng", None) is not None:
+            kwargs["rng"] = \
+                self.get_random_stream(
+                    kwargs["rng"], kwargs.get("variation_name", None)
+                )
+        return super(UnitDefinition, self).generate_random(**kwargs)
+
+    def generate_random_batch(self, nb_examples, **kwargs):
+        """Overriding to draw from the random stream of this definition."""
+        if kwargs.get("rng", None) is not None:
+            kwargs["rng"] = \
+                self.get_random_stream(
+                    kwargs["rng"], kwargs.get("variation_name", None)
+                )
+        return \
+            super(UnitDefinition, self).generate_random_batch(
+                nb_examples, **kwargs
+            )
+
+    def generate_nb_possibilities(self, nb_possibilities, **kwargs):
+        """Overriding to draw from the random stream of this definition."""
+        if kwargs.get("rng", None) is not None:
+            kwargs["rng"] = \
+                self.get_random_stream(
+                    kwargs["rng"], kwargs.get("variation_name", None)
+                )
+        return \
+            super(UnitDefinition, self).generate_nb_possibilities(
+                nb_possibilities, **kwargs
+            )
+
+
+    def _generate_random_strategy(self, variation_name=None, rng=None):
+        rule = self._choose_rule(variation_name, rng)
         if rule is None:
             if variation_name is None:
                 raise SyntaxError(
@@ -177,76 +320,199 @@ class UnitDefinition(ModifiableItem):
                     "associated to variation '" + str(variation_name) + "'."
                 )
 
-        example = rule.generate_random()
-        example.remove_leading_space()
+        example = rule.generate_random(rng=rng).remove_leading_space()
         if self.unit_type == UnitType.slot:
-            example._slot_value = rule.slot_value
-            if (
-                example._slot_value is not None
-                and example._slot_value.strip() == SLOT_VAL_FIRST_RULE
-            ):
-                if len(rule._contents) == 0:
-                    raise SyntaxError(
-                        "The slot value given for one of the rules of " + \
-                        self.full_name + " references the first token of " + \
-                        "an empty rule."
-                    )
-                example._slot_value = rule._contents[0]._name
+            example = self._with_slot_value(example, rule)
         return example
 
+    def _get_slot_value(self, rule):
+        """
+        Returns the slot value that the examples generated by the rule `rule`
+        should have (in case this definition is a slot definition).
+        @raises: - `SyntaxError` if the slot value references the first token
+                   of an empty rule.
+        """
+        slot_value = rule.slot_value
+        if (
+            slot_value is not None
+            and slot_value.strip() == SLOT_VAL_FIRST_RULE
+        ):
+            if len(rule._contents) == 0:
+                raise SyntaxError(
+                    "The slot value given for one of the rules of " + \
+                    self.full_name + " references the first token of " + \
+                    "an empty rule."
+                )
+            slot_value = rule._contents[0]._name
+        return slot_value
 
-    def generate_all(self, variation_name=None):
-        """Overriding to prevent caching of examples for just one variation."""
-        if not self._variation_rules:
-            return super(UnitDefinition, self).generate_all()
-
-        if isinstance(self._cached_examples, list):
-            self._cached_examples = dict()
-        if variation_name not in self._cached_examples:
-            basic_examples = \
-                self._generate_all_strategy(variation_name=variation_name)
-            if self._leading_space:
-                for ex in basic_examples:
-                    ex.prepend(' ')
-            self._cached_examples[variation_name] = \
-                self._apply_modifiers_to_all(basic_examples)
-        return deepcopy(self._cached_examples[variation_name])
+    def _with_slot_value(self, example, rule):
+        """
+        Returns the example `example` generated by the rule `rule` with
+        the slot value it should have (in case this definition is
+        a slot definition). Examples of rules without slot value keep
+        the slot value they were generated with, if any
+        (cf. `chatette.units.slot_value_table`).
+        """
+        slot_value = self._get_slot_value(rule)
+        if slot_value is None:
+            return example
+        return example.with_slot_value(slot_value)
 
 
-    def _generate_all_strategy(self, variation_name=None):
-        if variation_name is None:
-            relevant_rules = self._all_rules
-        elif variation_name in self._variation_rules:
-            relevant_rules = self._variation_rules[variation_name]
+    def _generate_at_strategy(self, index, variation_name=None):
+        for rule in self._get_relevant_rules(variation_name):
+            nb_possibilities = rule.get_max_nb_possibilities()
+            if index < nb_possibilities:
+                break
+            index -= nb_possibilities
         else:
-            raise SyntaxError(
-                "Tried to generate examples for variation '" + \
-                str(variation_name) + "' of " + self.full_name + \
-                ", but this variation has no rules associated to it."
+            raise IndexError(  # Should never happen
+                "Tried to generate an example at an invalid index for " + \
+                self.full_name + "."
             )
 
-        generated_examples = []
+        example = rule.generate_at(index)
+        if example is None:
+            return None
+        example = example.remove_leading_space()
+        if self.unit_type == UnitType.slot:
+            example = self._with_slot_value(example, rule)
+        return example
+
+    def _iter_matches_strategy(self, text, start_index, **kwargs):
+        """
+        The leading space of the rules is always optional, as it is removed
+        when generating examples.
+        """
+        relevant_rules = \
+            self._get_relevant_rules(kwargs.get("variation_name", None))
+        index_offset = 0
         for rule in relevant_rules:
-            current_examples = rule.generate_all()
-            if self.unit_type == UnitType.slot:
-                for ex in current_examples:
-                    ex._slot_value = rule.slot_value
-                    if (
-                        ex._slot_value is not None
-                        and ex._slot_value.strip() == SLOT_VAL_FIRST_RULE
-                    ):
-                        if len(rule._contents) == 0:
-                            raise SyntaxError(
-                                "The slot value given for one of the rules " + \
-                                "of " + self.full_name + \
-                                " references the first token of an empty rule."
-                            )
-                        ex._slot_value = rule._contents[0]._name
-            for ex in current_examples:
-                ex.remove_leading_space()
-            generated_examples = \
-                extend_no_dup(generated_examples, current_examples)
-        return generated_examples
+            for (index, end_index) in rule._iter_matches(
+                text, start_index, optional_leading_space=True,
+                arg_mappings=kwargs.get("arg_mappings")
+            ):
+                yield (index + index_offset, end_index)
+            index_offset += rule.get_max_nb_possibilities()
+
+    def _get_relevant_rules(self, variation_name=None):
+        """
+        Returns the rules of the variation `variation_name`
+        (or all the rules if `variation_name` is `None`).
+        @raises: - `SyntaxError` if the variation has no rules.
+        """
+        if variation_name is None:
+            return self._all_rules
+        if variation_name in self._variation_rules:
+            return self._variation_rules[variation_name]
+        raise SyntaxError(
+            "Tried to generate examples for variation '" + \
+            str(variation_name) + "' of " + self.full_name + \
+            ", but this variation has no rules associated to it."
+        )
+
+
+    def generate_all(self, variation_name=None):
+        """
+        Overriding to load the examples from the disk cache if they were
+        stored there by a previous run, and store them there otherwise
+        (cf. `chatette.caching.disk_cache`).
+        """
+        if (
+            disk_cache.get_cache_dir() is None
+            or self._get_cached_examples(variation_name) is not None
+        ):
+            return \
+                super(UnitDefinition, self).generate_all(
+                    variation_name=variation_name
+                )
+        content_hash = self.get_content_hash(variation_name)
+        examples = disk_cache.load_examples(content_hash)
+        if examples is not None:
+            self._cache_examples(examples[:], variation_name)
+            return examples
+        examples = \
+            super(UnitDefinition, self).generate_all(
+                variation_name=variation_name
+            )
+        disk_cache.store_examples(content_hash, examples)
+        return examples
+
+    def get_content_hash(self, variation_name=None):
+        """
+        Returns a hash (as an hexadecimal `str`) of this definition and of
+        the content hashes of all the definitions the rules of variation
+        `variation_name` reference. This hash thus changes whenever
+        the examples this variation generates might change.
+        """
+        if self._content_hashes_version != UnitDefinition._nb_content_changes:
+            self._content_hashes = dict()
+            self._content_hashes_version = UnitDefinition._nb_content_changes
+        if variation_name not in self._content_hashes:
+            content_hash = sha256()
+            content_hash.update(
+                (
+                    chatette.__version__ + '\n' + str(variation_name) + \
+                    '\n' + self.as_template_str()
+                ).encode("utf-8")
+            )
+            for reference in self.iter_references(variation_name):
+                definition = reference.get_definition()
+                content_hash.update(
+                    (
+                        '\n' + definition.get_content_hash(
+                            reference._modifiers_repr.variation_name
+                        )
+                    ).encode("utf-8")
+                )
+            self._content_hashes[variation_name] = content_hash.hexdigest()
+        return self._content_hashes[variation_name]
+
+    def iter_references(self, variation_name=None):
+        """
+        Overriding.
+        Yields the references contained in the rules of variation
+        `variation_name`.
+        """
+        for rule in self._get_relevant_rules(variation_name):
+            for reference in rule.iter_references():
+                yield reference
+
+    def _reset_caches(self):
+        super(UnitDefinition, self)._reset_caches()
+        # NOTE the examples and the content hashes of the definitions that
+        #      reference this one (directly or not) are reset as well
+        ExampleCache.get_or_create().remove_all(lambda key: True)
+        UnitDefinition._nb_content_changes += 1
+
+    def _generate_all_strategy(self, variation_name=None):
+        generated_examples = ExampleSet()
+        for rule in self._get_relevant_rules(variation_name):
+            generated_examples.extend(
+                self._iter_rule_examples(rule, rule.generate_all())
+            )
+        return generated_examples.to_sorted_list()
+
+    def _iter_all_strategy(self, variation_name=None):
+        for rule in self._get_relevant_rules(variation_name):
+            for ex in self._iter_rule_examples(rule, rule.iter_all()):
+                yield ex
+
+    def _iter_rule_examples(self, rule, examples):
+        """
+        Yields the examples `examples` generated by the rule `rule`,
+        without their leading space and with their slot value
+        (in case this definition is a slot definition).
+        """
+        slot_value = None
+        if self.unit_type == UnitType.slot:
+            slot_value = self._get_slot_value(rule)
+        for ex in examples:
+            ex = ex.remove_leading_space()
+            if slot_value is not None:
+                ex = ex.with_slot_value(slot_value)
+            yield ex
 
 
     def short_description(self):
@@ -56,11 +56,45 @@ class UnitReference(ModifiableItem):
                     variation_name=self._modifiers_repr.variation_name
                 )
 
-    def _generate_random_strategy(self):
+    def iter_references(self):
+        yield self
+
+    def _get_cache_key(self, variation_name=None):
+        """
+        Overriding so that the references to the same definition
+        with the same modifiers share their examples in the cache.
+        """
+        modifiers = self._modifiers_repr
+        argument_value = modifiers.argument_value
+        if isinstance(argument_value, dict):
+            argument_value = tuple(argument_value.items())
+        return (
+            self.get_definition(), modifiers.variation_name,
+            self._leading_space, modifiers.casegen, argument_value,
+            bool(modifiers.randgen), modifiers.randgen.name,
+            modifiers.randgen.opposite
+        )
+
+    def has_rule_weights(self, **kwargs):
+        return \
+            self.get_definition().has_rule_weights(
+                variation_name=self._modifiers_repr.variation_name
+            )
+
+    def _count_possibilities_strategy(self, **kwargs):
+        return \
+            self._modify_possibility_count(
+                self.get_definition().count_possibilities(
+                    variation_name=self._modifiers_repr.variation_name
+                )
+            )
+
+    def _generate_random_strategy(self, rng=None):
         return \
             self.get_definition() \
                 .generate_random(
-                    variation_name=self._modifiers_repr.variation_name
+                    variation_name=self._modifiers_repr.variation_name,
+                    rng=rng
                 )
 
     def _generate_all_strategy(self):
@@ -70,13 +104,34 @@ class UnitReference(ModifiableItem):
                     variation_name=self._modifiers_repr.variation_name
                 )
 
-    def _generate_n_strategy(self, n):
+    def _iter_all_strategy(self, **kwargs):
+        return \
+            self.get_definition() \
+                .iter_all(
+                    variation_name=self._modifiers_repr.variation_name
+                )
+
+    def _generate_at_strategy(self, index, **kwargs):
         return \
             self.get_definition() \
-                .generate_nb_possibilities(
-                    n, variation_name=self._modifiers_repr.variation_name
+                .generate_at(
+                    index, variation_name=self._modifiers_repr.variation_name
                 )
 
+    def _iter_matches(self, text, start_index, **kwargs):
+        """
+        Overriding to make sure the argument modifier was fixed
+        before looking for matches.
+        """
+        self.get_definition()
+        return \
+            super(UnitReference, self)._iter_matches(
+                text, start_index, **kwargs
+            )
+    def _iter_matches_strategy(self, text, start_index, **kwargs):
+        kwargs["variation_name"] = self._modifiers_repr.variation_name
+        return self.get_definition()._iter_matches(text, start_index, **kwargs)
+
 
     def _fix_arg_value_modifier(self):
         """
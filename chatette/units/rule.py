@@ -7,33 +7,46 @@ Contains a class representing rules
 """
 
 from chatette.units.generating_item import GeneratingItem
-from chatette.units import Example, sort_by_texts, add_example_no_dup
+from chatette.units import \
+    Example, ExampleSet, PossibilityCount, sort_by_texts
 from chatette.modifiers.randgen import \
     can_concat_examples, concat_examples_with_randgen
 
-from chatette.parsing.utils import SLOT_VAL_SYM
+from chatette.parsing.utils import \
+    SLOT_VAL_SYM, ANNOTATION_START, ANNOTATION_END, KEY_VAL_CONNECTOR, \
+    RULE_WEIGHT_KEY
 
 
 class Rule(GeneratingItem):
     """
     Represents a rule (as it will be contained in choices or unit definitions).
+    Its weight is how many times more often it is drawn at random than
+    the rules of weight 1 (cf. `chatette.sampling.make_rule_table`).
     """
-    def __init__(self, parent_name=None, contents=None, slot_value=None):
+    def __init__(
+        self, parent_name=None, contents=None, slot_value=None, weight=1
+    ):
         self.parent_name = parent_name
         super(Rule, self).__init__(None, leading_space=False)
         self._contents = contents
 
-        self._max_nb_cached_ex = 0
-
         self.slot_value = slot_value
+        self.weight = weight
 
     def _compute_full_name(self):
         if self.parent_name is not None:
             return "rule contained in " + self.parent_name
         return "rule not contained in anything"
 
-    def get_max_cache_size(self):
-        return 0
+    def is_cacheable(self):
+        return False
+
+    def get_nb_rules(self):
+        """
+        Returns the number of rules this rule stands for when rules are drawn
+        uniformly (cf. `chatette.sampling.make_rule_table`).
+        """
+        return 1
 
     def _compute_nb_possibilities(self):
         if len(self._contents) == 0:
@@ -46,36 +59,164 @@ class Rule(GeneratingItem):
                 acc *= content.get_max_nb_possibilities()
         return acc
 
-    def _generate_random_strategy(self):
+    def iter_references(self):
+        for content in self._contents:
+            for reference in content.iter_references():
+                yield reference
+
+    def has_rule_weights(self, **kwargs):
+        return any(content.has_rule_weights() for content in self._contents)
+
+    def _count_possibilities_strategy(self, **kwargs):
+        """
+        The count is only known to be exact if at most one content
+        can generate several different examples, as concatenating
+        the examples of a content with constant texts cannot make
+        two different examples identical.
+        """
+        value = 1
+        exact = True
+        nb_varying_contents = 0
+        for content in self._contents:
+            count = content.count_possibilities()
+            value *= count.value
+            exact = exact and count.exact
+            if count.value > 1:
+                nb_varying_contents += 1
+        return PossibilityCount(value, exact and nb_varying_contents <= 1)
+
+    def _generate_random_strategy(self, rng=None):
         generated_example = Example()
         randgen_mapping = dict()
         for content in self._contents:
-            generated_example.append(
-                content.generate_random(randgen_mapping=randgen_mapping)
+            generated_example = generated_example.append(
+                content.generate_random(
+                    randgen_mapping=randgen_mapping, rng=rng
+                )
             )
         return generated_example
 
+    def generate_random_batch(self, nb_examples, **kwargs):
+        """
+        Overriding to reuse the same random generation mapping
+        (emptied for each example) and look up the contents once.
+        """
+        rng = kwargs.get("rng", None)
+        contents = self._contents
+        randgen_mapping = dict()
+        examples = []
+        for _ in range(nb_examples):
+            randgen_mapping.clear()
+            generated_example = Example()
+            for content in contents:
+                generated_example = generated_example.append(
+                    content.generate_random(
+                        randgen_mapping=randgen_mapping, rng=rng
+                    )
+                )
+            examples.append(generated_example)
+        return examples
+
+    def _generate_at_strategy(self, index, **kwargs):
+        digits = []
+        for content in reversed(self._contents):
+            nb_possibilities = content.get_max_nb_possibilities()
+            digits.append(index % nb_possibilities)
+            index //= nb_possibilities
+        digits.reverse()
+
+        generated_example = Example()
+        randgen_mapping = dict()
+        for (content, digit) in zip(self._contents, digits):
+            content_example = \
+                content.generate_at(digit, randgen_mapping=randgen_mapping)
+            if content_example is None:
+                return None
+            generated_example = generated_example.append(content_example)
+        return generated_example
+
+    def _iter_matches_strategy(self, text, start_index, **kwargs):
+        return self._iter_contents_matches(
+            0, text, start_index,
+            kwargs.get("optional_leading_space", False),
+            kwargs.get("arg_mappings")
+        )
+    def _iter_contents_matches(
+        self, content_index, text, start_index,
+        optional_leading_space, arg_mappings
+    ):
+        """
+        Yields the matches of the contents of this rule starting from the
+        `content_index`th one (cf. `_iter_matches`).
+        The leading space is optional for a content as long as
+        it is optional for this rule and all the contents before it
+        matched an empty string.
+        """
+        if content_index == len(self._contents):
+            yield (0, start_index)
+            return
+        nb_following_possibilities = 1
+        for content in self._contents[content_index + 1:]:
+            nb_following_possibilities *= content.get_max_nb_possibilities()
+
+        content = self._contents[content_index]
+        for (index, end_index) in content._iter_matches(
+            text, start_index, optional_leading_space=optional_leading_space,
+            arg_mappings=arg_mappings
+        ):
+            for (following_index, following_end_index) in \
+                self._iter_contents_matches(
+                    content_index + 1, text, end_index,
+                    optional_leading_space and end_index == start_index,
+                    arg_mappings
+                ):
+                yield (
+                    index * nb_following_possibilities + following_index,
+                    following_end_index
+                )
+
     def _generate_all_strategy(self):
         if len(self._contents) == 0:
             return []
         generated_examples = None
         for content in self._contents:
-            tmp_buffer = []
             content_examples = content.generate_all()
             if generated_examples is None:
                 generated_examples = content_examples
             else:
+                tmp_buffer = ExampleSet()
                 for ex in generated_examples:
                     for content_ex in content_examples:
                         if can_concat_examples(ex, content_ex):
                             new_example = \
                                 concat_examples_with_randgen(ex, content_ex)
-                            add_example_no_dup(tmp_buffer, new_example)
+                            tmp_buffer.add(new_example)
                 generated_examples = tmp_buffer
         if generated_examples is None:
             return []
         return sort_by_texts(generated_examples)
 
+    def _iter_all_strategy(self, **kwargs):
+        if len(self._contents) == 0:
+            return iter([])
+        return self._iter_contents_all(0, Example())
+    def _iter_contents_all(self, content_index, example):
+        """
+        Yields all the examples that are the concatenation of `example`
+        and of examples generated by the contents of this rule,
+        starting at index `content_index`.
+        """
+        if content_index == len(self._contents):
+            yield example
+            return
+        for content_ex in self._contents[content_index].iter_all():
+            if can_concat_examples(example, content_ex):
+                new_example = concat_examples_with_randgen(example, content_ex)
+                for ex in self._iter_contents_all(
+                    content_index + 1, new_example
+                ):
+                    yield ex
+
 
     def __str__(self):
         result = self.full_name + ": "
@@ -90,6 +231,10 @@ class Rule(GeneratingItem):
         result = ""
         for content in self._contents:
             result += content.as_template_str()
+        if self.weight != 1:
+            result += \
+                ' ' + ANNOTATION_START + RULE_WEIGHT_KEY + KEY_VAL_CONNECTOR + \
+                ' ' + str(self.weight) + ANNOTATION_END
         if self.slot_value is not None:
             result += ' ' + SLOT_VAL_SYM + ' ' + self.slot_value
         return result
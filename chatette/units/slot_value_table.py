@@ -0,0 +1,207 @@
+# coding: utf-8
+"""
+Module `chatette.units.slot_value_table`
+Contains a class representing the rows of a file of slot values
+(as they can be contained in slot definitions instead of rules).
+"""
+
+import csv
+import io
+from array import array
+from six.moves import range
+
+from chatette.units import Example, PossibilityCount, sort_by_texts
+from chatette.units.generating_item import GeneratingItem
+from chatette.random_stream import get_stream
+
+from chatette.parsing.utils import SLOT_VAL_SYM
+
+
+class SlotValueTable(GeneratingItem):
+    """
+    Represents the rows of a CSV or TSV file of slot values
+    (cf. `from_file`). It is contained in a slot definition as a rule that
+    can generate the text of each row, with its slot value.
+    The rows are stored in columns (the texts and the slot values are each
+    concatenated in a single string, along with the offsets of the rows in it)
+    rather than as rules and words, which would take much more memory
+    and time to build for large files.
+    """
+    def __init__(self, texts, slot_values=None, file_path=None):
+        self.file_path = file_path
+        super(SlotValueTable, self).__init__(None, leading_space=False)
+        # NOTE same attributes as `Rule`
+        self.slot_value = None
+        self.weight = 1
+
+        (self._texts, self._text_offsets) = _make_column(texts)
+        if slot_values is None or all(value is None for value in slot_values):
+            self._slot_values = None
+            self._slot_value_offsets = None
+        else:
+            # NOTE an empty slot value stands for the text of the row
+            (self._slot_values, self._slot_value_offsets) = \
+                _make_column(
+                    u'' if value is None else value for value in slot_values
+                )
+
+    @classmethod
+    def from_file(cls, file_path):
+        """
+        Returns the table of the rows of the file at `file_path`.
+        Each row contains a text and optionally its slot value (if it is
+        different from the text). Columns are separated by tabs in TSV files
+        (extensions `.tsv` and `.tab`, whose fields are not quoted) and by
+        commas in other files (CSV files). Empty rows are ignored.
+        @raises: - `IOError` if the file cannot be read.
+                 - `ValueError` if a row is not valid.
+        """
+        if file_path.lower().endswith((".tsv", ".tab")):
+            reader_options = {"delimiter": '\t', "quoting": csv.QUOTE_NONE}
+        else:
+            reader_options = {"delimiter": ','}
+        texts = []
+        slot_values = []
+        with io.open(file_path, 'r', encoding="utf-8", newline='') as f:
+            reader = csv.reader(f, **reader_options)
+            for row in reader:
+                if len(row) == 0 or (len(row) == 1 and row[0].strip() == ''):
+                    continue
+                if len(row) > 2:
+                    raise ValueError(
+                        "Row " + str(reader.line_num) + " of file '" + \
+                        file_path + "' has " + str(len(row)) + " columns, " + \
+                        "but rows of slot values have a text and " + \
+                        "optionally a slot value."
+                    )
+                text = row[0].strip()
+                if text == '':
+                    raise ValueError(
+                        "Row " + str(reader.line_num) + " of file '" + \
+                        file_path + "' has no text."
+                    )
+                texts.append(text)
+                if len(row) == 2 and row[1].strip() != '':
+                    slot_values.append(row[1].strip())
+                else:
+                    slot_values.append(None)
+        return cls(texts, slot_values, file_path)
+
+    def _compute_full_name(self):
+        if self.file_path is not None:
+            return "slot values of file '" + self.file_path + "'"
+        return "slot values"
+
+    def __len__(self):
+        return len(self._text_offsets) - 1
+
+    def get_text(self, index):
+        """Returns the text of the row at index `index`."""
+        return \
+            self._texts[
+                self._text_offsets[index]:self._text_offsets[index + 1]
+            ]
+    def get_slot_value(self, index):
+        """
+        Returns the slot value of the row at index `index`
+        (`None` if it is its text).
+        """
+        if self._slot_values is None:
+            return None
+        slot_value = \
+            self._slot_values[
+                self._slot_value_offsets[index]:
+                self._slot_value_offsets[index + 1]
+            ]
+        if slot_value == u'':
+            return None
+        return slot_value
+
+    def iter_rows(self):
+        """Yields the text and slot value of each row (as 2-tuples)."""
+        for index in range(len(self)):
+            yield (self.get_text(index), self.get_slot_value(index))
+
+    def _get_example(self, index):
+        """
+        Returns the example of the row at index `index`, with its slot value.
+        """
+        return \
+            Example(self.get_text(index)).with_slot_value(
+                self.get_slot_value(index)
+            )
+
+
+    def is_cacheable(self):
+        return False
+
+    def get_nb_rules(self):
+        """
+        Overriding.
+        Returns the number of rows of the table, which is drawn as often
+        as that many rules.
+        """
+        return len(self)
+
+    def _compute_nb_possibilities(self):
+        return len(self)
+
+    def _count_possibilities_strategy(self, **kwargs):
+        return \
+            PossibilityCount(
+                len(set(self.get_text(i) for i in range(len(self))))
+            )
+
+    def _generate_random_strategy(self, rng=None):
+        # NOTE draws as `random.choice` does, as the compiled programs
+        #      (cf. `chatette.compiler`) choose the row with it
+        return self._get_example(get_stream(rng).choice(range(len(self))))
+
+    def _generate_at_strategy(self, index, **kwargs):
+        return self._get_example(index)
+
+    def _generate_all_strategy(self):
+        examples = dict()
+        for index in range(len(self)):
+            text = self.get_text(index)
+            if text not in examples:
+                examples[text] = self._get_example(index)
+        return sort_by_texts(examples.values())
+
+    def _iter_all_strategy(self, **kwargs):
+        for index in range(len(self)):
+            yield self._get_example(index)
+
+    def _iter_matches_strategy(self, text, start_index, **kwargs):
+        # NOTE case-insensitive as case generation modifiers might apply
+        text = text.lower()
+        for index in range(len(self)):
+            row_text = self.get_text(index).lower()
+            if text.startswith(row_text, start_index):
+                yield (index, start_index + len(row_text))
+
+
+    def as_template_str(self):
+        rules = []
+        for (text, slot_value) in self.iter_rows():
+            if slot_value is None:
+                rules.append(text)
+            else:
+                rules.append(text + ' ' + SLOT_VAL_SYM + ' ' + slot_value)
+        return "\n\t".join(rules)
+
+
+def _make_column(strings):
+    """
+    Returns the concatenation of the strings `strings` and the array of
+    the offsets at which each of them starts in it, followed by the length
+    of the concatenation.
+    """
+    offsets = array('L', [0])
+    offset = 0
+    parts = []
+    for string in strings:
+        parts.append(string)
+        offset += len(string)
+        offsets.append(offset)
+    return (u''.join(parts), offsets)
@@ -6,8 +6,9 @@ Module `chatette.units.word`
 Contains the definition of words as contents of rules.
 """
 
-from chatette.units import Example
+from chatette.units import Example, PossibilityCount
 from chatette.units.generating_item import GeneratingItem
+from chatette.modifiers.argument import modify_text
 
 
 class Word(GeneratingItem):
@@ -24,9 +25,12 @@ class Word(GeneratingItem):
     def _compute_nb_possibilities(self):
         return 1
 
+    def count_possibilities(self, **kwargs):
+        return PossibilityCount(1)
+
     def generate_random(self, **kwargs):
         return self._generate_random_strategy()
-    def _generate_random_strategy(self):
+    def _generate_random_strategy(self, rng=None):
         if self._leading_space:
             return Example(' ' + self._name)
         return Example(self._name)
@@ -38,13 +42,33 @@ class Word(GeneratingItem):
             return [Example(' ' + self._name)]
         return [Example(self._name)]
 
-    def generate_nb_possibilities(self, nb_possibilities):
+    def iter_all(self, **kwargs):
+        return self._iter_all_strategy()
+    def _iter_all_strategy(self, **kwargs):
+        yield self._generate_random_strategy()
+
+    def generate_nb_possibilities(self, nb_possibilities, **kwargs):
         return self._generate_n_strategy()
-    def _generate_n_strategy(self, n=None):
+    def _generate_n_strategy(self, n=None, rng=None, **kwargs):
         if self._leading_space:
             return [Example(' ' + self._name)]
         return [Example(self._name)]
 
+    def generate_at(self, index, **kwargs):
+        self._check_index(index, 1)
+        return self._generate_at_strategy(index)
+    def _generate_at_strategy(self, index, **kwargs):
+        return self._generate_random_strategy()
+
+    def _iter_matches_strategy(self, text, start_index, **kwargs):
+        word = self._name
+        for arg_mapping in kwargs.get("arg_mappings") or []:
+            word = modify_text(word, arg_mapping)
+        end_index = start_index + len(word)
+        # NOTE case-insensitive as case generation modifiers might apply
+        if text[start_index:end_index].lower() == word.lower():
+            yield (0, end_index)
+
     def as_template_str(self):
         if self._leading_space:
             return ' ' + self.word
@@ -7,8 +7,8 @@ Contains utility functions and classes used everywhere in the project.
 
 from __future__ import print_function
 import sys
+import multiprocessing
 from random import sample, choice
-from copy import deepcopy
 
 from string import ascii_letters
 
@@ -84,15 +84,18 @@ def cast_to_unicode(anything):
     return anything
 
 
-def sample_indulgent(array, nb_items):
+def sample_indulgent(array, nb_items, rng=None):
     """
     Same as `random.sample` but doesn't raise an error if `nb_items`
     is larger than the length of `array`: in that case,
     simply returns (a copy of) the whole array.
+    Draws from the random stream `rng` if it is not `None`.
     """
     if nb_items <= len(array):
-        return sample(array, nb_items)
-    return deepcopy(array)
+        if rng is None:
+            return sample(array, nb_items)
+        return rng.sample(array, nb_items)
+    return array[:]
 
 
 def rchop(string, ending):
@@ -163,6 +166,21 @@ def extend_list_in_dict(dict_of_lists, key, values):
         dict_of_lists[key].extend(values)
 
 
+def get_fork_context():
+    """
+    Returns the multiprocessing context that forks processes,
+    or `None` if processes cannot be forked on this platform.
+    """
+    if not hasattr(multiprocessing, "get_context"):  # Python 2
+        if sys.platform == "win32":
+            return None
+        return multiprocessing
+    try:
+        return multiprocessing.get_context("fork")
+    except ValueError:
+        return None
+
+
 if __name__ == "__main__":
     # pylint: disable=wrong-import-position
     import warnings
@@ -13,6 +13,10 @@ from chatette.parsing.parser import Parser
 from chatette.units.ast import AST
 from chatette.generator import Generator
 from chatette.adapters import RasaAdapter, JsonListAdapter
+from chatette.utils import UnitType
+from chatette.facade import Facade
+from chatette.incremental import get_shard_name
+from chatette.parsing.input_file_manager import InputFileManager
 
 
 class ChatetteFacade(object):
@@ -311,4 +315,202 @@ class TestSystem(object):
         Tests templates that generate a subset of all possible examples
         for each intent and that generate both training and testing data.
         """
-        pass
\ No newline at end of file
+        pass
+
+class TestParallelGeneration(object):
+    def teardown_method(self):
+        AST.reset_instance()
+
+    @staticmethod
+    def _generate(template_filepath, jobs):
+        AST.reset_instance()
+        Parser().parse_file(template_filepath)
+        generator = Generator(seed="parallel", jobs=jobs)
+        train_examples = []
+        test_examples = []
+        for (intent_train, intent_test) in generator.generate_intents():
+            train_examples.extend(intent_train)
+            test_examples.extend(intent_test)
+        return (train_examples, test_examples)
+
+    def test_same_examples_as_serial(self):
+        file_path = "examples/complex/airport/master.chatette"
+        serial = self._generate(file_path, 1)
+        parallel = self._generate(file_path, 2)
+        assert len(serial[0]) > 0
+        assert serial == parallel
+
+    def test_seeded_intents_independent(self):
+        file_path = "examples/complex/airport/master.chatette"
+        (train_examples, _) = self._generate(file_path, 1)
+        generator = Generator(seed="parallel")
+        intent_names = list(AST.get_or_create()[UnitType.intent].keys())
+        (last_train, _) = generator._generate_intent(intent_names[-1])
+        last_train = list(last_train)
+        assert train_examples[-len(last_train):] == last_train
+
+
+class TestIncrementalGeneration(object):
+    MASTER = """|slots.chatette
+%[greet]('training': '5', 'testing': '2')
+    ~[hi] @[name]
+%[bye]
+    ~[ciao] friend
+~[hi]
+    hi
+    hello
+~[ciao]
+    bye
+    ciao
+"""
+    SLOTS = """@[name]
+    alice
+    bob
+"""
+
+    def teardown_method(self):
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+
+    @staticmethod
+    def _write(tmpdir, file_name, content):
+        with io.open(os.path.join(str(tmpdir), file_name), 'w') as f:
+            f.write(content)
+
+    @staticmethod
+    def _run(tmpdir, output_dir_name, seed=None):
+        Facade.reset_system(
+            os.path.join(str(tmpdir), "master.chatette"),
+            os.path.join(str(tmpdir), output_dir_name), seed=seed,
+            force_overwriting=True, incremental=True
+        )
+        Facade.get_or_create().run()
+
+    @staticmethod
+    def _read_shard(tmpdir, output_dir_name, set_name, intent_name):
+        file_path = \
+            os.path.join(
+                str(tmpdir), output_dir_name, set_name,
+                get_shard_name(intent_name), "output.json"
+            )
+        with io.open(file_path, 'r') as f:
+            return f.read()
+
+    def test_only_affected_intents_regenerated(self, tmpdir):
+        self._write(tmpdir, "master.chatette", self.MASTER)
+        self._write(tmpdir, "slots.chatette", self.SLOTS)
+        self._run(tmpdir, "output")
+        seed = Facade.get_or_create().seed
+        bye_marker = \
+            os.path.join(
+                str(tmpdir), "output", "train", get_shard_name("bye"), "marker"
+            )
+        greet_marker = \
+            os.path.join(
+                str(tmpdir), "output", "train", get_shard_name("greet"),
+                "marker"
+            )
+        for marker in (bye_marker, greet_marker):
+            self._write(tmpdir, marker, u"")
+
+        # Nothing changed: nothing is rewritten
+        self._run(tmpdir, "output")
+        assert Facade.get_or_create().seed == seed
+        assert os.path.exists(bye_marker) and os.path.exists(greet_marker)
+
+        self._write(tmpdir, "slots.chatette", self.SLOTS + "    carol\n")
+        self._run(tmpdir, "output")
+        assert os.path.exists(bye_marker)
+        assert not os.path.exists(greet_marker)
+        assert "carol" in \
+            self._read_shard(tmpdir, "output", "train", "greet")
+
+        # Same output as a generation from scratch
+        self._run(tmpdir, "scratch", seed)
+        for (set_name, intent_name) in \
+            (("train", "greet"), ("test", "greet"), ("train", "bye")):
+            assert \
+                self._read_shard(tmpdir, "output", set_name, intent_name) == \
+                self._read_shard(tmpdir, "scratch", set_name, intent_name)
+
+    def test_removed_intent(self, tmpdir):
+        self._write(tmpdir, "master.chatette", self.MASTER)
+        self._write(tmpdir, "slots.chatette", self.SLOTS)
+        self._run(tmpdir, "output")
+        self._write(
+            tmpdir, "master.chatette",
+            self.MASTER.replace("%[bye]", "~[bye]")
+        )
+        self._run(tmpdir, "output")
+        train_dir = os.path.join(str(tmpdir), "output", "train")
+        assert os.listdir(train_dir) == [get_shard_name("greet")]
+
+
+class TestTestSetGeneration(object):
+    TEMPLATE = """
+%[greet]('training': '3', 'testing': '3')
+    ~[hi] you
+%[bye]('training': '2', 'testing': '2')
+    ~[hi] bye
+~[hi]
+    hi
+    hello
+    hey
+    howdy
+"""
+
+    def teardown_method(self):
+        AST.reset_instance()
+
+    def test_not_in_training_set(self, tmpdir):
+        file_path = os.path.join(str(tmpdir), "template.chatette")
+        with io.open(file_path, 'w') as f:
+            f.write(self.TEMPLATE)
+        AST.reset_instance()
+        Parser().parse_file(file_path)
+        generator = Generator(seed="test-set")
+        train_examples = list(generator.generate_train())
+        test_examples = list(generator.generate_test(train_examples))
+        assert len(train_examples) == 5
+        assert len(test_examples) == 3
+        train_texts = set(ex.text for ex in train_examples)
+        assert all(ex.text not in train_texts for ex in test_examples)
+
+
+class TestGenerateRandomBatch(object):
+    TEMPLATE = """
+%[greet]
+    ~[hi] @[name]
+~[hi]
+    hi
+    hello
+@[name]
+    alice
+    bob
+"""
+
+    def teardown_method(self):
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+
+    def _make_facade(self, tmpdir):
+        file_path = os.path.join(str(tmpdir), "template.chatette")
+        with io.open(file_path, 'w') as f:
+            f.write(self.TEMPLATE)
+        Facade.reset_system(file_path, str(tmpdir), seed="batch")
+        facade = Facade.get_or_create()
+        facade.run_parsing()
+        return facade
+
+    def test_batches(self, tmpdir):
+        facade = self._make_facade(tmpdir)
+        first_batch = facade.generate_random_batch(10, "greet")
+        assert len(first_batch) == 10
+        assert all(ex.intent_name == "greet" for ex in first_batch)
+        assert all(len(ex.entities) == 1 for ex in first_batch)
+        second_batch = facade.generate_random_batch(10, "greet")
+
+        facade = self._make_facade(tmpdir)
+        assert facade.generate_random_batch(20, "greet") == \
+            first_batch + second_batch
+        assert len(facade.generate_random_batch(5, "hi", "alias")) == 5
@@ -35,3 +35,10 @@ class TestAdapter(object):
             assert len(batch.examples) == 1
             assert batch.examples[0] in ("a", "b")
             assert len(batch.synonyms) == 0
+
+        batches = list(
+            Adapter._Adapter__generate_batch(iter(["a", "b", "c"]), [], 2)
+        )
+        assert [batch.index for batch in batches] == [0, 1]
+        assert batches[0].examples == ["a", "b"]
+        assert batches[1].examples == ["c"]
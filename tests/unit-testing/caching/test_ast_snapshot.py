@@ -0,0 +1,116 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions in module 'chatette.caching.ast_snapshot'.
+"""
+
+import io
+import os
+
+import pytest
+
+from chatette.caching import ast_snapshot
+from chatette.configuration import Configuration
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.parsing.parser import Parser
+from chatette.statistics import Stats
+from chatette.units.ast import AST
+from chatette.utils import UnitType
+
+
+MASTER_TEMPLATE = "|aliases.chatette\n%[greet]\n    ~[hello] @[city]\n"
+INCLUDED_TEMPLATE = \
+    "~[hello]\n    hello\n    hi\n@[city]\n    paris\n    london = ldn\n"
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    config = Configuration.get_or_create()
+    config.cache_dir = os.path.join(str(tmpdir), "cache")
+    yield config.cache_dir
+    config.cache_dir = None
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    Stats.reset_instance()
+
+
+def write_templates(tmpdir, included_template=INCLUDED_TEMPLATE):
+    for (file_name, template) in (
+        ("master.chatette", MASTER_TEMPLATE),
+        ("aliases.chatette", included_template),
+    ):
+        with io.open(os.path.join(str(tmpdir), file_name), 'w') as f:
+            f.write(template)
+    return os.path.join(str(tmpdir), "master.chatette")
+
+
+def parse(file_path):
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    Stats.reset_instance()
+    parser = Parser()
+    parser.parse_file(file_path)
+    return parser
+
+
+def get_definition_names():
+    ast = AST.get_or_create()
+    return dict(
+        (unit_type, sorted(ast[unit_type]))
+        for unit_type in (UnitType.alias, UnitType.slot, UnitType.intent)
+    )
+
+
+class TestAstSnapshot(object):
+    def test_disabled(self, tmpdir):
+        assert ast_snapshot.get_snapshot_path("master.chatette") is None
+
+    def test_load(self, cache_dir, tmpdir, monkeypatch):
+        file_path = write_templates(tmpdir)
+        parser = parse(file_path)
+        definition_names = get_definition_names()
+        file_paths = list(parser.input_file_manager.get_parsed_file_paths())
+        nb_rules = Stats.get_or_create().nb_rules_parsed
+        assert len(file_paths) == 2
+
+        # NOTE the templates must not be parsed again
+        monkeypatch.setattr(
+            Parser, "_parse_file",
+            lambda self, file_path: pytest.fail("The templates were parsed.")
+        )
+        parser = parse(file_path)
+        assert get_definition_names() == definition_names
+        assert parser.input_file_manager.get_parsed_file_paths() == file_paths
+        assert Stats.get_or_create().nb_rules_parsed == nb_rules
+        examples = AST.get_or_create()[UnitType.intent]["greet"].generate_all()
+        assert sorted(ex.text for ex in examples) == [
+            "hello london", "hello paris", "hi london", "hi paris"
+        ]
+        synonyms = AST.get_or_create().get_entities_synonyms()
+        assert synonyms["ldn"] == ["london"]
+
+    def test_included_file_changed(self, cache_dir, tmpdir):
+        file_path = write_templates(tmpdir)
+        parse(file_path)
+        write_templates(
+            tmpdir, INCLUDED_TEMPLATE.replace("~[hello]", "~[hey]")
+        )
+        parse(file_path)
+        assert get_definition_names()[UnitType.alias] == ["hey"]
+        # The snapshot was replaced
+        parse(file_path)
+        assert get_definition_names()[UnitType.alias] == ["hey"]
+
+    def test_corrupted(self, cache_dir, tmpdir):
+        file_path = write_templates(tmpdir)
+        parse(file_path)
+        snapshot_path = ast_snapshot.get_snapshot_path(file_path)
+        with io.open(snapshot_path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+        with io.open(snapshot_path, 'wb') as snapshot_file:
+            snapshot_file.write(data[:-10])
+        assert \
+            ast_snapshot.load_snapshot(snapshot_path, AST.get_or_create()) \
+            is None
+        parse(file_path)
+        assert get_definition_names()[UnitType.alias] == ["hello"]
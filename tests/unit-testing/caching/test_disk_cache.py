@@ -0,0 +1,133 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions in module 'chatette.caching.disk_cache'.
+"""
+
+import io
+import os
+
+import pytest
+
+from chatette.caching import disk_cache
+from chatette.caching.example_cache import ExampleCache
+from chatette.configuration import Configuration
+from chatette.parsing.parser import Parser
+from chatette.units import Example, IntentExample, Entity
+from chatette.units.ast import AST
+from chatette.units.rule import Rule
+from chatette.units.word import Word
+from chatette.utils import UnitType
+
+
+def make_examples():
+    slot_example = Example("hello paris", [Entity("city", 5, "Paris", 6)])
+    slot_example = slot_example.with_slot_value("value")
+    randgen_example = Example("hi")
+    randgen_example.randgen_mapping = {"name": True, "other": False}
+    intent_example = \
+        IntentExample("greet", "hello you", [Entity("person", 3, None, 6)])
+    return [slot_example, randgen_example, intent_example, Example()]
+
+
+@pytest.fixture
+def cache_dir(tmpdir):
+    config = Configuration.get_or_create()
+    config.cache_dir = os.path.join(str(tmpdir), "cache")
+    ExampleCache.reset_instance()
+    yield config.cache_dir
+    config.cache_dir = None
+    ExampleCache.reset_instance()
+    AST.reset_instance()
+
+
+def parse(tmpdir, template):
+    file_path = os.path.join(str(tmpdir), "template.chatette")
+    with io.open(file_path, 'w') as template_file:
+        template_file.write(template)
+    AST.reset_instance()
+    Parser().parse_file(file_path)
+    return AST.get_or_create()
+
+
+class TestEncoding(object):
+    def test_round_trip(self):
+        examples = make_examples()
+        decoded = \
+            disk_cache.decode_examples(disk_cache.encode_examples(examples))
+        assert decoded == examples
+        assert isinstance(decoded[2], IntentExample)
+
+    def test_other_version(self):
+        data = disk_cache.encode_examples(make_examples())
+        header_size = len(disk_cache.MAGIC_NUMBER)
+        data = data[:header_size] + b"\xff\xff" + data[header_size + 2:]
+        assert disk_cache.decode_examples(data) is None
+        assert disk_cache.decode_examples(b"not a cache file") is None
+
+
+class TestLoadStore(object):
+    def test_disabled(self):
+        assert disk_cache.get_cache_dir() is None
+        disk_cache.store_examples("hash", make_examples())
+        assert disk_cache.load_examples("hash") is None
+
+    def test_store_load(self, cache_dir):
+        assert disk_cache.load_examples("hash") is None
+        disk_cache.store_examples("hash", make_examples())
+        assert disk_cache.load_examples("hash") == make_examples()
+
+    def test_corrupted(self, cache_dir):
+        os.makedirs(cache_dir)
+        file_path = \
+            os.path.join(cache_dir, "hash" + disk_cache.FILE_EXTENSION)
+        with io.open(file_path, 'wb') as cache_file:
+            cache_file.write(disk_cache.encode_examples(make_examples())[:-3])
+        assert disk_cache.load_examples("hash") is None
+
+
+class TestUnitDefinition(object):
+    TEMPLATE = \
+        "%[greet]\n    ~[hello] @[city]\n" + \
+        "~[hello]\n    hello\n    hi\n" + \
+        "@[city]\n    paris\n    london\n"
+
+    def test_content_hash(self, cache_dir, tmpdir):
+        ast = parse(tmpdir, self.TEMPLATE)
+        intent_hash = ast[UnitType.intent]["greet"].get_content_hash()
+        alias_hash = ast[UnitType.alias]["hello"].get_content_hash()
+
+        ast = parse(tmpdir, self.TEMPLATE)
+        assert ast[UnitType.intent]["greet"].get_content_hash() == intent_hash
+
+        ast = parse(tmpdir, self.TEMPLATE.replace("london", "rome"))
+        assert ast[UnitType.intent]["greet"].get_content_hash() != intent_hash
+        assert ast[UnitType.alias]["hello"].get_content_hash() == alias_hash
+
+    def test_content_hash_after_new_rule(self, cache_dir, tmpdir):
+        ast = parse(tmpdir, self.TEMPLATE)
+        intent = ast[UnitType.intent]["greet"]
+        alias = ast[UnitType.alias]["hello"]
+        intent_hash = intent.get_content_hash()
+        alias_hash = alias.get_content_hash()
+        examples = intent.generate_all()
+
+        alias.add_rule(Rule("hello", [Word("hey", False)]))
+        assert alias.get_content_hash() != alias_hash
+        assert intent.get_content_hash() != intent_hash
+        assert len(intent.generate_all()) == len(examples) + 2
+
+    def test_generate_all(self, cache_dir, tmpdir):
+        ast = parse(tmpdir, self.TEMPLATE)
+        examples = ast[UnitType.intent]["greet"].generate_all()
+        assert len([
+            file_name for file_name in os.listdir(cache_dir)
+            if file_name.endswith(disk_cache.FILE_EXTENSION)
+        ]) == 3
+
+        ast = parse(tmpdir, self.TEMPLATE)
+        ExampleCache.reset_instance()
+        intent = ast[UnitType.intent]["greet"]
+        assert \
+            disk_cache.load_examples(intent.get_content_hash()) == examples
+        assert intent.generate_all() == examples
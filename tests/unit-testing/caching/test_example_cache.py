@@ -0,0 +1,98 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions and classes in module 'chatette.caching.example_cache'.
+"""
+
+import pytest
+
+from chatette.caching.example_cache import ExampleCache, estimate_size
+from chatette.configuration import Configuration
+from chatette.statistics import Stats
+from chatette.units import Example
+from chatette.units.word import Word
+from chatette.units.rule import Rule
+from chatette.units.modifiable.choice import Choice
+from chatette.modifiers.representation import ModifiersRepresentation
+
+
+def make_examples(*texts):
+    return [Example(text) for text in texts]
+
+
+@pytest.fixture
+def cache():
+    config = Configuration.get_or_create()
+    previous_budget = \
+        (config.cache_max_nb_examples, config.cache_max_bytes)
+    Stats.reset_instance()
+    yield ExampleCache.reset_instance()
+    (config.cache_max_nb_examples, config.cache_max_bytes) = previous_budget
+    ExampleCache.reset_instance()
+
+
+class TestExampleCache(object):
+    def test_get_put(self, cache):
+        assert cache.get("key") is None
+        examples = make_examples("a", "b")
+        cache.put("key", examples)
+        assert cache.get("key") is examples
+        assert cache.nb_examples == 2
+        stats = Stats.get_or_create()
+        assert stats.nb_cache_hits == 1
+        assert stats.nb_cache_misses == 1
+
+    def test_evict_least_recently_used(self, cache):
+        Configuration.get_or_create().cache_max_nb_examples = 4
+        cache.put("first", make_examples("a", "b"))
+        cache.put("second", make_examples("c"))
+        cache.get("first")
+        cache.put("third", make_examples("d", "e"))
+        assert "second" not in cache
+        assert "first" in cache
+        assert "third" in cache
+        assert cache.nb_examples == 4
+        assert Stats.get_or_create().nb_cache_evictions == 1
+
+    def test_byte_budget(self, cache):
+        examples = make_examples("a", "b")
+        Configuration.get_or_create().cache_max_bytes = \
+            estimate_size(examples)
+        cache.put("first", examples)
+        cache.put("second", make_examples("c"))
+        assert "first" not in cache
+        assert "second" in cache
+        cache.put("third", make_examples("d", "e", "f"))
+        assert "third" not in cache
+        assert "second" in cache
+
+    def test_remove_all(self, cache):
+        cache.put(("a", 1), make_examples("a"))
+        cache.put(("b", 1), make_examples("b"))
+        cache.remove_all(lambda key: key[0] == "a")
+        assert len(cache) == 1
+        assert cache.nb_examples == 1
+
+
+class TestGenerateWithCache(object):
+    def test_generate_all(self, cache):
+        choice = \
+            Choice(
+                False, ModifiersRepresentation(),
+                [Rule(None, [Word("a", False)]), Rule(None, [Word("b", False)])]
+            )
+        examples = choice.generate_all()
+        assert len(cache) == 1
+        assert choice.generate_all() == examples
+        assert Stats.get_or_create().nb_cache_hits == 1
+
+    def test_reset(self, cache):
+        choice = \
+            Choice(
+                False, ModifiersRepresentation(),
+                [Rule(None, [Word("a", False)])]
+            )
+        choice.generate_all()
+        choice.set_casegen(True)
+        assert len(cache) == 0
+        assert len(choice.generate_all()) == 2
@@ -0,0 +1,116 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions in module 'chatette.compiler.codegen'.
+"""
+
+import io
+import os
+import runpy
+
+import pytest
+
+from chatette.compiler import Program
+from chatette.compiler.codegen import generate_module, write_module
+from chatette.configuration import Configuration
+from chatette.parsing.parser import Parser
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.random_stream import RandomStream
+from chatette.units.ast import AST
+from chatette.utils import UnitType
+
+
+TEMPLATE = """
+%[order]
+    ~[want] @[drink] [please?] [&now?later/40] [today?!later]
+    ~[want#polite] ~[cup$big] @[drink?/30] [&thanks|ok?/20]
+
+~[want]
+    I want
+    give me
+~[want#polite]
+    I'd like
+~[cup$SIZE]
+    a $SIZE cup of
+
+@[drink]
+    coffee
+    hot chocolate = cocoa
+    ~[want] tea = /
+"""
+
+
+def parse(tmpdir, template=TEMPLATE):
+    file_path = os.path.join(str(tmpdir), "template.chatette")
+    with io.open(file_path, 'w') as template_file:
+        template_file.write(template)
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    Parser().parse_file(file_path)
+    return AST.get_or_create()
+
+
+class TestGenerateModule(object):
+    def teardown_method(self):
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+        Configuration.get_or_create().weighted_rule_sampling = False
+
+    @pytest.mark.parametrize("weighted", [False, True])
+    def test_same_examples_as_ast(self, tmpdir, weighted):
+        ast = parse(tmpdir)
+        Configuration.get_or_create().weighted_rule_sampling = weighted
+        namespace = dict()
+        exec(compile(generate_module(ast), "generated", "exec"), namespace)
+        assert set(namespace["UNITS"]) == set([
+            ("alias", "cup", None), ("alias", "want", None),
+            ("alias", "want", "polite"), ("intent", "order", None),
+            ("slot", "drink", None)
+        ])
+        for (unit_type, unit_name, variation_name) in namespace["UNITS"]:
+            definition = ast[UnitType(unit_type)][unit_name]
+            rng = RandomStream("seed")
+            expected = [
+                definition.generate_random(
+                    rng=rng, variation_name=variation_name
+                ).as_dict()
+                for _ in range(200)
+            ]
+            generated = \
+                namespace["generate_random_examples"](
+                    200, unit_type, unit_name, variation_name,
+                    namespace["make_stream"]("seed")
+                )
+            assert generated == expected
+
+    def test_leading_slot(self, tmpdir):
+        ast = parse(
+            tmpdir,
+            "%[go]\n    @[city] please\n" + \
+            "@[city]\n    paris\n    new york = NYC\n    ~[far] city\n" + \
+            "~[far]\n    a far\n    another\n"
+        )
+        namespace = dict()
+        exec(compile(generate_module(ast), "generated", "exec"), namespace)
+        expected = \
+            Program(ast).generate_random_examples(
+                100, UnitType.intent, "go", None, RandomStream("seed")
+            )
+        generated = \
+            namespace["generate_random_examples"](
+                100, "intent", "go", None, namespace["make_stream"]("seed")
+            )
+        assert generated == [ex.as_dict() for ex in expected]
+        assert all(len(ex["entities"]) == 1 for ex in generated)
+
+    def test_write_module(self, tmpdir):
+        ast = parse(tmpdir)
+        file_path = os.path.join(str(tmpdir), "generated.py")
+        write_module(file_path, ast, "template.chatette")
+        module = runpy.run_path(file_path)
+        example = module["generate_random"]("intent", "order")
+        assert example["intent-name"] == "order"
+        for entity in example["entities"]:
+            assert entity["slot-name"] == "drink"
+        assert module["alias_want__polite"](module["make_stream"]()) == \
+            ("I'd like", ())
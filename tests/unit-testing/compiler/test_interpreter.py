@@ -0,0 +1,117 @@
+# coding: utf-8
+"""
+Test module.
+Tests the class `Program` in module 'chatette.compiler.interpreter'.
+"""
+
+import io
+import os
+
+import pytest
+
+from chatette.compiler import Program
+from chatette.configuration import Configuration
+from chatette.compiler.ir import TEXT, CHOOSE_TEXT
+from chatette.parsing.parser import Parser
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.random_stream import RandomStream
+from chatette.units import IntentExample
+from chatette.units.ast import AST
+from chatette.utils import UnitType
+
+
+TEMPLATE = """
+%[greet]
+    ~[hello] @[city] [maybe?] [&you?name/40] [there?!name]
+    ~[hello#polite] ~[thing$big] @[city?/30]
+    [&wow|hey] [ho|ha?/20] ~[constant]
+
+~[hello]
+    hi
+    Hello there
+~[hello#polite]
+    good morning
+~[thing$ARG]
+    a $ARG thing
+~[constant]
+    always the same
+
+@[city]
+    Paris
+    new york = NYC
+    los angeles = /
+"""
+
+
+def parse(tmpdir):
+    file_path = os.path.join(str(tmpdir), "template.chatette")
+    with io.open(file_path, 'w') as template_file:
+        template_file.write(TEMPLATE)
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    Parser().parse_file(file_path)
+    return AST.get_or_create()
+
+
+class TestProgram(object):
+    def teardown_method(self):
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+        Configuration.get_or_create().weighted_rule_sampling = False
+
+    @pytest.mark.parametrize("weighted", [False, True])
+    def test_same_examples_as_ast(self, tmpdir, weighted):
+        ast = parse(tmpdir)
+        Configuration.get_or_create().weighted_rule_sampling = weighted
+        program = Program(ast)
+        units = [
+            (UnitType.intent, "greet", None), (UnitType.slot, "city", None),
+            (UnitType.alias, "hello", None), (UnitType.alias, "hello", "polite"),
+            (UnitType.alias, "thing", None)
+        ]
+        for (unit_type, unit_name, variation_name) in units:
+            definition = ast[unit_type][unit_name]
+            rng = RandomStream("seed")
+            expected = [
+                definition.generate_random(
+                    rng=rng, variation_name=variation_name
+                )
+                for _ in range(200)
+            ]
+            generated = \
+                program.generate_random_examples(
+                    200, unit_type, unit_name, variation_name,
+                    RandomStream("seed")
+                )
+            assert generated == expected
+
+    def test_intent_examples(self, tmpdir):
+        program = Program(parse(tmpdir))
+        example = \
+            program.generate_random(
+                UnitType.intent, "greet", rng=RandomStream("seed")
+            )
+        assert isinstance(example, IntentExample)
+        assert example.intent_name == "greet"
+        for entity in example.entities:
+            assert entity.slot_name == "city"
+
+    def test_constants_folded(self, tmpdir):
+        ast = parse(tmpdir)
+        program = Program(ast)
+        constant = ast[UnitType.alias]["constant"]
+        address = program._compiler.get_entry(constant)
+        assert program.code[address] == \
+            (TEXT, ("always the same", ()), None)
+        city = ast[UnitType.slot]["city"]
+        address = program._compiler.get_entry(city)
+        assert program.code[address][0] == CHOOSE_TEXT
+        assert program.generate_random(UnitType.slot, "city").text in \
+            ("Paris", "new york", "los angeles")
+
+    def test_errors(self, tmpdir):
+        program = Program(parse(tmpdir))
+        with pytest.raises(KeyError):
+            program.generate_random(UnitType.alias, "nothing")
+        with pytest.raises(SyntaxError):
+            program.generate_random(UnitType.alias, "hello", "nothing")
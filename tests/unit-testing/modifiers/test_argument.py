@@ -44,16 +44,17 @@ class TestModifyExample(object):
         mapping = {"test": "TEST", "replace": "argument"}
 
         example = Example("replace $test by uppercase")
-        modify_example(example, mapping)
-        assert example.text == "replace TEST by uppercase"
+        modified = modify_example(example, mapping)
+        assert modified.text == "replace TEST by uppercase"
+        assert example.text == "replace $test by uppercase"
 
         example = Example("is this $replace?")
-        modify_example(example, mapping)
-        assert example.text == "is this argument?"
+        modified = modify_example(example, mapping)
+        assert modified.text == "is this argument?"
 
         example = Example("The $replace is $test")
-        modify_example(example, mapping)
-        assert example.text == "The argument is TEST"
+        modified = modify_example(example, mapping)
+        assert modified.text == "The argument is TEST"
 
 
 class TestMakeAllPossibilities(object):
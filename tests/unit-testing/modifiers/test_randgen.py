@@ -52,17 +52,21 @@ class TestMakeAllPossibilities(object):
         all_examples = make_all_possibilities(examples, empty, "randgen")
         for ex in all_examples:
             current_mapping = getattr(ex, RANDGEN_MAPPING_KEY, dict())
-            if ex == empty:
+            if ex.text == "":
                 assert not current_mapping["randgen"]
             else:
                 assert current_mapping["randgen"]
+        # Examples are not modified
+        assert getattr(empty, RANDGEN_MAPPING_KEY, None) is None
+        for ex in examples:
+            assert getattr(ex, RANDGEN_MAPPING_KEY, None) is None
 
         empty = Example()
         examples = [Example("test1"), Example("test2")]
         all_examples = make_all_possibilities(examples, empty, "randgen", True)
         for ex in all_examples:
             current_mapping = getattr(ex, RANDGEN_MAPPING_KEY, dict())
-            if ex == empty:
+            if ex.text == "":
                 assert current_mapping["randgen"]
             else:
                 assert not current_mapping["randgen"]
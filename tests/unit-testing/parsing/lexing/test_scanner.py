@@ -0,0 +1,77 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functionalities that are present in module
+`chatette.parsing.lexing.scanner`.
+"""
+
+import pytest
+
+from chatette.parsing.lexing import TerminalType
+from chatette.parsing.lexing.rule_line import RuleLine
+from chatette.parsing.lexing.scanner import scan_line
+
+
+def lex_with_rules(text, parsing_slot_def):
+    rule = RuleLine(text)
+    assert rule.matches(parsing_slot_def=parsing_slot_def)
+    tokens = rule.get_lexical_tokens()
+    for token in tokens:
+        token.remove_escapement()
+    return [(token.type, token.text) for token in tokens]
+
+
+class TestScanLine(object):
+    @pytest.mark.parametrize("text, parsing_slot_def", [
+        ("", False),
+        ("    ", False),
+        ("// comment", False),
+        ("  // indented comment", True),
+        ("    a simple rule", False),
+        ("\ttabs\tand  spaces ", False),
+        ("    words/with/slashes and a // comment", False),
+        ("    [&choice|with|several words?]", False),
+        ("    [choice?randgen/50] [other?!/12.5 %]", False),
+        ("    [a|(weight: 2)|b (weight: 3)] c (weight: 4)", False),
+        ("    ~[&alias#variation?name/20$arg] @[slot$arg#var] %[intent]", False),
+        ("    hot chocolate (weight: 2) = cocoa  // comment", True),
+        ("    a= b", False),
+        ("    value=  other value // comment", True),
+        ("    (weight: 2) not at the end", False),
+        ("    hé ça marche", False),
+    ])
+    def test_same_tokens_as_rules(self, text, parsing_slot_def):
+        tokens = scan_line(text, parsing_slot_def)
+        assert tokens is not None
+        assert [(token.type, token.text) for token in tokens] == \
+            lex_with_rules(text, parsing_slot_def)
+
+    def test_tokens(self):
+        assert \
+            [
+                (token.type, token.text)
+                for token in scan_line("  a [b?]", False)
+            ] == [
+                (TerminalType.indentation, "  "),
+                (TerminalType.word, "a"),
+                (TerminalType.whitespace, " "),
+                (TerminalType.choice_start, "["),
+                (TerminalType.word, "b"),
+                (TerminalType.randgen_marker, "?"),
+                (TerminalType.choice_end, "]"),
+            ]
+
+    @pytest.mark.parametrize("text, parsing_slot_def", [
+        ("~[alias]", False),
+        ("|file.chatette", False),
+        ("    escaped \\[ bracket", False),
+        ("    ; old comment", False),
+        ("    {old/choice}", False),
+        ("    [unclosed choice", False),
+        ("    ~[]", False),
+        ("    [a?/]", False),
+        ("    value = ", True),
+        ("    a ]", False),
+    ])
+    def test_unhandled(self, text, parsing_slot_def):
+        assert scan_line(text, parsing_slot_def) is None
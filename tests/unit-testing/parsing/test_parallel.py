@@ -0,0 +1,146 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions and classes in module 'chatette.parsing.parallel'.
+"""
+
+import io
+import os
+
+import pytest
+
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.parsing.parser import Parser
+from chatette.parsing.parallel import ParallelParser, find_template_files
+from chatette.statistics import Stats
+from chatette.units.ast import AST
+from chatette.utils import UnitType, get_fork_context
+
+
+TEMPLATES = {
+    "master.chatette":
+        "|aliases.chatette\n|slots.chatette\n" + \
+        "%[greet]\n    ~[hello] @[city]\n    ~[hello#formal] sir\n",
+    "aliases.chatette":
+        "~[hello]\n    hello\n    hi\n" + \
+        "|variations.chatette\n",
+    "variations.chatette":
+        "~[hello#formal]\n    good morning\n",
+    "slots.chatette":
+        "@[city]\n    paris\n    london = ldn\n" + \
+        "|master.chatette\n",
+}
+
+
+def write_templates(tmpdir, templates=TEMPLATES):
+    for (file_name, template) in templates.items():
+        with io.open(os.path.join(str(tmpdir), file_name), 'w') as f:
+            f.write(template)
+    return os.path.join(str(tmpdir), "master.chatette")
+
+
+def parse(parser, file_path):
+    Stats.reset_instance()
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    parser.parse_file(file_path)
+    ast = AST.get_or_create()
+    definitions = dict()
+    for unit_type in (UnitType.alias, UnitType.slot, UnitType.intent):
+        for (name, definition) in ast[unit_type].items():
+            definitions[(unit_type, name)] = (
+                definition.declaration_files,
+                sorted(
+                    (variation, sorted(str(rule) for rule in rules))
+                    for (variation, rules) in
+                    definition._variation_rules.items()
+                ),
+                sorted(str(example) for example in definition.generate_all())
+            )
+    return (
+        definitions,
+        list(parser.input_file_manager.get_parsed_file_paths()),
+        str(Stats.get_or_create())
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_system():
+    yield
+    Stats.reset_instance()
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+
+
+def test_find_template_files(tmpdir):
+    file_path = write_templates(tmpdir)
+    assert find_template_files(file_path) == [
+        os.path.join(str(tmpdir), file_name)
+        for file_name in (
+            "master.chatette", "aliases.chatette", "variations.chatette",
+            "slots.chatette"
+        )
+    ]
+
+def test_find_template_files_missing(tmpdir):
+    templates = dict(TEMPLATES)
+    del templates["slots.chatette"]
+    file_path = write_templates(tmpdir, templates)
+    assert len(find_template_files(file_path)) == 3
+
+
+@pytest.mark.skipif(
+    get_fork_context() is None, reason="Cannot fork worker processes."
+)
+class TestParallelParser(object):
+    def test_same_as_parser(self, tmpdir):
+        file_path = write_templates(tmpdir)
+        expected = parse(Parser(), file_path)
+        assert parse(ParallelParser(jobs=3), file_path) == expected
+
+    def test_serial(self, tmpdir):
+        file_path = write_templates(tmpdir)
+        expected = parse(Parser(), file_path)
+        assert parse(ParallelParser(jobs=1), file_path) == expected
+
+    def test_duplicate_declaration(self, tmpdir):
+        templates = dict(TEMPLATES)
+        templates["slots.chatette"] = "@[city]\n    paris\n~[hello]\n    hey\n"
+        file_path = write_templates(tmpdir, templates)
+        with pytest.raises(SyntaxError) as serial_error:
+            parse(Parser(), file_path)
+        with pytest.raises(SyntaxError) as parallel_error:
+            parse(ParallelParser(jobs=3), file_path)
+        assert parallel_error.value.msg == serial_error.value.msg
+        assert parallel_error.value.filename == \
+            os.path.join(str(tmpdir), "slots.chatette")
+        assert parallel_error.value.lineno == serial_error.value.lineno == 3
+
+    def test_syntax_error(self, tmpdir):
+        templates = dict(TEMPLATES)
+        templates["variations.chatette"] = "~[hello#formal\n    hey\n"
+        file_path = write_templates(tmpdir, templates)
+        with pytest.raises(SyntaxError) as error:
+            parse(ParallelParser(jobs=3), file_path)
+        assert error.value.filename == \
+            os.path.join(str(tmpdir), "variations.chatette")
+        assert error.value.lineno == 1
+
+    def test_rule_after_inclusion(self, tmpdir):
+        templates = dict(TEMPLATES)
+        templates["aliases.chatette"] = \
+            "~[hello]\n    hello\n|variations.chatette\n\n    hi\n"
+        file_path = write_templates(tmpdir, templates)
+        with pytest.raises(SyntaxError) as error:
+            parse(ParallelParser(jobs=3), file_path)
+        assert "--parse-jobs" in error.value.msg
+        assert error.value.filename == \
+            os.path.join(str(tmpdir), "aliases.chatette")
+        assert error.value.lineno == 5
+
+    def test_missing_file(self, tmpdir):
+        templates = dict(TEMPLATES)
+        del templates["slots.chatette"]
+        file_path = write_templates(tmpdir, templates)
+        with pytest.raises(IOError):
+            parse(ParallelParser(jobs=3), file_path)
@@ -0,0 +1,131 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions in module 'chatette.parsing.parser'.
+"""
+
+import io
+import os
+
+import pytest
+
+from chatette.parsing.parser import Parser
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.random_stream import RandomStream
+from chatette.units.ast import AST
+from chatette.units.rule import Rule
+from chatette.utils import UnitType
+
+
+TEMPLATE = """
+%[order]
+    ~[want] @[drink] [please (weight: 3)|pls?]
+    give me (weight: 2) something here
+
+~[want]
+    I want (weight: 3)  // comment
+    give me
+
+@[drink]
+    coffee (weight: 3)
+    hot chocolate (weight: 2) = cocoa
+    tea
+"""
+
+
+def parse(tmpdir, template=TEMPLATE):
+    file_path = os.path.join(str(tmpdir), "template.chatette")
+    with io.open(file_path, 'w') as template_file:
+        template_file.write(template)
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    Parser().parse_file(file_path)
+    return AST.get_or_create()
+
+
+class TestRuleWeights(object):
+    def teardown_method(self):
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+
+    def test_weights(self, tmpdir):
+        ast = parse(tmpdir)
+        assert [rule.weight for rule in ast[UnitType.alias]["want"]._all_rules] \
+            == [3, 1]
+        drink_rules = ast[UnitType.slot]["drink"]._all_rules
+        assert [rule.weight for rule in drink_rules] == [3, 2, 1]
+        assert drink_rules[1].slot_value == "cocoa"
+        order_rules = ast[UnitType.intent]["order"]._all_rules
+        assert [rule.weight for rule in order_rules] == [1, 1]
+        assert order_rules[0].has_rule_weights()
+        assert not order_rules[1].has_rule_weights()
+        # Not at the end of the rule: words
+        assert "(weight: 2)" in order_rules[1].as_template_str()
+
+    def test_template_str(self):
+        rule = Rule("test", [], weight=4)
+        assert rule.as_template_str() == " (weight: 4)"
+        assert Rule("test", []).as_template_str() == ""
+
+    def test_template_str_round_trip(self, tmpdir):
+        ast = parse(tmpdir)
+        rule = ast[UnitType.slot]["drink"]._all_rules[1]
+        template_str = rule.as_template_str()
+        ast = parse(tmpdir, "@[drink]\n    " + template_str + "\n")
+        parsed_rule = ast[UnitType.slot]["drink"]._all_rules[0]
+        assert parsed_rule.weight == 2
+        assert parsed_rule.slot_value == "cocoa"
+        assert parsed_rule.as_template_str() == template_str
+
+    @pytest.mark.parametrize("weight", ["0", "00"])
+    def test_invalid_weight(self, tmpdir, weight):
+        with pytest.raises(SyntaxError):
+            parse(tmpdir, "~[a]\n    b (weight: " + weight + ")\n")
+
+    def test_frequencies(self, tmpdir):
+        ast = parse(tmpdir)
+        definition = ast[UnitType.slot]["drink"]
+        rng = RandomStream("weights")
+        counts = dict()
+        for _ in range(6000):
+            text = definition.generate_random(rng=rng).text
+            counts[text] = counts.get(text, 0) + 1
+        assert 2700 <= counts["coffee"] <= 3300
+        assert 1700 <= counts["hot chocolate"] <= 2300
+        assert 800 <= counts["tea"] <= 1200
+
+    def test_nb_possibilities_unchanged(self, tmpdir):
+        ast = parse(tmpdir)
+        assert ast[UnitType.slot]["drink"].get_max_nb_possibilities() == 3
+        assert ast[UnitType.alias]["want"].get_max_nb_possibilities() == 2
+
+    def test_generate_nb_possibilities(self, tmpdir):
+        ast = parse(tmpdir)
+        definition = ast[UnitType.intent]["order"]
+        examples = \
+            definition.generate_nb_possibilities(10, rng=RandomStream("n"))
+        assert len(examples) == 10
+        assert len(set(ex.text for ex in examples)) == 10
+
+    def test_generate_test(self, tmpdir):
+        # 20 examples of weight 10 and 1000 examples of weight 1
+        ast = parse(
+            tmpdir,
+            "%[greet]\n    a ~[x] ~[y] (weight: 10)\n    b ~[x] ~[x] ~[x]\n" + \
+            "~[x]\n" + "".join("    " + str(i) + "\n" for i in range(10)) + \
+            "~[y]\n    c\n    d\n"
+        )
+        definition = ast[UnitType.intent]["greet"]
+        definition.set_nb_examples_asked(None, 20)
+        examples = definition.generate_test([], rng=RandomStream("test"))
+        assert len(examples) == 20
+        assert len(set(ex.text for ex in examples)) == 20
+        # About 16 expected, against less than 1 if weights are ignored
+        assert sum(1 for ex in examples if ex.text.startswith("a")) >= 10
+        training_examples = examples[:10]
+        examples = \
+            definition.generate_test(
+                training_examples, rng=RandomStream("test")
+            )
+        assert len(examples) == 20
+        assert not any(ex in training_examples for ex in examples)
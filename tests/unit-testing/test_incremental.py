@@ -0,0 +1,109 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions and classes in module 'chatette.incremental'.
+"""
+
+import io
+import os
+
+from chatette.incremental import \
+    Manifest, MANIFEST_FILE_NAME, iter_dependencies, get_intent_synonyms, \
+    get_shard_name
+from chatette.parsing.parser import Parser
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.units.ast import AST
+from chatette.utils import UnitType
+
+
+TEMPLATE = """
+%[greet]
+    ~[hi] @[name]
+%[bye]
+    bye
+~[hi]
+    hi
+    hello
+@[name]
+    alice
+    carol = caroline
+"""
+
+
+def parse(tmpdir):
+    file_path = os.path.join(str(tmpdir), "template.chatette")
+    with io.open(file_path, 'w') as template_file:
+        template_file.write(TEMPLATE)
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    parser = Parser()
+    parser.parse_file(file_path)
+    return (AST.get_or_create(), file_path)
+
+
+class TestManifest(object):
+    def teardown_method(self):
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+
+    def test_save_load(self, tmpdir):
+        manifest = Manifest({"seed": "seed"})
+        manifest.record_files([__file__])
+        manifest.save(str(tmpdir))
+        loaded = Manifest.load(str(tmpdir))
+        assert loaded.options == manifest.options
+        assert loaded.files == manifest.files
+        assert loaded.get_changed_files() == []
+
+        Manifest.remove(str(tmpdir))
+        assert Manifest.load(str(tmpdir)) is None
+
+    def test_invalid(self, tmpdir):
+        file_path = os.path.join(str(tmpdir), MANIFEST_FILE_NAME)
+        with io.open(file_path, 'w') as f:
+            f.write(u"{not json")
+        assert Manifest.load(str(tmpdir)) is None
+        with io.open(file_path, 'w') as f:
+            f.write(u'{"format_version": 0}')
+        assert Manifest.load(str(tmpdir)) is None
+
+    def test_changed_files(self, tmpdir):
+        (ast, file_path) = parse(tmpdir)
+        manifest = Manifest(dict())
+        manifest.record_files(
+            InputFileManager.get_or_create().get_parsed_file_paths()
+        )
+        for intent_name in ast[UnitType.intent]:
+            manifest.record_intent(ast[UnitType.intent][intent_name])
+        assert manifest.get_changed_files() == []
+
+        with io.open(file_path, 'a') as template_file:
+            template_file.write(u"    hey\n")
+        assert manifest.get_changed_files() == [file_path]
+        assert \
+            manifest.get_intents_depending_on([file_path]) == ["bye", "greet"]
+        assert manifest.intents["greet"]["units"] == \
+            ["alias:hi", "intent:greet", "slot:name"]
+        assert manifest.intents["bye"]["units"] == ["intent:bye"]
+
+
+class TestDependencies(object):
+    def teardown_method(self):
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+
+    def test_iter_dependencies(self, tmpdir):
+        (ast, _) = parse(tmpdir)
+        dependencies = list(iter_dependencies(ast[UnitType.intent]["greet"]))
+        assert len(dependencies) == 3
+        assert ast[UnitType.slot]["name"] in dependencies
+
+    def test_intent_synonyms(self, tmpdir):
+        (ast, _) = parse(tmpdir)
+        synonyms = get_intent_synonyms(ast[UnitType.intent]["greet"])
+        assert sorted(synonyms["caroline"]) == ["carol"]
+        assert get_intent_synonyms(ast[UnitType.intent]["bye"]) == dict()
+
+    def test_shard_name(self):
+        assert get_shard_name("greet").startswith("greet-")
+        assert get_shard_name("a/b") != get_shard_name("a?b")
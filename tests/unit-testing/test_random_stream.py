@@ -0,0 +1,47 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functions and classes in module 'chatette.random_stream'.
+"""
+
+import random
+
+from chatette.random_stream import RandomStream, GLOBAL_STREAM, get_stream
+
+
+def _draw(rng, nb=10):
+    return [rng.randrange(1000000) for _ in range(nb)]
+
+
+class TestRandomStream(object):
+    def test_seeded(self):
+        assert _draw(RandomStream("seed")) == _draw(RandomStream("seed"))
+        assert _draw(RandomStream("seed")) != _draw(RandomStream("other"))
+
+    def test_child(self):
+        rng = RandomStream("seed")
+        child = rng.child("alias", "name", None)
+        assert rng.child("alias", "name", None) is child
+        assert rng.child("alias", "name", "variation") is not child
+        assert child.seed_str == "seed/alias/name/"
+
+    def test_child_independent_of_parent_draws(self):
+        rng = RandomStream("seed")
+        expected = _draw(rng.child("slot", "name"))
+        other = RandomStream("seed")
+        _draw(other)
+        _draw(other.child("alias", "name"))
+        assert _draw(other.child("slot", "name")) == expected
+
+
+class TestGlobalStream(object):
+    def test_get_stream(self):
+        assert get_stream() is GLOBAL_STREAM
+        rng = RandomStream("seed")
+        assert get_stream(rng) is rng
+
+    def test_global_state(self):
+        random.seed("global")
+        expected = _draw(random)
+        random.seed("global")
+        assert _draw(GLOBAL_STREAM.child("intent", "name")) == expected
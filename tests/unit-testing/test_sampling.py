@@ -0,0 +1,63 @@
+# coding: utf-8
+"""
+Test module.
+Tests the classes in module 'chatette.sampling'.
+"""
+
+import pytest
+
+from chatette.random_stream import RandomStream
+from chatette.sampling import IndexPermutation, AliasTable, make_alias_table
+
+
+class TestIndexPermutation(object):
+    def test_permutation(self):
+        for size in (0, 1, 2, 3, 17, 1000, 4097):
+            permutation = IndexPermutation(size, RandomStream("seed"))
+            assert sorted(permutation) == list(range(size))
+
+    def test_keyed(self):
+        first = list(IndexPermutation(50, RandomStream("seed")))
+        assert list(IndexPermutation(50, RandomStream("seed"))) == first
+        assert list(IndexPermutation(50, RandomStream("other"))) != first
+
+    def test_large_space(self):
+        permutation = IndexPermutation(10**40, RandomStream("seed"))
+        indices = [permutation[i] for i in range(1000)]
+        assert len(set(indices)) == 1000
+        assert all(0 <= index < 10**40 for index in indices)
+
+    def test_out_of_range(self):
+        permutation = IndexPermutation(10)
+        with pytest.raises(IndexError):
+            permutation[10]
+        with pytest.raises(IndexError):
+            permutation[-1]
+
+
+class TestAliasTable(object):
+    def test_exact_probabilities(self):
+        for weights in ([1, 2, 3, 4], [5, 0, 1], [10**40, 1, 3**50]):
+            table = AliasTable(weights)
+            nb_weights = len(weights)
+            masses = list(table.thresholds)
+            for (index, alias) in enumerate(table.aliases):
+                masses[alias] += table.total - table.thresholds[index]
+            # Each mass is proportional to the corresponding weight
+            for (mass, weight) in zip(masses, weights):
+                assert mass * sum(weights) == weight * nb_weights * table.total
+
+    def test_draw(self):
+        table = AliasTable([1, 0, 3])
+        rng = RandomStream("seed")
+        counts = [0, 0, 0]
+        for _ in range(4000):
+            counts[table.draw(rng)] += 1
+        assert counts[1] == 0
+        assert 800 < counts[0] < 1200
+
+    def test_uniform(self):
+        assert make_alias_table([]) is None
+        assert make_alias_table([3, 3, 3]) is None
+        assert make_alias_table([0, 0]) is None
+        assert make_alias_table([1, 2]) is not None
@@ -0,0 +1,158 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functionalities that are present in module
+`chatette.units.__init__`.
+"""
+
+from chatette.units import \
+    Example, IntentExample, Entity, ExampleSet, \
+    add_example_no_dup, extend_no_dup, index_examples, get_randgen_mask
+
+
+def make_example(text, nb_entities=0):
+    entities = [Entity("slot", len(text)) for _ in range(nb_entities)]
+    return Example(text, entities)
+
+
+class TestExample(object):
+    def test_prepend(self):
+        example = Example("test", [Entity("slot", 4)])
+        prepended = example.prepend("a ")
+        assert prepended.text == "a test"
+        assert prepended.entities[0]._start_index == 2
+        assert example.text == "test"
+        assert example.entities[0]._start_index == 0
+        assert example.prepend("") is example
+
+    def test_append(self):
+        example = Example("a ", [Entity("first", 1)])
+        to_append = Example("test", [Entity("second", 4)])
+        appended = example.append(to_append)
+        assert appended.text == "a test"
+        assert [e._start_index for e in appended.entities] == [0, 2]
+        assert example.text == "a "
+        assert len(example.entities) == 1
+        assert to_append.entities[0]._start_index == 0
+
+    def test_remove_leading_space(self):
+        example = Example(" test", [Entity("slot", 5)])
+        without_space = example.remove_leading_space()
+        assert without_space.text == "test"
+        assert without_space.entities[0]._len == 4
+        assert example.text == " test"
+        assert example.entities[0]._len == 5
+        assert without_space.remove_leading_space() is without_space
+
+    def test_shared_entities(self):
+        example = Example("test", [Entity("slot", 4)])
+        assert example.with_text("Test").entities is example.entities
+        assert example.append(Example(" more")).entities is example.entities
+
+    def test_keeps_class(self):
+        example = IntentExample("intent", "test")
+        prepended = example.prepend(" ")
+        assert isinstance(prepended, IntentExample)
+        assert prepended.intent_name == "intent"
+
+
+class TestCompactRepresentation(object):
+    def test_no_dict(self):
+        assert not hasattr(Example("test"), "__dict__")
+        assert not hasattr(IntentExample("intent", "test"), "__dict__")
+        assert not hasattr(Entity("slot", 4), "__dict__")
+
+    def test_entity_offsets(self):
+        entity = Entity("slot", 7, "value", 123456)
+        assert entity._start_index == 123456
+        assert entity._len == 7
+        assert entity.as_dict()["end-index"] == 123463
+        assert entity == Entity("slot", 7, "value", 123456)
+        assert entity != Entity("slot", 7, "value", 0)
+
+    def test_interned_intent_names(self):
+        first = IntentExample("".join(["int", "ent"]), "a")
+        second = IntentExample("".join(["inte", "nt"]), "b")
+        assert first.intent_name is second.intent_name
+
+    def test_equality(self):
+        assert Example("test") == Example("test")
+        assert Example("test") != Example("other")
+        assert Example("test") != None
+
+
+class TestExampleSet(object):
+    def test_empty(self):
+        examples = ExampleSet()
+        assert len(examples) == 0
+        assert examples.to_sorted_list() == []
+
+    def test_add(self):
+        examples = ExampleSet()
+        examples.add(make_example("b"))
+        examples.add(make_example("a"))
+        examples.add(make_example("b"))
+        assert len(examples) == 2
+        assert make_example("a") in examples
+        assert make_example("c") not in examples
+        assert [ex.text for ex in examples.to_sorted_list()] == ["a", "b"]
+
+    def test_most_entities_wins(self):
+        first = make_example("text")
+        richest = make_example("text", 2)
+        examples = ExampleSet([first, richest, make_example("text", 1)])
+        assert len(examples) == 1
+        assert examples.to_list()[0] is richest
+
+    def test_first_wins_on_ties(self):
+        first = make_example("text", 1)
+        examples = ExampleSet([first, make_example("text", 1)])
+        assert examples.to_list()[0] is first
+
+    def test_same_as_sorted_list(self):
+        new_examples = [
+            make_example(text, nb_entities)
+            for (text, nb_entities) in (
+                ("c", 0), ("a", 1), ("b", 0), ("a", 2), ("c", 1), ("b", 0)
+            )
+        ]
+        legacy = []
+        for ex in new_examples:
+            add_example_no_dup(legacy, ex)
+        assert ExampleSet(new_examples).to_sorted_list() == legacy
+        assert extend_no_dup([make_example("c")], new_examples) == legacy
+
+
+class TestIndexExamples(object):
+    def test_index(self):
+        examples = [make_example("a"), make_example("b", 1)]
+        index = index_examples(iter(examples))
+        assert make_example("a") in index
+        assert make_example("b", 1) in index
+        assert make_example("b") not in index
+        assert make_example("c") not in index
+
+    def test_sets_and_none(self):
+        examples = set([make_example("a")])
+        assert index_examples(examples) is examples
+        assert len(index_examples(None)) == 0
+
+
+class TestRandgenMasks(object):
+    def test_interned(self):
+        mask = get_randgen_mask("masks name")
+        assert get_randgen_mask("masks name") == mask
+        assert get_randgen_mask("masks other") not in (0, mask)
+        assert bin(mask).count("1") == 1
+
+    def test_mapping(self):
+        ex = Example("text")
+        assert ex.randgen_mapping is None
+        ex.randgen_mapping = {"masks name": True, "masks other": False}
+        assert ex.randgen_mapping == {"masks name": True, "masks other": False}
+        assert ex._randgen_decided == \
+            get_randgen_mask("masks name") | get_randgen_mask("masks other")
+        assert ex._randgen_values == get_randgen_mask("masks name")
+        assert ex != Example("text")
+        ex.randgen_mapping = None
+        assert ex == Example("text")
@@ -0,0 +1,66 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functionalities that are present in module
+`chatette.units.external_set`.
+"""
+
+import os
+
+import pytest
+
+from chatette.units import Example, Entity, ExampleSet
+from chatette.units import external_set
+from chatette.units.external_set import \
+    ExternalExampleSet, iter_sorted_no_dup
+
+
+def make_example(text, nb_entities=0, value=None):
+    entities = [Entity("slot", len(text), value) for _ in range(nb_entities)]
+    return Example(text, entities)
+
+
+class TestExternalExampleSet(object):
+    def test_empty(self):
+        assert ExternalExampleSet(2).to_sorted_list() == []
+
+    @pytest.mark.parametrize("max_nb_examples", [1, 2, 3, 100])
+    def test_same_as_example_set(self, max_nb_examples, monkeypatch):
+        monkeypatch.setattr(external_set, "_MAX_NB_RUNS", 2)
+        new_examples = [
+            make_example(text, nb_entities, str(i))
+            for (i, (text, nb_entities)) in enumerate((
+                ("c", 0), ("a", 1), ("b", 0), ("a", 2), ("c", 1), ("b", 0),
+                ("d", 1), ("a", 2), ("e", 0), ("d", 1), ("b", 1), ("f", 0)
+            ))
+        ]
+        examples = ExternalExampleSet(max_nb_examples)
+        examples.extend(new_examples)
+        assert examples.to_sorted_list() == \
+            ExampleSet(new_examples).to_sorted_list()
+
+    def test_first_wins_on_ties(self):
+        examples = ExternalExampleSet(1)
+        examples.extend([
+            make_example("text", 1, "first"), make_example("other"),
+            make_example("text", 1, "second")
+        ])
+        assert examples.to_sorted_list()[1].entities[0].value == "first"
+
+    def test_temporary_files_removed(self):
+        examples = ExternalExampleSet(1)
+        examples.extend(make_example(text) for text in ("a", "b", "c"))
+        tmp_dir = examples._tmp_dir
+        assert len(os.listdir(tmp_dir)) == 3
+        assert [ex.text for ex in examples] == ["a", "b", "c"]
+        examples.close()
+        assert not os.path.exists(tmp_dir)
+
+    def test_iter_sorted_no_dup(self):
+        texts = ["b", "a", "c", "a", "b"]
+        assert [
+            ex.text
+            for ex in iter_sorted_no_dup(
+                (make_example(text) for text in texts), 2
+            )
+        ] == ["a", "b", "c"]
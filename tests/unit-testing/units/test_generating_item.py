@@ -0,0 +1,253 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functionalities that are present in module
+`chatette.units.generating_item` (through its concrete subclasses).
+"""
+
+import pytest
+
+from chatette.configuration import Configuration
+from chatette.random_stream import RandomStream
+from chatette.units import iter_no_dup, PossibilityCount
+from chatette.units.word import Word
+from chatette.units.rule import Rule
+from chatette.units.modifiable.choice import Choice
+from chatette.units.modifiable.definitions.alias import AliasDefinition
+from chatette.modifiers.representation import \
+    ModifiersRepresentation, RandgenRepresentation
+
+
+def make_modifiers(casegen=False, randgen_name=None, randgen=False):
+    modifiers = ModifiersRepresentation()
+    modifiers.casegen = casegen
+    randgen_repr = RandgenRepresentation()
+    randgen_repr._present = randgen
+    randgen_repr.name = randgen_name
+    modifiers.randgen = randgen_repr
+    return modifiers
+
+def make_alias():
+    """
+    Returns an alias definition equivalent to:
+        ~[test]
+            [&hello|hi] world[ again?name]
+            [hey?name] you[ too?name]
+    """
+    choice = Choice(
+        False, make_modifiers(casegen=True),
+        [Rule(None, [Word("hello", False)]), Rule(None, [Word("hi", False)])]
+    )
+    optional_choice = Choice(
+        True, make_modifiers(randgen=True, randgen_name="name"),
+        [Rule(None, [Word("again", False)])]
+    )
+    other_choice = Choice(
+        False, make_modifiers(randgen=True, randgen_name="name"),
+        [Rule(None, [Word("hey", False)])]
+    )
+    last_choice = Choice(
+        True, make_modifiers(randgen=True, randgen_name="name"),
+        [Rule(None, [Word("too", False)])]
+    )
+    alias = AliasDefinition("test", make_modifiers())
+    alias.add_rule(
+        Rule("test", [choice, Word("world", True), optional_choice])
+    )
+    alias.add_rule(
+        Rule("test", [other_choice, Word("you", True), last_choice])
+    )
+    return alias
+
+
+class TestGenerateAt(object):
+    def test_word(self):
+        word = Word("word", True)
+        assert word.generate_at(0).text == " word"
+        with pytest.raises(IndexError):
+            word.generate_at(1)
+
+    def test_rule(self):
+        rule = Rule(None, [
+            Choice(False, make_modifiers(), [
+                Rule(None, [Word("a", False)]), Rule(None, [Word("b", False)])
+            ]),
+            Choice(True, make_modifiers(), [
+                Rule(None, [Word("c", False)]), Rule(None, [Word("d", False)])
+            ]),
+        ])
+        texts = [rule.generate_at(i).text for i in range(4)]
+        assert texts == ["a c", "a d", "b c", "b d"]
+        with pytest.raises(IndexError):
+            rule.generate_at(4)
+        with pytest.raises(IndexError):
+            rule.generate_at(-1)
+
+    def test_same_examples_as_generate_all(self):
+        alias = make_alias()
+        all_texts = set(ex.text for ex in alias.generate_all())
+        indexed_examples = [
+            alias.generate_at(i)
+            for i in range(alias.get_max_nb_possibilities())
+        ]
+        indexed_texts = set(
+            ex.text for ex in indexed_examples if ex is not None
+        )
+        assert indexed_texts == all_texts
+
+    def test_inconsistent_randgen(self):
+        alias = make_alias()
+        # Using the same random generation name inconsistently
+        # makes some indices impossible to generate
+        examples = [
+            alias.generate_at(i)
+            for i in range(alias.get_max_nb_possibilities())
+        ]
+        assert any(ex is None for ex in examples)
+        texts = [ex.text for ex in examples if ex is not None]
+        assert "hey you too" in texts
+        assert "you" in texts
+        assert "hey you" not in texts
+        assert "you too" not in texts
+
+
+class TestIndexOf(object):
+    def test_round_trip(self):
+        alias = make_alias()
+        for i in range(alias.get_max_nb_possibilities()):
+            example = alias.generate_at(i)
+            if example is None:
+                continue
+            index = alias.index_of(example)
+            assert index is not None
+            assert alias.generate_at(index).text == example.text
+
+    def test_unknown_example(self):
+        alias = make_alias()
+        example = alias.generate_at(0).with_text("not generated")
+        assert alias.index_of(example) is None
+
+
+class TestIterAll(object):
+    def test_lazy(self):
+        alias = make_alias()
+        examples = alias.iter_all()
+        assert not isinstance(examples, list)
+        assert next(examples).text != ""
+
+    def test_same_examples_as_generate_all(self):
+        alias = make_alias()
+        all_texts = set(ex.text for ex in alias.generate_all())
+        iterated_texts = [ex.text for ex in alias.iter_all()]
+        assert set(iterated_texts) == all_texts
+        assert "hey you" not in iterated_texts
+        assert "you too" not in iterated_texts
+
+    def test_no_dup(self):
+        alias = make_alias()
+        texts = [ex.text for ex in iter_no_dup(alias.iter_all())]
+        assert len(texts) == len(set(texts))
+        assert len(texts) == len(alias.generate_all())
+
+
+class TestGenerateNbPossibilities(object):
+    def test_distinct_examples(self):
+        alias = make_alias()
+        examples = alias.generate_nb_possibilities(3)
+        assert len(examples) == 3
+        assert len(set(ex.text for ex in examples)) == 3
+
+    def test_exact_number_of_examples(self):
+        alias = make_alias()
+        nb_examples = alias.count_possibilities().value
+        for seed in ("a", "b", "c"):
+            examples = \
+                alias._generate_n_strategy(nb_examples, RandomStream(seed))
+            assert len(examples) == nb_examples
+
+    def test_seeded(self):
+        alias = make_alias()
+        assert \
+            alias._generate_n_strategy(3, RandomStream("seed")) == \
+            alias._generate_n_strategy(3, RandomStream("seed"))
+
+
+class TestGenerateRandomBatch(object):
+    @pytest.mark.parametrize("seed", ["a", "b"])
+    def test_same_examples_as_generate_random(self, seed):
+        alias = make_alias()
+        rng = RandomStream(seed)
+        expected = [alias.generate_random(rng=rng) for _ in range(50)]
+        assert alias.generate_random_batch(50, rng=RandomStream(seed)) == \
+            expected
+
+    def test_rule(self):
+        rule = make_alias()._all_rules[0]
+        rng = RandomStream("rule")
+        expected = [rule.generate_random(rng=rng) for _ in range(20)]
+        assert rule.generate_random_batch(20, rng=RandomStream("rule")) == \
+            expected
+
+    def test_global_stream(self):
+        examples = make_alias().generate_random_batch(5)
+        assert len(examples) == 5
+
+
+class TestCountPossibilities(object):
+    def test_exact_when_enumerated(self):
+        alias = make_alias()
+        count = alias.count_possibilities()
+        assert count == PossibilityCount(len(alias.generate_all()))
+        assert count.value < alias.get_max_nb_possibilities()
+
+    def test_tight_bound(self):
+        config = Configuration.get_or_create()
+        previous_threshold = config.exact_count_threshold
+        config.exact_count_threshold = 0
+        try:
+            duplicated_choice = Choice(
+                False, make_modifiers(),
+                [Rule(None, [Word("a", False)]), Rule(None, [Word("a", False)])]
+            )
+            rule = Rule(None, [duplicated_choice, Word("b", True)])
+            count = rule.count_possibilities()
+            assert count == PossibilityCount(2, False)
+            assert count.value >= len(rule.generate_all())
+        finally:
+            config.exact_count_threshold = previous_threshold
+
+    def test_memoized(self):
+        alias = make_alias()
+        assert alias.count_possibilities() is alias.count_possibilities()
+
+
+class TestWeightedRuleSampling(object):
+    def test_weighted_by_nb_possibilities(self):
+        alias = AliasDefinition("test", make_modifiers())
+        alias.add_rule(Rule("test", [Word("one", False)]))
+        alias.add_rule(
+            Rule(
+                "test",
+                [
+                    Choice(
+                        False, make_modifiers(),
+                        [
+                            Rule(None, [Word(word, False)])
+                            for word in ("two", "three", "four")
+                        ]
+                    )
+                ]
+            )
+        )
+        config = Configuration.get_or_create()
+        config.weighted_rule_sampling = True
+        try:
+            rng = RandomStream("seed")
+            texts = [alias.generate_random(rng=rng).text for _ in range(4000)]
+        finally:
+            config.weighted_rule_sampling = False
+        for word in ("one", "two", "three", "four"):
+            assert 800 < texts.count(word) < 1200
+        rng = RandomStream("seed")
+        texts = [alias.generate_random(rng=rng).text for _ in range(4000)]
+        assert texts.count("one") > 1800
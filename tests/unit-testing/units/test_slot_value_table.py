@@ -0,0 +1,203 @@
+# coding: utf-8
+"""
+Test module.
+Tests the functionalities that are present in module
+`chatette.units.slot_value_table`.
+"""
+
+import io
+import os
+
+import pytest
+
+from chatette.compiler import Program
+from chatette.compiler.codegen import generate_module
+from chatette.configuration import Configuration
+from chatette.parsing.input_file_manager import InputFileManager
+from chatette.parsing.parser import Parser
+from chatette.random_stream import RandomStream
+from chatette.statistics import Stats
+from chatette.units import Example
+from chatette.units.ast import AST
+from chatette.units.slot_value_table import SlotValueTable
+from chatette.utils import UnitType
+
+
+CSV_CONTENT = u'paris\nnew york,NYC\n"são paulo, br",sp\n\nlos angeles, \n'
+TSV_CONTENT = u'tokyo\tTYO\n"rome"\n'
+TEMPLATE = u"""
+%[go]
+    go to @[city]
+    fly to @[city#far]
+
+@[city](file: cities.csv)
+    london
+@[city#far](more.tsv)
+"""
+
+
+def write_file(tmpdir, file_name, content):
+    file_path = os.path.join(str(tmpdir), file_name)
+    with io.open(file_path, 'w', encoding="utf-8") as f:
+        f.write(content)
+    return file_path
+
+
+def parse(tmpdir):
+    write_file(tmpdir, "cities.csv", CSV_CONTENT)
+    write_file(tmpdir, "more.tsv", TSV_CONTENT)
+    file_path = write_file(tmpdir, "template.chatette", TEMPLATE)
+    Stats.reset_instance()
+    AST.reset_instance()
+    InputFileManager.reset_instance(None)
+    parser = Parser()
+    parser.parse_file(file_path)
+    return parser
+
+
+class TestSlotValueTable(object):
+    def test_from_csv(self, tmpdir):
+        table = \
+            SlotValueTable.from_file(
+                write_file(tmpdir, "cities.csv", CSV_CONTENT)
+            )
+        assert list(table.iter_rows()) == [
+            (u"paris", None), (u"new york", u"NYC"),
+            (u"são paulo, br", u"sp"), (u"los angeles", None)
+        ]
+
+    def test_from_tsv(self, tmpdir):
+        table = \
+            SlotValueTable.from_file(
+                write_file(tmpdir, "more.tsv", TSV_CONTENT)
+            )
+        assert list(table.iter_rows()) == \
+            [(u"tokyo", u"TYO"), (u'"rome"', None)]
+
+    @pytest.mark.parametrize("content", [u"a,b,c\n", u"a\n,b\n"])
+    def test_invalid_rows(self, tmpdir, content):
+        file_path = write_file(tmpdir, "invalid.csv", content)
+        with pytest.raises(ValueError):
+            SlotValueTable.from_file(file_path)
+
+    def test_generate(self):
+        table = SlotValueTable(["a", "b", "a"], [None, "B", "A"])
+        assert len(table) == table.get_max_nb_possibilities() == 3
+        assert table.count_possibilities().value == 2
+        assert table.generate_at(1).text == "b"
+        assert table.generate_at(1)._slot_value == "B"
+        assert [ex.text for ex in table.generate_all()] == ["a", "b"]
+        assert [ex._slot_value for ex in table.iter_all()] == \
+            [None, "B", "A"]
+        assert table.generate_random(rng=RandomStream("seed")).text in \
+            ("a", "b")
+
+    def test_index_of(self):
+        table = SlotValueTable(["a", "bc", "b"])
+        assert table.index_of(Example("b")) == 2
+        assert table.index_of(Example("c")) is None
+
+
+class TestSlotDefinitionWithTable(object):
+    def teardown_method(self):
+        Stats.reset_instance()
+        AST.reset_instance()
+        InputFileManager.reset_instance(None)
+
+    def test_parse(self, tmpdir):
+        parser = parse(tmpdir)
+        slot = AST.get_or_create()[UnitType.slot]["city"]
+        assert slot.get_max_nb_possibilities() == 7
+        assert slot.get_max_nb_possibilities(variation_name="far") == 2
+        assert parser.input_file_manager.get_parsed_file_paths() == [
+            os.path.join(str(tmpdir), file_name)
+            for file_name in ("template.chatette", "cities.csv", "more.tsv")
+        ]
+
+    def test_entities(self, tmpdir):
+        parse(tmpdir)
+        intent = AST.get_or_create()[UnitType.intent]["go"]
+        values = dict(
+            (ex.text, ex.entities[0].value) for ex in intent.generate_all()
+        )
+        assert values == {
+            "go to paris": "paris", "go to new york": "NYC",
+            u"go to são paulo, br": "sp", "go to los angeles": "los angeles",
+            "go to london": "london", "go to tokyo": "TYO",
+            'go to "rome"': '"rome"', "fly to tokyo": "TYO",
+            'fly to "rome"': '"rome"'
+        }
+
+    def test_synonyms(self, tmpdir):
+        parse(tmpdir)
+        synonyms = AST.get_or_create()[UnitType.slot]["city"] \
+            .get_synonyms_dict()
+        assert synonyms["NYC"] == ["new york"]
+        assert synonyms["paris"] == ["paris"]
+
+    def test_compiled(self, tmpdir):
+        parse(tmpdir)
+        ast = AST.get_or_create()
+        program = Program(ast)
+        for variation_name in (None, "far"):
+            definition = ast[UnitType.slot]["city"]
+            rng = RandomStream("seed")
+            expected = [
+                definition.generate_random(
+                    rng=rng, variation_name=variation_name
+                )
+                for _ in range(100)
+            ]
+            assert \
+                program.generate_random_examples(
+                    100, UnitType.slot, "city", variation_name,
+                    RandomStream("seed")
+                ) == expected
+
+    @pytest.mark.parametrize("weighted_rule_sampling", [False, True])
+    def test_draw_frequencies(self, tmpdir, weighted_rule_sampling):
+        write_file(
+            tmpdir, "cities.csv",
+            u'\n'.join(u"city" + str(i) for i in range(1000))
+        )
+        file_path = \
+            write_file(
+                tmpdir, "template.chatette",
+                u"@[city](cities.csv)\n    london\n    paris\n"
+            )
+        Parser().parse_file(file_path)
+        config = Configuration.get_or_create()
+        config.weighted_rule_sampling = weighted_rule_sampling
+        try:
+            definition = AST.get_or_create()[UnitType.slot]["city"]
+            rng = RandomStream("seed")
+            examples = [
+                definition.generate_random(rng=rng) for _ in range(20000)
+            ]
+            nb_london = sum(1 for ex in examples if ex.text == "london")
+            assert nb_london < 80  # about 20 expected
+            assert \
+                Program(AST.get_or_create()).generate_random_examples(
+                    20000, UnitType.slot, "city", None, RandomStream("seed")
+                ) == examples
+            namespace = dict()
+            exec(
+                compile(
+                    generate_module(AST.get_or_create()), "generated", "exec"
+                ),
+                namespace
+            )
+            assert \
+                namespace["generate_random_examples"](
+                    20000, "slot", "city", None,
+                    namespace["make_stream"]("seed")
+                ) == [ex.as_dict() for ex in examples]
+        finally:
+            config.weighted_rule_sampling = False
+
+    def test_missing_file(self, tmpdir):
+        file_path = \
+            write_file(tmpdir, "template.chatette", u"@[city](missing.csv)\n")
+        with pytest.raises(SyntaxError) as error:
+            Parser().parse_file(file_path)
+        assert error.value.lineno == 1